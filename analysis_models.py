@@ -0,0 +1,148 @@
+"""
+Typed analysis results for Survey Quality Checker
+pydantic models of the sections a model returns. Every response is validated once by the
+compiled pydantic-core validator, which coerces loosely typed values ("true", "True", 1, null)
+and fills in missing fields, so downstream code can rely on the types instead of re-checking
+.get(...) defaults. Unknown keys (model_verdicts, incomplete_response, ...) are kept.
+"""
+
+from typing import Annotated, List
+
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+TRUE_STRINGS = {'true', 'yes', 'y', 't', '1'}
+NOT_VALID_STRINGS = {'not valid', 'not_valid', 'notvalid', 'invalid'}
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_STRINGS
+    return bool(value)
+
+
+def _to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return '; '.join(str(part) for part in value if part is not None)
+    return str(value)
+
+
+def _to_text_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, (list, tuple)):
+        return [_to_text(part) for part in value if part is not None]
+    return [_to_text(value)]
+
+
+def _to_number(value):
+    return _to_text(value).strip()
+
+
+def _to_validity(value):
+    text = ' '.join(_to_text(value).split())
+    if text.lower() == 'valid':
+        return 'Valid'
+    if text.lower() in NOT_VALID_STRINGS:
+        return 'Not Valid'
+    return text
+
+
+def _to_references(value):
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [reference for reference in value if isinstance(reference, dict)]
+
+
+def _to_section(value):
+    return value if isinstance(value, dict) else {}
+
+
+Flag = Annotated[bool, BeforeValidator(_to_bool)]
+Text = Annotated[str, BeforeValidator(_to_text)]
+TextList = Annotated[List[str], BeforeValidator(_to_text_list)]
+Number = Annotated[str, BeforeValidator(_to_number)]
+Validity = Annotated[str, BeforeValidator(_to_validity)]
+
+
+class AnalysisModel(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    def to_dict(self):
+        """Return the plain dict form used for JSON results and the response pipeline"""
+        return self.model_dump()
+
+
+class GeneralInstructionsAnalysis(AnalysisModel):
+    instructions_present: Flag = False
+    scale_correctly_defined: Flag = False
+    scale_definition_text: Text = ''
+    general_instructions_text: Text = ''
+    issues_found: TextList = Field(default_factory=list)
+    recommendations: TextList = Field(default_factory=list)
+
+
+class SurveyPartsAnalysis(AnalysisModel):
+    part_2_has_only_definitions: Flag = False
+    part_3_has_only_definitions: Flag = False
+    part_2_content_summary: Text = ''
+    part_3_content_summary: Text = ''
+    part_2_issues: TextList = Field(default_factory=list)
+    part_3_issues: TextList = Field(default_factory=list)
+    part_2_recommendations: TextList = Field(default_factory=list)
+    part_3_recommendations: TextList = Field(default_factory=list)
+
+
+class DuplicateReference(AnalysisModel):
+    table_number: Number = ''
+    item_number: Number = ''
+
+
+class QuestionAnalysis(AnalysisModel):
+    table_number: Number = ''
+    item_number: Number = ''
+    variable_name: Text = ''
+    question_text: Text = ''
+    validity: Validity = ''
+    reason: Text = ''
+    alternative_question: Text = ''
+    duplicates_with: Annotated[List[DuplicateReference], BeforeValidator(_to_references)] = Field(default_factory=list)
+
+    @property
+    def is_valid(self):
+        return self.validity == 'Valid'
+
+    @property
+    def is_not_valid(self):
+        return self.validity == 'Not Valid'
+
+
+class SurveyAnalysis(AnalysisModel):
+    survey_general_instructions_analysis: Annotated[GeneralInstructionsAnalysis, BeforeValidator(_to_section)] = Field(
+        default_factory=GeneralInstructionsAnalysis)
+    survey_parts_analysis: Annotated[SurveyPartsAnalysis, BeforeValidator(_to_section)] = Field(
+        default_factory=SurveyPartsAnalysis)
+    individual_question_analysis: Annotated[List[QuestionAnalysis], BeforeValidator(_to_references)] = Field(
+        default_factory=list)
+    overall_assessment: Text = ''
+    recommendations: TextList = Field(default_factory=list)
+
+
+def validate_analysis(data):
+    """Return data (a response or file analysis dict) as a SurveyAnalysis; SurveyAnalysis is returned as is"""
+    if isinstance(data, SurveyAnalysis):
+        return data
+    return SurveyAnalysis.model_validate(data)
+
+
+def normalize_analysis(data):
+    """Validate a model response once and return it as a plain dict with coerced values and defaults"""
+    return validate_analysis(data).to_dict()
+
+
+def normalize_items(items):
+    """Validate a list of individual_question_analysis entries, e.g. the ones a stream delivered"""
+    return [QuestionAnalysis.model_validate(item).to_dict() for item in _to_references(items)]
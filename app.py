@@ -1,7 +1,7 @@
 import streamlit as st
 import os
+import io
 import json
-import tempfile
 from docx import Document
 from docx.shared import Inches
 from datetime import datetime
@@ -9,16 +9,47 @@ import requests
 import time
 import concurrent.futures
 from threading import Lock
+from functools import partial
 
 # Import the prompts module
 from prompts import (
     get_deepseek_prompt
 )
+from response_cache import get_response_cache, make_cache_key
+from provider_client import get_provider_client
+from streaming import IncrementalItemParser, StreamingResultWriter, sse_content_deltas, stream_completed
+from sharding import sharded_analysis_pipeline, apply_duplicate_groups
+from revisions import incremental_analysis_pipeline, get_revision_store
+from survey_ir import structured_analysis_pipeline, match_survey_items
+from rule_engine import screen_survey, attach_rule_findings
+from duplicate_index import duplicate_groups
+from consensus import consensus_items
+from json_extraction import extract_valid_json, salvage_json, ANALYSIS_SECTIONS
+from completeness import expected_items, find_missing_items, completeness_pipeline
+from analysis_models import validate_analysis, normalize_analysis, normalize_items
+from extraction import iter_upload_fragments, collect_fragments
+from extraction_cache import get_extraction_cache, make_extraction_key
+from report_cache import get_report_cache
+from docx_report import append_question_sections
+
+# How a survey is split into model requests, with the labels shown in Settings
+ANALYSIS_MODES = {
+    'full': "Whole survey in one request",
+    'sharded': "One parallel request per variable table",
+    'incremental': "Only tables and items changed since the last revision of the same document",
+    'structured': "Locally parsed outline with items referenced by ID"
+}
+
+# Bump when the layout of build_docx_report changes, so cached reports are rendered again
+REPORT_TEMPLATE_VERSION = "1"
+
+# Parallel workers for threaded callers of call_ai_model; the provider connection pool is sized to match
+MAX_ANALYSIS_WORKERS = 4
 
 # Function to load API keys from key.json
-def load_api_keys():
+def load_api_keys(path='key.json'):
     try:
-        with open('key.json', 'r') as f:
+        with open(path, 'r') as f:
             keys_data = json.load(f)
 
         # Create a mapping from service names to API keys
@@ -66,12 +97,15 @@ def main():
     """)
 
     # Create tabs for different sections - removed Model Management tab
-    tab1, tab2 = st.tabs(["Upload & Results", "Settings"])
+    tab1, tab2, tab3 = st.tabs(["Upload & Results", "Batch Dashboard", "Settings"])
 
     with tab1:
         upload_and_results_section()
 
     with tab2:
+        dashboard_section()
+
+    with tab3:
         settings_section()
 
 def upload_and_results_section():
@@ -178,19 +212,34 @@ def upload_and_results_section():
 
     if st.session_state.analysis_results:
         st.success(f"Found {len(st.session_state.analysis_results)} analysis result(s)")
+        report_cache = get_report_cache()
+        export_all_section(st.session_state.analysis_results)
 
         for i, result in enumerate(st.session_state.analysis_results):
             with st.expander(f"Result {i+1}: {result['filename']}"):
-                # Auto-generate DOCX file and provide download link
-                docx_file = generate_docx(result['analysis'], result['filename'])
-                with open(docx_file, "rb") as f:
+                # Reports are rendered once (in the background after analysis, or on request) and served from memory
+                key = report_key(result)
+                report = report_cache.get(key)
+                if report is None and st.button("Prepare DOCX Report", key=f"docx_prepare_{i}"):
+                    report = report_cache.render(key, partial(render_docx_bytes, result['analysis'], result['filename']))
+                if report is not None:
                     st.download_button(
                         label="Download DOCX Report",
-                        data=f,
+                        data=report,
                         file_name=f"quality_report_{result['filename']}.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                         key=f"docx_download_{i}"
                     )
+                elif report_cache.pending(key):
+                    st.caption("The DOCX report is being prepared in the background.")
+
+                for model_used in result['analysis'].get('models_used', []):
+                    summary = model_used['analysis'].get('revision_summary')
+                    if summary:
+                        st.caption(
+                            f"{model_used['model_name']}: reused {summary['items_reused']} verdict(s) from the previous revision, "
+                            f"re-analyzed {summary['items_requeried']} item(s) in {summary['tables_requeried']} table(s)"
+                        )
 
                 # Optional: Show a preview of the analysis (first few lines)
                 with st.popover("View Analysis Summary"):
@@ -203,6 +252,67 @@ def upload_and_results_section():
         st.info("No analysis results yet. Upload surveys and run analysis to see results here.")
 
 
+def export_all_section(results):
+    """
+    Offer every report, raw JSON result and an index as one ZIP, built once per set of results
+    into a temporary file; the download reads it from disk when clicked
+    """
+    from report_export import create_export_archive, read_export_archive, remove_export_archive
+
+    keys = tuple(report_key(result) for result in results)
+    export = st.session_state.get('reports_zip')
+    if export is not None and export['keys'] != keys:
+        # The loaded results changed, the archive of the previous ones is no longer offered
+        remove_export_archive(export['path'])
+        export = st.session_state.reports_zip = None
+    if export is None and st.button("Prepare ZIP of All Reports", key="zip_prepare"):
+        with st.spinner(f"Rendering {len(results)} report(s)..."):
+            path = create_export_archive(results)
+        export = st.session_state.reports_zip = {'keys': keys, 'path': path}
+    if export is not None:
+        st.download_button(
+            label="Download All Reports (ZIP)",
+            data=partial(read_export_archive, export['path']),
+            file_name=f"quality_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            mime="application/zip",
+            key="zip_download"
+        )
+
+
+def dashboard_section():
+    """Batch-level scores, criterion failure rates, breakdowns and model agreement over all loaded results"""
+    from dashboard import get_batch_dashboard
+
+    st.header("Batch Dashboard")
+    if not st.session_state.analysis_results:
+        st.info("No analysis results yet. Analyze surveys to see batch statistics here.")
+        return
+
+    dashboard = get_batch_dashboard(st.session_state.analysis_results)
+    totals = dashboard.totals
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Files", totals['files'])
+    col2.metric("Items", totals['items'])
+    col3.metric("Question Quality Score", f"{totals['score']:.1f}%")
+    col4.metric("Model Agreement", "N/A" if totals['model_agreement'] is None else f"{totals['model_agreement']:.1f}%")
+    st.caption(f"{totals['valid']} valid and {totals['not_valid']} invalid item(s); "
+               f"{totals['compared_items']} item(s) were analyzed by more than one model.")
+
+    st.subheader("Per-File Scores")
+    st.dataframe(dashboard.file_scores, hide_index=True)
+
+    st.subheader("Criterion Failure Rates")
+    st.caption("Criteria cited in the reasons of analyzed items, as a share of all items and of invalid items.")
+    st.dataframe(dashboard.criteria_rates, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("By Variable")
+        st.dataframe(dashboard.variable_breakdown, hide_index=True)
+    with col2:
+        st.subheader("By Table")
+        st.dataframe(dashboard.table_breakdown, hide_index=True)
+
 
 def settings_section():
     st.header("Application Settings")
@@ -227,6 +337,120 @@ def settings_section():
             model['temperature'] = default_temperature
         st.success(f"Default temperature {default_temperature} applied to all models!")
 
+    st.subheader("Response Cache")
+    use_cache = st.checkbox(
+        "Reuse cached AI responses for unchanged surveys",
+        value=all(model.get('use_cache', True) for model in st.session_state.models),
+        key="use_response_cache"
+    )
+    for model in st.session_state.models:
+        model['use_cache'] = use_cache
+
+    cache_stats = get_response_cache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cached Responses", cache_stats['entries'])
+    col2.metric("Cache Size", f"{cache_stats['bytes'] / (1024 * 1024):.1f} MB")
+    col3.metric("Hits", cache_stats['hits'])
+    col4.metric("Misses", cache_stats['misses'])
+    if st.button("Clear response cache"):
+        get_response_cache().clear()
+        st.success("Response cache cleared!")
+
+    st.subheader("Extraction Cache")
+    extraction_stats = get_extraction_cache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cached Files", extraction_stats['entries'])
+    col2.metric("In Memory", f"{extraction_stats['memory_entries']} ({extraction_stats['memory_bytes'] / (1024 * 1024):.1f} MB)")
+    col3.metric("Hits", extraction_stats['memory_hits'] + extraction_stats['disk_hits'])
+    col4.metric("Misses", extraction_stats['misses'])
+    st.caption(f"Text extracted from uploads is reused while the file is unchanged; "
+               f"{extraction_stats['memory_hits']} hit(s) from memory and {extraction_stats['disk_hits']} from disk, "
+               f"{extraction_stats['bytes'] / (1024 * 1024):.1f} MB on disk.")
+    if st.button("Clear extraction cache"):
+        get_extraction_cache().clear()
+        st.success("Extraction cache cleared!")
+
+    st.subheader("Report Cache")
+    report_stats = get_report_cache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cached Reports", f"{report_stats['entries']} ({report_stats['bytes'] / (1024 * 1024):.1f} MB)")
+    col2.metric("Rendered", report_stats['renders'])
+    col3.metric("Hits", report_stats['hits'])
+    col4.metric("Evictions", report_stats['evictions'])
+    st.caption("DOCX reports are rendered once per analysis and served from memory on later reruns.")
+    if st.button("Clear report cache"):
+        get_report_cache().clear()
+        st.success("Report cache cleared!")
+
+    st.subheader("Streaming")
+    stream_responses = st.checkbox(
+        "Stream model responses and show each question's verdict as soon as it arrives",
+        value=all(model.get('stream', True) for model in st.session_state.models),
+        key="stream_responses"
+    )
+    for model in st.session_state.models:
+        model['stream'] = stream_responses
+
+    st.subheader("Completeness")
+    follow_up_missing = st.checkbox(
+        "Re-request only the survey items a model response skipped",
+        value=all(model.get('follow_up_missing', True) for model in st.session_state.models),
+        key="follow_up_missing"
+    )
+    for model in st.session_state.models:
+        model['follow_up_missing'] = follow_up_missing
+
+    st.subheader("Local Rules")
+    skip_rule_decided = st.checkbox(
+        "Decide items that fail a local rule (sentence structure, and/or, verbs, capitalization) without the model",
+        value=all(model.get('skip_rule_decided', False) for model in st.session_state.models),
+        key="skip_rule_decided"
+    )
+    for model in st.session_state.models:
+        model['skip_rule_decided'] = skip_rule_decided
+    st.caption("Rule findings are always attached to each item; skipping decided items applies to the structured analysis mode.")
+    local_duplicates = st.checkbox(
+        "Mark items with nearly identical wording as duplicates (Not Valid after the first) without the model",
+        value=all(model.get('local_duplicates', True) for model in st.session_state.models),
+        key="local_duplicates"
+    )
+    for model in st.session_state.models:
+        model['local_duplicates'] = local_duplicates
+
+    st.subheader("Analysis Mode")
+    st.radio(
+        "How each survey is sent to the AI model",
+        options=list(ANALYSIS_MODES),
+        format_func=ANALYSIS_MODES.get,
+        key="analysis_mode"
+    )
+    st.caption("Per-table requests speed up long surveys and avoid output-length limits; a final pass checks for "
+               "duplicate items across tables. The revision mode reuses stored verdicts for unchanged items of resubmitted surveys.")
+
+    st.subheader("Concurrency")
+    from async_engine import DEFAULT_PROVIDER_CONCURRENCY
+    if 'provider_concurrency' not in st.session_state:
+        st.session_state.provider_concurrency = dict(DEFAULT_PROVIDER_CONCURRENCY)
+    for provider in sorted({model['provider'] for model in st.session_state.models}):
+        st.session_state.provider_concurrency[provider] = st.number_input(
+            f"Maximum concurrent {provider} requests",
+            min_value=1,
+            max_value=128,
+            value=st.session_state.provider_concurrency.get(provider, DEFAULT_PROVIDER_CONCURRENCY.get(provider, 8)),
+            key=f"concurrency_{provider}"
+        )
+    st.caption("All uploaded files are analyzed at once; this caps the in-flight API requests per provider to stay under rate limits.")
+
+    st.subheader("Provider Connections")
+    from async_engine import engine_metrics
+    client_metrics = get_provider_client(pool_size=MAX_ANALYSIS_WORKERS).metrics()
+    engine_counts = engine_metrics()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("API Requests", client_metrics['requests'] + engine_counts['requests'])
+    col2.metric("Connections Reused", client_metrics['connections_reused'])
+    col3.metric("Retries", client_metrics['retries'] + engine_counts['retries'])
+    col4.metric("Failed Requests", client_metrics['failures'] + engine_counts['failures'])
+
     st.subheader("Quality Metrics")
     metrics = st.multiselect(
         "Select quality metrics to analyze:",
@@ -234,17 +458,28 @@ def settings_section():
         default=["Clarity", "Bias Detection", "Relevance"]
     )
 
-def analyze_single_file(uploaded_file, selected_models):
-    """Analyze a single survey file using selected AI models - returns analysis without UI updates"""
+def analyze_single_file(uploaded_file, selected_models, on_item=None, mode='full'):
+    """
+    Analyze a single survey file using selected AI models - returns analysis without UI updates.
+    on_item, if given, is called with each question analysis as soon as a streaming model returns it.
+    mode is one of ANALYSIS_MODES: 'full' sends the whole survey in one request, 'sharded' sends every
+    variable table as its own request (see sharding.py), 'incremental' only sends what changed since
+    the last analyzed revision of the same document (see revisions.py) and 'structured' sends a locally
+    parsed outline whose items the model answers by ID (see survey_ir.py).
+    """
     # Process different file types
     file_content = process_uploaded_file(uploaded_file)
 
     if not file_content:
         return {'filename': uploaded_file.name, 'error': f"Could not process file: {uploaded_file.name}"}
 
-    # Prepare analysis for each selected model
-    file_analysis = {
-        'filename': uploaded_file.name,
+    return run_pipeline(file_analysis_pipeline(uploaded_file.name, file_content, selected_models, mode),
+                        on_item=on_item)
+
+def new_file_analysis(filename):
+    """Return an empty analysis record for a file"""
+    return {
+        'filename': filename,
         'models_used': [],
         'survey_general_instructions_analysis': {},
         'survey_parts_analysis': {},
@@ -254,208 +489,267 @@ def analyze_single_file(uploaded_file, selected_models):
         'timestamp': datetime.now().isoformat()
     }
 
-    for model in selected_models:
-        # Call AI model for analysis
-        model_analysis = call_ai_model(file_content, model)
-        file_analysis['models_used'].append({
-            'model_name': model['name'],
-            'analysis': model_analysis
-        })
-
-        # Process model analysis results
-        if 'recommendations' in model_analysis:
-            file_analysis['recommendations'].extend(model_analysis['recommendations'])
-
-        # Include detailed analysis components if present
-        if 'individual_question_analysis' in model_analysis:
-            file_analysis['individual_question_analysis'].extend(model_analysis['individual_question_analysis'])
-
-            # Sort the individual question analysis by table number to group Part 2 and Part 3 items separately
-            # Handle both numeric and text-based table identifiers
-            def sort_key(item):
-                table_num = item.get('table_number', '999')
+def file_analysis_pipeline(filename, file_content, selected_models, mode='full'):
+    """
+    Plan the model calls for one file and merge their results.
+    This is a generator: it yields lists of call_ai_model keyword arguments, is sent back
+    the list of analyses in the same order, and returns the result dict. The same pipeline
+    is driven by run_pipeline (threads) and by the asyncio engine in async_engine.py.
+    All selected models run concurrently and their items are merged into one consensus record per item.
+    Every item is screened by the local rule engine first (see rule_engine.py) and carries its findings;
+    unless model['local_duplicates'] is turned off, items with nearly identical wording (see
+    duplicate_index.py) are recorded as duplicates and all but the first are marked Not Valid.
+    """
+    file_analysis = new_file_analysis(filename)
+    screening = screen_survey(file_content)
+
+    model_analyses = yield from parallel_pipelines([
+        model_analysis_pipeline(filename, file_content, model, mode, screening) for model in selected_models
+    ])
+
+    for model, model_analysis in zip(selected_models, model_analyses):
+        merge_model_analysis(file_analysis, model, model_analysis)
+
+    file_analysis['individual_question_analysis'] = consensus_items(selected_models, model_analyses)
+    sort_question_analysis(file_analysis['individual_question_analysis'])
+    if all(model.get('local_duplicates', True) for model in selected_models):
+        # Local groups name the survey's items; the models may have numbered them differently
+        items = file_analysis['individual_question_analysis']
+        items_by_id = {survey_item.id: item for item, survey_item in zip(items, match_survey_items(screening.survey, items))
+                       if survey_item is not None}
+        apply_duplicate_groups(items, duplicate_groups(
+            screening.duplicate_pairs, [item.id for item in screening.survey.items()]), items_by_id)
+    attach_rule_findings(file_analysis['individual_question_analysis'], screening)
+    file_analysis['rule_screening'] = screening.summary()
+
+    return {
+        'filename': filename,
+        'analysis': file_analysis
+    }
+
+def model_analysis_pipeline(filename, file_content, model, mode='full', screening=None):
+    """
+    Pipeline step that analyzes one file with one model in the given analysis mode, then
+    re-requests any survey items the model skipped (see completeness.py). screening is the
+    file's rule_engine.RuleScreening, used by the structured mode to skip decided items.
+    """
+    if mode == 'sharded':
+        model_analysis = yield from sharded_analysis_pipeline(file_content, model)
+    elif mode == 'incremental':
+        model_analysis = yield from incremental_analysis_pipeline(filename, file_content, model, get_revision_store())
+    elif mode == 'structured':
+        model_analysis = yield from structured_analysis_pipeline(file_content, model, screening)
+    else:
+        [model_analysis] = yield [{'file_content': file_content, 'model': model}]
+        if 'incomplete_response' in model_analysis:
+            # Record which survey items the salvaged response is missing
+            model_analysis['incomplete_response']['missing_items'] = find_missing_items(
+                expected_items(file_content), model_analysis['individual_question_analysis'])
+
+    yield from completeness_pipeline(file_content, model, model_analysis)
+    return model_analysis
+
+def parallel_pipelines(pipelines):
+    """
+    Pipeline step that advances several pipelines in lockstep, yielding their model calls as one
+    batch so they run concurrently, and returns their results in order
+    """
+    results = [None] * len(pipelines)
+    pending = {}
+    for index, pipeline in enumerate(pipelines):
+        try:
+            pending[index] = next(pipeline)
+        except StopIteration as stop:
+            results[index] = stop.value
+
+    while pending:
+        batches = list(pending.items())
+        analyses = yield [kwargs for _, calls in batches for kwargs in calls]
+        pending = {}
+        offset = 0
+        for index, calls in batches:
+            try:
+                pending[index] = pipelines[index].send(analyses[offset:offset + len(calls)])
+            except StopIteration as stop:
+                results[index] = stop.value
+            offset += len(calls)
+
+    return results
+
+def run_pipeline(pipeline, call=None, on_item=None):
+    """Drive a file analysis pipeline, running each batch of model calls in parallel threads"""
+    call = call or call_ai_model
+    try:
+        calls = next(pipeline)
+        while True:
+            if on_item:
+                calls = [dict(kwargs, on_item=on_item) for kwargs in calls]
+            if len(calls) == 1:
+                results = [call(**calls[0])]
+            else:
+                # Never more threads than the provider connection pool serves
+                with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(calls), MAX_ANALYSIS_WORKERS)) as executor:
+                    results = list(executor.map(lambda kwargs: call(**kwargs), calls))
+            calls = pipeline.send(results)
+    except StopIteration as stop:
+        return stop.value
+
+def sort_question_analysis(items):
+    """Sort question analyses by table number to group Part 2 and Part 3 items separately"""
+    # Handle both numeric and text-based table identifiers
+    def sort_key(item):
+        table_num = str(item.get('table_number', '999'))
+        try:
+            # Try to convert to integer if possible
+            return (0, int(table_num))  # Priority 0 for numeric values
+        except ValueError:
+            # If not numeric, use alphabetical ordering with priority 1
+            return (1, table_num.lower())
+
+    items.sort(key=sort_key)
+
+def merge_model_analysis(file_analysis, model, model_analysis):
+    """Merge one model's sections into the file analysis record (items are merged by consensus_items)"""
+    file_analysis['models_used'].append({
+        'model_name': model['name'],
+        'analysis': model_analysis
+    })
+
+    # Process model analysis results
+    if 'recommendations' in model_analysis:
+        file_analysis['recommendations'].extend(model_analysis['recommendations'])
+
+    # Include general instructions analysis if present
+    if 'survey_general_instructions_analysis' in model_analysis:
+        file_analysis['survey_general_instructions_analysis'] = model_analysis['survey_general_instructions_analysis']
+
+    # Include survey parts analysis if present
+    if 'survey_parts_analysis' in model_analysis:
+        file_analysis['survey_parts_analysis'] = model_analysis['survey_parts_analysis']
+
+    if 'overall_assessment' in model_analysis:
+        # Clean up the model assessment to remove any JSON formatting
+        raw_assessment = model_analysis['overall_assessment']
+        clean_model_assessment = raw_assessment
+        if raw_assessment:
+            # Check if the raw assessment looks like a complete JSON response
+            # (starts with { and ends with }, which would indicate the entire response is JSON)
+            stripped = raw_assessment.strip()
+            if stripped.startswith('{') and stripped.endswith('}'):
+                # This looks like the entire response is JSON, which means the model returned
+                # the full JSON structure as the overall assessment
+                # Try to parse it and extract just the actual assessment text
                 try:
-                    # Try to convert to integer if possible
-                    return (0, int(table_num))  # Priority 0 for numeric values
-                except ValueError:
-                    # If not numeric, use alphabetical ordering with priority 1
-                    return (1, table_num.lower())
-
-            file_analysis['individual_question_analysis'].sort(key=sort_key)
-
-        # Include general instructions analysis if present
-        if 'survey_general_instructions_analysis' in model_analysis:
-            file_analysis['survey_general_instructions_analysis'] = model_analysis['survey_general_instructions_analysis']
-
-        # Include survey parts analysis if present
-        if 'survey_parts_analysis' in model_analysis:
-            file_analysis['survey_parts_analysis'] = model_analysis['survey_parts_analysis']
-
-        if 'overall_assessment' in model_analysis:
-            # Clean up the model assessment to remove any JSON formatting
-            raw_assessment = model_analysis['overall_assessment']
-            clean_model_assessment = raw_assessment
-            if raw_assessment:
-                # Check if the raw assessment looks like a complete JSON response
-                # (starts with { and ends with }, which would indicate the entire response is JSON)
-                stripped = raw_assessment.strip()
-                if stripped.startswith('{') and stripped.endswith('}'):
-                    # This looks like the entire response is JSON, which means the model returned
-                    # the full JSON structure as the overall assessment
-                    # Try to parse it and extract just the actual assessment text
-                    try:
-                        parsed = json.loads(raw_assessment)
-                        # If it has an overall_assessment field, use that
-                        if 'overall_assessment' in parsed and isinstance(parsed['overall_assessment'], str):
-                            clean_model_assessment = parsed['overall_assessment']
-                        else:
-                            # If not, just clean up the JSON formatting markers
-                            clean_model_assessment = raw_assessment.replace('```json', '').replace('```', '').strip()
-                            import re
-                            clean_model_assessment = re.sub(r'\s+', ' ', clean_model_assessment)
-                    except json.JSONDecodeError:
-                        # If it's not valid JSON, just clean up formatting markers
+                    parsed = json.loads(raw_assessment)
+                    # If it has an overall_assessment field, use that
+                    if 'overall_assessment' in parsed and isinstance(parsed['overall_assessment'], str):
+                        clean_model_assessment = parsed['overall_assessment']
+                    else:
+                        # If not, just clean up the JSON formatting markers
                         clean_model_assessment = raw_assessment.replace('```json', '').replace('```', '').strip()
                         import re
                         clean_model_assessment = re.sub(r'\s+', ' ', clean_model_assessment)
-                else:
-                    # Just clean up formatting markers for regular text
+                except json.JSONDecodeError:
+                    # If it's not valid JSON, just clean up formatting markers
                     clean_model_assessment = raw_assessment.replace('```json', '').replace('```', '').strip()
                     import re
                     clean_model_assessment = re.sub(r'\s+', ' ', clean_model_assessment)
-
-            if file_analysis['overall_assessment']:
-                file_analysis['overall_assessment'] += f"\n\n{clean_model_assessment}"
             else:
-                file_analysis['overall_assessment'] = f"{clean_model_assessment}"
+                # Just clean up formatting markers for regular text
+                clean_model_assessment = raw_assessment.replace('```json', '').replace('```', '').strip()
+                import re
+                clean_model_assessment = re.sub(r'\s+', ' ', clean_model_assessment)
 
-    return {
-        'filename': uploaded_file.name,
-        'analysis': file_analysis
-    }
+        if file_analysis['overall_assessment']:
+            file_analysis['overall_assessment'] += f"\n\n{clean_model_assessment}"
+        else:
+            file_analysis['overall_assessment'] = f"{clean_model_assessment}"
 
 def analyze_surveys(selected_models):
-    """Analyze uploaded surveys using selected AI models with parallel processing"""
-    results = []
+    """Analyze uploaded surveys using selected AI models with the asyncio engine"""
+    from async_engine import analyze_files
 
     # Show overall progress
     total_files = len(st.session_state.uploaded_files)
     progress_text = f"Starting parallel analysis of {total_files} file(s)..."
     st.info(progress_text)
 
-    # Use ThreadPoolExecutor for parallel processing
-    with concurrent.futures.ThreadPoolExecutor(max_workers=min(4, len(st.session_state.uploaded_files))) as executor:
-        # Submit all file processing tasks
-        future_to_file = {
-            executor.submit(analyze_single_file, uploaded_file, selected_models): uploaded_file
-            for uploaded_file in st.session_state.uploaded_files
-        }
-
-        # Collect results as they complete
-        completed_count = 0
-        for future in concurrent.futures.as_completed(future_to_file):
-            completed_count += 1
-            uploaded_file = future_to_file[future]
-
-            # Update progress
-            progress_text = f"Completed {completed_count} of {total_files} files: {uploaded_file.name}"
-            st.info(progress_text)
+    completed = {'count': 0}
+    result_writer = StreamingResultWriter()
+    st.subheader("Live Results")
+    st.caption("Each model's verdicts as they arrive, numbered as in the report. The report combines the "
+               "models and applies the duplicate checks, so a verdict shown here can still change.")
+    live_results = st.container()
+    live_views = {}
+
+    # Both callbacks run on the script thread (inside the engine's event loop), so Streamlit calls are safe here
+    def on_item(uploaded_file, item):
+        result_writer.append_item(uploaded_file.name, item)
+        if uploaded_file.name not in live_views:
+            live_views[uploaded_file.name] = live_results.expander(uploaded_file.name, expanded=True)
+        icon = "✅" if item['validity'] == 'Valid' else "❌"
+        live_views[uploaded_file.name].markdown(
+            f"{icon} **Table {item['table_number'] or 'N/A'} - {item['item_number'] or 'N/A'}**: "
+            f"{item['question_text']} ({item['validity'] or 'N/A'})"
+        )
 
-            try:
-                result = future.result()
-                if result and 'error' not in result:
-                    results.append(result)
-                elif 'error' in result:
-                    st.error(result['error'])
-            except Exception as e:
-                st.error(f"Error processing file {uploaded_file.name}: {str(e)}")
+    def on_result(uploaded_file, result):
+        completed['count'] += 1
+        st.info(f"Completed {completed['count']} of {total_files} files: {uploaded_file.name}")
+        if 'error' in result:
+            st.error(result['error'])
+        else:
+            result_writer.finalize(uploaded_file.name, result)
+
+    all_results = analyze_files(
+        st.session_state.uploaded_files,
+        selected_models,
+        provider_concurrency=st.session_state.get('provider_concurrency'),
+        on_result=on_result,
+        on_item=on_item,
+        mode=st.session_state.get('analysis_mode', 'full')
+    )
+    results = [result for result in all_results if result and 'error' not in result]
 
     st.session_state.analysis_results = results
+    prefetch_reports(results)
     st.success(f"Parallel analysis complete for {len(results)} file(s)!")
 
 def process_uploaded_file(uploaded_file):
     """Process different file types and extract text content, including tables"""
-    import fitz  # PyMuPDF for PDF processing
-    import csv
-    from io import StringIO, BytesIO
-
-    file_extension = uploaded_file.name.split('.')[-1].lower()
+    return extract_uploaded_file(uploaded_file)[0]
 
+def extract_uploaded_file(uploaded_file):
+    """
+    Extract the text content of an upload as a stream of fragments (see extraction.py).
+    Returns (content, stats) where stats counts the characters, bytes and fragments processed
+    and whether the text came from the extraction cache; content is None if the file could
+    not be processed.
+    """
     try:
-        if file_extension == 'txt':
-            return uploaded_file.getvalue().decode("utf-8")
-
-        elif file_extension == 'json':
-            content = uploaded_file.getvalue().decode("utf-8")
-            json_data = json.loads(content)
-            # Convert JSON to string for analysis
-            return json.dumps(json_data, indent=2)
-
-        elif file_extension == 'csv':
-            string_data = StringIO(uploaded_file.getvalue().decode("utf-8"))
-            csv_reader = csv.reader(string_data)
-            content = '\n'.join([','.join(row) for row in csv_reader])
-            return content
-
-        elif file_extension == 'docx':
-            from docx import Document
-            doc = Document(BytesIO(uploaded_file.getvalue()))
-
-            # Extract text content (images are automatically ignored by python-docx)
-            content = '\n'.join([paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()])
-
-            # Extract table content
-            table_content = []
-            for table in doc.tables:
-                for row in table.rows:
-                    row_data = [cell.text for cell in row.cells]
-                    table_content.append('| ' + ' | '.join(row_data) + ' |')
-
-            # Combine text and table content
-            if table_content:
-                content += "\n\nExtracted Tables:\n" + '\n'.join(table_content)
-
-            return content
-
-        elif file_extension == 'pdf':
-            pdf_document = fitz.open(stream=uploaded_file.getvalue(), filetype="pdf")
-            content = ""
-
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document.load_page(page_num)
-
-                # Extract regular text
-                content += page.get_text() + "\n"
-
-                # Extract tables using PyMuPDF's table functionality
-                try:
-                    tables = page.find_tables()
-                    for i, table in enumerate(tables):
-                        content += f"\nTable {i+1}:\n"
-                        for row in table.rows:
-                            row_text = " | ".join([cell.text.strip() for cell in row.cells])
-                            content += f"{row_text}\n"
-                        content += "\n"
-                except:
-                    # If table extraction fails, continue with just text
-                    pass
-
-            pdf_document.close()
-            return content
-
-        else:
-            print(f"Unsupported file type: {file_extension}")
-            return None
+        fragments = iter_upload_fragments(uploaded_file)
+        if fragments is None:
+            print(f"Unsupported file type: {uploaded_file.name.split('.')[-1].lower()}")
+            return None, None
+
+        # Unchanged uploads (Streamlit reruns, other sessions, repeat analyses) skip extraction
+        cache = get_extraction_cache()
+        cache_key = make_extraction_key(uploaded_file)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            content, stats = cached
+            return content, dict(stats, cached=True)
+
+        content, stats = collect_fragments(fragments)
+        cache.put(cache_key, content, stats, {'filename': uploaded_file.name})
+        return content, dict(stats, cached=False)
 
     except Exception as e:
         print(f"Error processing file {uploaded_file.name}: {str(e)}")
-        return None
-
-def call_ai_model(file_content, model):
-    """Call the DeepSeek AI model for analysis"""
-    headers = {}
-    payload = {}
+        return None, None
 
+def build_chat_request(file_content, model, messages=None):
+    """Build the URL, headers and payload for a chat completions call (messages overrides the default prompt)"""
     if model['provider'] == 'deepseek':
         # DeepSeek Reasoner API call
         headers = {
@@ -464,173 +758,271 @@ def call_ai_model(file_content, model):
         }
 
         # Get the messages list from the updated prompt function
-        messages = get_deepseek_prompt(file_content)
+        if messages is None:
+            messages = get_deepseek_prompt(file_content)
         payload = {
-            "model": "deepseek-reasoner",
+            "model": model.get('model_id', 'deepseek-reasoner'),
             "messages": messages,  # This is now a list of messages with system and user roles
             "response_format": {"type": "json_object"},
             "temperature": model.get('temperature', 0.3)
         }
         url = model.get('endpoint') or 'https://api.deepseek.com/chat/completions'
+        return url, headers, payload
 
-    try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        result = response.json()
-
-        # Extract the content from the response
-        content = result['choices'][0]['message']['content']
-
-        # Try to extract valid JSON from the content
-        analysis = extract_valid_json(content)
-
-        # If we couldn't extract valid JSON, wrap it in our expected format
-        if analysis is None:
-            analysis = {
-                "survey_general_instructions_analysis": {
-                    "instructions_present": False,
-                    "scale_correctly_defined": False,
-                    "scale_definition_text": "",
-                    "general_instructions_text": "",
-                    "issues_found": ["Could not parse general instructions from survey"],
-                    "recommendations": ["Ensure general instructions are clearly defined in the survey"]
-                },
-                "survey_parts_analysis": {
-                    "part_2_has_only_definitions": False,
-                    "part_3_has_only_definitions": False,
-                    "part_2_content_summary": "Could not parse Part 2 content",
-                    "part_3_content_summary": "Could not parse Part 3 content",
-                    "part_2_issues": ["Could not analyze Part 2 content"],
-                    "part_3_issues": ["Could not analyze Part 3 content"],
-                    "part_2_recommendations": ["Ensure Part 2 contains only variable definitions"],
-                    "part_3_recommendations": ["Ensure Part 3 contains only variable definitions"]
-                },
-                "individual_question_analysis": [],
-                "overall_assessment": content,
-                "recommendations": ["This model did not return structured JSON. Raw analysis: " + content]
-            }
-
-        # Clean up any JSON formatting that might be embedded in the overall assessment
-        if 'overall_assessment' in analysis and analysis['overall_assessment']:
-            # Remove any JSON code block markers and clean up the text
-            assessment = analysis['overall_assessment']
-            # Remove markdown code block markers if present
-            assessment = assessment.replace('```json', '').replace('```', '').strip()
-            # If the assessment looks like it's just JSON, try to extract meaningful text
-            if assessment.startswith('{') and assessment.endswith('}'):
-                # This means the entire assessment field was returned as JSON, which shouldn't happen
-                # The assessment should be plain text, not JSON structure
-                extracted = extract_valid_json(assessment)
-                if extracted and 'overall_assessment' in extracted:
-                    analysis['overall_assessment'] = extracted['overall_assessment']
+    raise ValueError(f"Unsupported model provider: {model['provider']}")
 
+class ModelCall:
+    """
+    The request and response handling of one model call, shared by call_ai_model (requests) and
+    the asyncio engine (httpx), which only move the bytes: the response cache lookup, streamed or
+    plain responses, parsing, caching complete answers and passing question analyses to on_item
+    """
+
+    def __init__(self, file_content, model, on_item=None, messages=None, map_item=None):
+        self.file_content = file_content
+        self.model = model
+        self.on_item = on_item
+        self.messages = messages
+        self.map_item = map_item
+        self.cache = None
+        self.content = None
+        self.fetched = False
+        self.completed = True
+        self.parser = None
+        self.status = {}
+
+    def lookup(self):
+        """Build the request and return the cached response content for it, or None if it must be fetched"""
+        self.url, self.headers, self.payload = build_chat_request(self.file_content, self.model, self.messages)
+
+        # Serve repeat analyses of the same prompt from the on-disk cache
+        self.cache = get_response_cache() if self.model.get('use_cache', True) else None
+        self.cache_key = make_cache_key(self.payload['messages'], self.payload['model'], self.payload['temperature'])
+        self.content = self.cache.get(self.cache_key) if self.cache else None
+        self.fetched = self.content is None
+        return self.content
+
+    def request(self):
+        """Return the URL, headers and payload to send; the response is streamed if self.parser is set"""
+        if self.model.get('stream'):
+            self.parser = IncrementalItemParser()
+            return self.url, self.headers, dict(self.payload, stream=True)
+        return self.url, self.headers, self.payload
+
+    def feed_lines(self, lines):
+        """Read streamed SSE lines, passing each question analysis to on_item as soon as it is complete"""
+        for delta in sse_content_deltas(lines, self.status):
+            for item in normalize_items(self.parser.feed(delta)):
+                self.emit(item)
+
+    def emit(self, item):
+        """Pass a question analysis to on_item, numbered by map_item as the merged result will number it"""
+        if self.on_item:
+            item = self.map_item(item) if self.map_item else item
+            if item is not None:
+                self.on_item(item)
+
+    def read_response(self, result):
+        """Read the JSON body of a response that was not streamed"""
+        choice = result['choices'][0]
+        self.content = choice['message']['content']
+        self.completed = choice.get('finish_reason') != 'length'
+
+    def analysis(self):
+        """Parse the content and cache it if it was fetched, complete and parsed; calls no callbacks"""
+        if self.parser:
+            self.content = self.parser.content()
+            self.completed = stream_completed(self.status)
+        analysis = parse_model_content(self.content)
+
+        # Truncated or unparsable answers are not cached, a rerun asks the model again
+        if self.cache and self.fetched and self.completed and cacheable_analysis(analysis):
+            self.cache.put(self.cache_key, self.content, {'model': self.payload['model'], 'model_name': self.model['name']})
         return analysis
+
+    def deliver(self, analysis):
+        """Return the analysis, passing its items to on_item if they were not streamed"""
+        if self.parser:
+            # Keep the streamed items if the full document could not be parsed
+            if self.parser.items and not analysis['individual_question_analysis']:
+                analysis['individual_question_analysis'] = normalize_items(self.parser.items)
+        else:
+            for item in analysis['individual_question_analysis']:
+                self.emit(item)
+        return analysis
+
+    def failed(self, e):
+        """Return the analysis of a call that raised e, keeping the items streamed before it"""
+        if self.parser and self.parser.items:
+            return partial_analysis(self.parser.items, e, self.model)
+        return error_analysis(e, self.model)
+
+def call_ai_model(file_content, model, on_item=None, messages=None, map_item=None):
+    """
+    Call the DeepSeek AI model for analysis.
+    When model['stream'] is set the response is streamed and on_item is called with each
+    individual_question_analysis entry as soon as it is complete; if the connection drops,
+    the entries that already arrived are kept. messages replaces the default prompt
+    (used for table shards and follow-up requests). map_item, set by pipelines whose merge
+    renumbers the answer, returns the entry as the merged result will show it (or None to
+    leave it out) before it reaches on_item; the returned analysis is not mapped.
+    """
+    call = ModelCall(file_content, model, on_item, messages, map_item)
+    try:
+        if call.lookup() is None:
+            client = get_provider_client(pool_size=MAX_ANALYSIS_WORKERS)
+            url, headers, payload = call.request()
+            if call.parser:
+                with client.post_json(url, headers, payload, stream=True) as response:
+                    response.encoding = 'utf-8'
+                    call.feed_lines(response.iter_lines(decode_unicode=True))
+            else:
+                call.read_response(client.post_json(url, headers, payload).json())
+        return call.deliver(call.analysis())
     except Exception as e:
-        return {
+        return call.failed(e)
+
+def parse_model_content(content):
+    """Turn the raw text returned by a model into the analysis structure"""
+    # Try to extract valid JSON from the content
+    analysis = extract_valid_json(content)
+    if not isinstance(analysis, dict):
+        analysis = None
+
+    # A response cut off at the output limit still holds every verdict completed before the cut
+    if analysis is None:
+        sections, report = salvage_json(content)
+        if sections is not None:
+            analysis = salvaged_analysis(sections, report)
+
+    # If we couldn't extract valid JSON, wrap it in our expected format
+    if analysis is None:
+        analysis = {
             "survey_general_instructions_analysis": {
                 "instructions_present": False,
                 "scale_correctly_defined": False,
                 "scale_definition_text": "",
                 "general_instructions_text": "",
-                "issues_found": [f"Error processing general instructions: {str(e)}"],
-                "recommendations": ["Check that the survey file is properly formatted"]
+                "issues_found": ["Could not parse general instructions from survey"],
+                "recommendations": ["Ensure general instructions are clearly defined in the survey"]
             },
             "survey_parts_analysis": {
                 "part_2_has_only_definitions": False,
                 "part_3_has_only_definitions": False,
-                "part_2_content_summary": f"Error processing Part 2: {str(e)}",
-                "part_3_content_summary": f"Error processing Part 3: {str(e)}",
-                "part_2_issues": [f"Error processing Part 2 content: {str(e)}"],
-                "part_3_issues": [f"Error processing Part 3 content: {str(e)}"],
-                "part_2_recommendations": ["Check that Part 2 contains only variable definitions"],
-                "part_3_recommendations": ["Check that Part 3 contains only variable definitions"]
+                "part_2_content_summary": "Could not parse Part 2 content",
+                "part_3_content_summary": "Could not parse Part 3 content",
+                "part_2_issues": ["Could not analyze Part 2 content"],
+                "part_3_issues": ["Could not analyze Part 3 content"],
+                "part_2_recommendations": ["Ensure Part 2 contains only variable definitions"],
+                "part_3_recommendations": ["Ensure Part 3 contains only variable definitions"]
             },
             "individual_question_analysis": [],
-            "overall_assessment": "",
-            "recommendations": [f"Error analyzing with {model['name']}: {str(e)}"]
+            "overall_assessment": content,
+            "recommendations": ["This model did not return structured JSON. Raw analysis: " + content],
+            "unparsed_response": True
         }
 
-def extract_valid_json(content):
-    """
-    Extract valid JSON from content that may contain additional text or formatting.
-    This function tries multiple strategies to extract valid JSON from AI model responses.
-    """
-    import re
-    import json
+    # Validate once: coerce loosely typed values and fill in missing fields (see analysis_models.py)
+    analysis = normalize_analysis(analysis)
+
+    # Clean up any JSON formatting that might be embedded in the overall assessment
+    if analysis['overall_assessment']:
+        # Remove any JSON code block markers and clean up the text
+        assessment = analysis['overall_assessment']
+        # Remove markdown code block markers if present
+        assessment = assessment.replace('```json', '').replace('```', '').strip()
+        # If the assessment looks like it's just JSON, try to extract meaningful text
+        if assessment.startswith('{') and assessment.endswith('}'):
+            # This means the entire assessment field was returned as JSON, which shouldn't happen
+            # The assessment should be plain text, not JSON structure
+            extracted = extract_valid_json(assessment)
+            if isinstance(extracted, dict) and isinstance(extracted.get('overall_assessment'), str):
+                analysis['overall_assessment'] = extracted['overall_assessment']
+
+    return analysis
+
+def cacheable_analysis(analysis):
+    """True if a parsed response is complete: not salvaged from a truncated answer and not unparsable text"""
+    return 'incomplete_response' not in analysis and not analysis.get('unparsed_response')
+
+def salvaged_analysis(sections, report):
+    """Return the sections recovered from a truncated or malformed response, marked as incomplete"""
+    analysis = dict(sections)
+    analysis.setdefault('individual_question_analysis', [])
+    analysis['recommendations'] = list(analysis.get('recommendations', []))
+    analysis['incomplete_response'] = {
+        'partial_sections': report['partial_sections'],
+        'missing_sections': [section for section in ANALYSIS_SECTIONS if section not in sections],
+        'skipped_items': report['skipped_items'],
+        'items_recovered': len(analysis['individual_question_analysis'])
+    }
+    analysis['recommendations'].append(
+        f"The model response was incomplete; {len(analysis['individual_question_analysis'])} question(s) were recovered from it"
+    )
+    return analysis
+
+def partial_analysis(items, e, model):
+    """Return the question analyses that arrived before a streamed call failed"""
+    analysis = error_analysis(e, model)
+    analysis['individual_question_analysis'] = normalize_items(items)
+    analysis['recommendations'].append(
+        f"The response from {model['name']} was interrupted after {len(items)} question(s); only those questions are included"
+    )
+    return analysis
 
-    # Strategy 1: Try to parse as-is
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        pass
+def error_analysis(e, model):
+    """Return the analysis structure reported when a model call fails"""
+    return {
+        "survey_general_instructions_analysis": {
+            "instructions_present": False,
+            "scale_correctly_defined": False,
+            "scale_definition_text": "",
+            "general_instructions_text": "",
+            "issues_found": [f"Error processing general instructions: {str(e)}"],
+            "recommendations": ["Check that the survey file is properly formatted"]
+        },
+        "survey_parts_analysis": {
+            "part_2_has_only_definitions": False,
+            "part_3_has_only_definitions": False,
+            "part_2_content_summary": f"Error processing Part 2: {str(e)}",
+            "part_3_content_summary": f"Error processing Part 3: {str(e)}",
+            "part_2_issues": [f"Error processing Part 2 content: {str(e)}"],
+            "part_3_issues": [f"Error processing Part 3 content: {str(e)}"],
+            "part_2_recommendations": ["Check that Part 2 contains only variable definitions"],
+            "part_3_recommendations": ["Check that Part 3 contains only variable definitions"]
+        },
+        "individual_question_analysis": [],
+        "overall_assessment": "",
+        "recommendations": [f"Error analyzing with {model['name']}: {str(e)}"],
+        "error": str(e)
+    }
 
-    # Strategy 2: Remove markdown code blocks and try to parse
-    cleaned_content = content.replace('```json', '').replace('```', '').strip()
-    try:
-        return json.loads(cleaned_content)
-    except json.JSONDecodeError:
-        pass
-
-    # Strategy 3: Extract JSON object using regex (look for content between { and })
-    # This handles cases where there's text before or after the JSON
-    json_match = re.search(r'\{.*\}', content, re.DOTALL)
-    if json_match:
-        json_str = json_match.group()
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError:
-            pass
+def render_docx_bytes(analysis_data, filename):
+    """Render the DOCX report of analysis data in memory and return its bytes"""
+    buffer = io.BytesIO()
+    build_docx_report(analysis_data, filename).save(buffer)
+    return buffer.getvalue()
 
-    # Strategy 4: Look for JSON array as well (for cases where the response is an array)
-    array_match = re.search(r'\[.*\]', content, re.DOTALL)
-    if array_match:
-        array_str = array_match.group()
-        try:
-            return json.loads(array_str)
-        except json.JSONDecodeError:
-            pass
-
-    # Strategy 5: Handle cases where the response contains multiple JSON objects
-    # Look for the main survey analysis structure specifically
-    # Find the structure that contains our expected fields
-    # Find all potential JSON objects in the content
-    potential_matches = []
-    start = 0
-    while start < len(content):
-        open_brace = content.find('{', start)
-        if open_brace == -1:
-            break
-        # Find the matching closing brace
-        brace_count = 0
-        pos = open_brace
-        while pos < len(content):
-            if content[pos] == '{':
-                brace_count += 1
-            elif content[pos] == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    potential_json = content[open_brace:pos+1]
-                    try:
-                        parsed = json.loads(potential_json)
-                        # Check if it has the expected structure
-                        if isinstance(parsed, dict) and ('individual_question_analysis' in parsed or 'survey_general_instructions_analysis' in parsed):
-                            return parsed
-                    except json.JSONDecodeError:
-                        pass
-                    break
-            pos += 1
-        start = pos + 1
-
-    # If all strategies fail, return None
-    return None
-
-
-def generate_docx(analysis_data, filename):
-    """Generate a DOCX report from analysis data"""
+def report_key(result):
+    """Return the report cache key of an analysis result"""
+    return get_report_cache().key_for(result['analysis'], result['filename'], REPORT_TEMPLATE_VERSION)
+
+def prefetch_reports(results):
+    """Render the DOCX reports of analysis results in the background report worker"""
+    cache = get_report_cache()
+    for result in results:
+        cache.prefetch(report_key(result), partial(render_docx_bytes, result['analysis'], result['filename']))
+
+def build_docx_report(analysis_data, filename, write_questions=append_question_sections):
+    """
+    Build the DOCX report Document from analysis data (a file analysis dict or SurveyAnalysis).
+    Question sections are written by write_questions(doc, questions), the bulk writer of docx_report.
+    """
     from docx.shared import Inches, Pt
     from docx.enum.text import WD_ALIGN_PARAGRAPH
     from docx.oxml.ns import qn
 
+    analysis = validate_analysis(analysis_data)
     doc = Document()
 
     # Set document title with larger font
@@ -654,138 +1046,91 @@ def generate_docx(analysis_data, filename):
     # Add executive summary section
     doc.add_heading('Executive Summary', level=1)
 
-    # Add general instructions analysis if present
-    if 'survey_general_instructions_analysis' in analysis_data:
-        general_instr_analysis = analysis_data['survey_general_instructions_analysis']
-
-        doc.add_heading('General Instructions Analysis', level=2)
-
-        # Create a table for general instructions analysis
-        gen_instr_table = doc.add_table(rows=1, cols=2)
-        gen_instr_table.style = 'Table Grid'
-        hdr_cells = gen_instr_table.rows[0].cells
-        hdr_cells[0].text = 'Attribute'
-        hdr_cells[1].text = 'Value'
-
-        # Add general instructions details
-        row_cells = gen_instr_table.add_row().cells
-        row_cells[0].text = 'Instructions Present'
-        row_cells[1].text = str(general_instr_analysis.get('instructions_present', 'N/A'))
-
-        row_cells = gen_instr_table.add_row().cells
-        row_cells[0].text = 'Scale Correctly Defined'
-        row_cells[1].text = str(general_instr_analysis.get('scale_correctly_defined', 'N/A'))
-
-        row_cells = gen_instr_table.add_row().cells
-        row_cells[0].text = 'Scale Definition'
-        row_cells[1].text = general_instr_analysis.get('scale_definition_text', 'N/A')
-
-        # Add issues found
-        row_cells = gen_instr_table.add_row().cells
-        row_cells[0].text = 'Issues Found'
-        issues_list = general_instr_analysis.get('issues_found', [])
-        if issues_list:
-            row_cells[1].text = '; '.join(issues_list)
-        else:
-            row_cells[1].text = 'None'
-
-        # Add recommendations
-        row_cells = gen_instr_table.add_row().cells
-        row_cells[0].text = 'Recommendations'
-        recommendations_list = general_instr_analysis.get('recommendations', [])
-        if recommendations_list:
-            row_cells[1].text = '; '.join(recommendations_list)
-        else:
-            row_cells[1].text = 'None'
-
-        doc.add_paragraph("")  # Empty line for spacing
-
-    # Add survey parts analysis if present
-    if 'survey_parts_analysis' in analysis_data:
-        parts_analysis = analysis_data['survey_parts_analysis']
-
-        doc.add_heading('Survey Parts Analysis', level=2)
-
-        # Create a table for survey parts analysis
-        parts_table = doc.add_table(rows=1, cols=2)
-        parts_table.style = 'Table Grid'
-        hdr_cells = parts_table.rows[0].cells
-        hdr_cells[0].text = 'Attribute'
-        hdr_cells[1].text = 'Value'
-
-        # Add Part 2 details
+    # Add general instructions analysis
+    general_instr_analysis = analysis.survey_general_instructions_analysis
+
+    doc.add_heading('General Instructions Analysis', level=2)
+
+    # Create a table for general instructions analysis
+    gen_instr_table = doc.add_table(rows=1, cols=2)
+    gen_instr_table.style = 'Table Grid'
+    hdr_cells = gen_instr_table.rows[0].cells
+    hdr_cells[0].text = 'Attribute'
+    hdr_cells[1].text = 'Value'
+
+    # Add general instructions details
+    row_cells = gen_instr_table.add_row().cells
+    row_cells[0].text = 'Instructions Present'
+    row_cells[1].text = str(general_instr_analysis.instructions_present)
+
+    row_cells = gen_instr_table.add_row().cells
+    row_cells[0].text = 'Scale Correctly Defined'
+    row_cells[1].text = str(general_instr_analysis.scale_correctly_defined)
+
+    row_cells = gen_instr_table.add_row().cells
+    row_cells[0].text = 'Scale Definition'
+    row_cells[1].text = general_instr_analysis.scale_definition_text or 'N/A'
+
+    # Add issues found
+    row_cells = gen_instr_table.add_row().cells
+    row_cells[0].text = 'Issues Found'
+    row_cells[1].text = '; '.join(general_instr_analysis.issues_found) or 'None'
+
+    # Add recommendations
+    row_cells = gen_instr_table.add_row().cells
+    row_cells[0].text = 'Recommendations'
+    row_cells[1].text = '; '.join(general_instr_analysis.recommendations) or 'None'
+
+    doc.add_paragraph("")  # Empty line for spacing
+
+    # Add survey parts analysis
+    parts_analysis = analysis.survey_parts_analysis
+
+    doc.add_heading('Survey Parts Analysis', level=2)
+
+    # Create a table for survey parts analysis
+    parts_table = doc.add_table(rows=1, cols=2)
+    parts_table.style = 'Table Grid'
+    hdr_cells = parts_table.rows[0].cells
+    hdr_cells[0].text = 'Attribute'
+    hdr_cells[1].text = 'Value'
+
+    # Add Part 2 and Part 3 details
+    for part, has_only_definitions, content_summary, issues, recommendations in [
+        (2, parts_analysis.part_2_has_only_definitions, parts_analysis.part_2_content_summary,
+         parts_analysis.part_2_issues, parts_analysis.part_2_recommendations),
+        (3, parts_analysis.part_3_has_only_definitions, parts_analysis.part_3_content_summary,
+         parts_analysis.part_3_issues, parts_analysis.part_3_recommendations)
+    ]:
         row_cells = parts_table.add_row().cells
-        row_cells[0].text = 'Part 2 Has Only Definitions'
-        row_cells[1].text = str(parts_analysis.get('part_2_has_only_definitions', 'N/A'))
+        row_cells[0].text = f'Part {part} Has Only Definitions'
+        row_cells[1].text = str(has_only_definitions)
 
         row_cells = parts_table.add_row().cells
-        row_cells[0].text = 'Part 2 Content Summary'
-        row_cells[1].text = parts_analysis.get('part_2_content_summary', 'N/A')
+        row_cells[0].text = f'Part {part} Content Summary'
+        row_cells[1].text = content_summary or 'N/A'
 
         row_cells = parts_table.add_row().cells
-        row_cells[0].text = 'Part 2 Issues'
-        issues_list = parts_analysis.get('part_2_issues', [])
-        if issues_list:
-            row_cells[1].text = '; '.join(issues_list)
-        else:
-            row_cells[1].text = 'None'
-
-        row_cells = parts_table.add_row().cells
-        row_cells[0].text = 'Part 2 Recommendations'
-        recommendations_list = parts_analysis.get('part_2_recommendations', [])
-        if recommendations_list:
-            row_cells[1].text = '; '.join(recommendations_list)
-        else:
-            row_cells[1].text = 'None'
-
-        # Add Part 3 details
-        row_cells = parts_table.add_row().cells
-        row_cells[0].text = 'Part 3 Has Only Definitions'
-        row_cells[1].text = str(parts_analysis.get('part_3_has_only_definitions', 'N/A'))
-
-        row_cells = parts_table.add_row().cells
-        row_cells[0].text = 'Part 3 Content Summary'
-        row_cells[1].text = parts_analysis.get('part_3_content_summary', 'N/A')
+        row_cells[0].text = f'Part {part} Issues'
+        row_cells[1].text = '; '.join(issues) or 'None'
 
         row_cells = parts_table.add_row().cells
-        row_cells[0].text = 'Part 3 Issues'
-        issues_list = parts_analysis.get('part_3_issues', [])
-        if issues_list:
-            row_cells[1].text = '; '.join(issues_list)
-        else:
-            row_cells[1].text = 'None'
-
-        row_cells = parts_table.add_row().cells
-        row_cells[0].text = 'Part 3 Recommendations'
-        recommendations_list = parts_analysis.get('part_3_recommendations', [])
-        if recommendations_list:
-            row_cells[1].text = '; '.join(recommendations_list)
-        else:
-            row_cells[1].text = 'None'
+        row_cells[0].text = f'Part {part} Recommendations'
+        row_cells[1].text = '; '.join(recommendations) or 'None'
 
-        doc.add_paragraph("")  # Empty line for spacing
+    doc.add_paragraph("")  # Empty line for spacing
 
     # Count valid and invalid questions
-    valid_count = 0
-    invalid_count = 0
-    total_questions = 0
-
-    if 'individual_question_analysis' in analysis_data and analysis_data['individual_question_analysis']:
-        for question in analysis_data['individual_question_analysis']:
-            validity = question.get('validity', 'N/A')
-            if validity.lower() == 'valid':
-                valid_count += 1
-            elif validity.lower() == 'not valid':
-                invalid_count += 1
-            total_questions += 1
+    questions = analysis.individual_question_analysis
+    valid_count = sum(1 for question in questions if question.is_valid)
+    invalid_count = sum(1 for question in questions if question.is_not_valid)
+    total_questions = len(questions)
 
     summary_para = doc.add_paragraph()
     summary_para.add_run(f'Total Questions Analyzed: ').bold = True
     summary_para.add_run(f'{total_questions}\n')
-    if 'survey_general_instructions_analysis' in analysis_data:
-        summary_para.add_run(f'General Instructions Valid: ').bold = True
-        instr_valid = analysis_data['survey_general_instructions_analysis'].get('scale_correctly_defined', False)
-        summary_para.add_run(f'{"Yes" if instr_valid else "No"}\n')
+    summary_para.add_run(f'General Instructions Valid: ').bold = True
+    summary_para.add_run(f'{"Yes" if general_instr_analysis.scale_correctly_defined else "No"}\n')
     summary_para.add_run(f'Valid Questions: ').bold = True
     summary_para.add_run(f'{valid_count}\n')
     summary_para.add_run(f'Invalid Questions: ').bold = True
@@ -799,98 +1144,18 @@ def generate_docx(analysis_data, filename):
         valid_percentage = 0  # Default value when no questions are analyzed
 
     # Add individual question analysis if present
-    if 'individual_question_analysis' in analysis_data and analysis_data['individual_question_analysis']:
+    if questions:
         doc.add_heading('Detailed Question Analysis', level=1)
-
-        for i, question in enumerate(analysis_data['individual_question_analysis'], 1):
-            question_text = question.get('question_text', 'N/A')
-            validity = question.get('validity', 'N/A')
-            reason = question.get('reason', 'N/A')
-            table_number = question.get('table_number', 'N/A')
-            item_number = question.get('item_number', 'N/A')
-            variable_name = question.get('variable_name', 'N/A')
-
-            # Create a heading for each question using table and item numbers
-            question_heading = doc.add_heading(f'Question Table {table_number} - {item_number}', level=2)
-            if validity.lower() == 'not valid':
-                from docx.shared import RGBColor
-                question_heading.runs[0].font.color.rgb = RGBColor(255, 0, 0)  # Red for invalid questions
-            else:
-                from docx.shared import RGBColor
-                question_heading.runs[0].font.color.rgb = RGBColor(0, 128, 0)  # Green for valid questions
-
-            # Add question details in a table for better organization
-            table = doc.add_table(rows=1, cols=2)
-            table.style = 'Table Grid'
-            hdr_cells = table.rows[0].cells
-            hdr_cells[0].text = 'Attribute'
-            hdr_cells[1].text = 'Value'
-
-            # Add question details
-            row_cells = table.add_row().cells
-            row_cells[0].text = 'Table Number'
-            row_cells[1].text = str(table_number)
-
-            row_cells = table.add_row().cells
-            row_cells[0].text = 'Item Number'
-            row_cells[1].text = str(item_number)
-
-            row_cells = table.add_row().cells
-            row_cells[0].text = 'Variable Name'
-            row_cells[1].text = variable_name
-
-            row_cells = table.add_row().cells
-            row_cells[0].text = 'Question Text'
-            row_cells[1].text = question_text
-
-            row_cells = table.add_row().cells
-            row_cells[0].text = 'Validity'
-            row_cells[1].text = validity
-            if validity.lower() == 'not valid':
-                from docx.shared import RGBColor
-                row_cells[1].paragraphs[0].runs[0].font.color.rgb = RGBColor(255, 0, 0)  # Red
-                row_cells[1].paragraphs[0].runs[0].font.bold = True
-            else:
-                from docx.shared import RGBColor
-                row_cells[1].paragraphs[0].runs[0].font.color.rgb = RGBColor(0, 128, 0)  # Green
-                row_cells[1].paragraphs[0].runs[0].font.bold = True
-
-            row_cells = table.add_row().cells
-            row_cells[0].text = 'Reason'
-            row_cells[1].text = reason
-
-            # Add alternative question if present and the question is not valid
-            alternative_question = question.get('alternative_question', '')
-            if alternative_question and validity.lower() == 'not valid':
-                row_cells = table.add_row().cells
-                row_cells[0].text = 'Suggested Alternative'
-                row_cells[1].text = alternative_question
-
-            # Add duplicate information if present
-            duplicates_with = question.get('duplicates_with', [])
-            if duplicates_with:
-                row_cells = table.add_row().cells
-                row_cells[0].text = 'Duplicates With'
-                dup_text = ""
-                for j, dup in enumerate(duplicates_with):
-                    dup_table = dup.get('table_number', 'N/A')
-                    dup_item = dup.get('item_number', 'N/A')
-                    dup_text += f"Table {dup_table}, Item {dup_item}"
-                    if j < len(duplicates_with) - 1:
-                        dup_text += "; "
-                row_cells[1].text = dup_text
-
-            doc.add_paragraph("")  # Empty line for spacing
+        write_questions(doc, questions)
 
     # Add overall assessment
     doc.add_heading('Overall Assessment', level=1)
-    if 'overall_assessment' in analysis_data:
-        doc.add_paragraph(analysis_data['overall_assessment'])
+    doc.add_paragraph(analysis.overall_assessment)
 
     # Add general recommendations
     doc.add_heading('Recommendations', level=1)
-    if 'recommendations' in analysis_data and analysis_data['recommendations']:
-        for i, rec in enumerate(analysis_data['recommendations'], 1):
+    if analysis.recommendations:
+        for i, rec in enumerate(analysis.recommendations, 1):
             p = doc.add_paragraph()
             p.add_run(f'{i}. ').bold = True
             p.add_run(rec)
@@ -912,12 +1177,7 @@ def generate_docx(analysis_data, filename):
         conclusion_para.add_run('poor').bold = True
         conclusion_para.add_run(' quality with many questions needing revision.')
 
-    # Save to temporary file
-    temp_dir = tempfile.mkdtemp()
-    temp_path = os.path.join(temp_dir, f"quality_report_{filename.replace('.txt', '').replace('.json', '').replace('.docx', '').replace('.pdf', '').replace('.csv', '')}.docx")
-    doc.save(temp_path)
-
-    return temp_path
+    return doc
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+Asyncio analysis engine for Survey Quality Checker
+Runs extraction, prompt building, the AI model call and parsing for every file concurrently,
+limited only by a per-provider cap on in-flight API requests
+"""
+
+import time
+import asyncio
+from threading import Lock
+
+import httpx
+
+from app import ModelCall, extract_uploaded_file, file_analysis_pipeline
+from provider_client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_BACKOFF_BASE,
+    DEFAULT_BACKOFF_MAX,
+    RetryPolicy
+)
+
+# Maximum number of in-flight API requests per provider
+DEFAULT_PROVIDER_CONCURRENCY = {
+    'deepseek': 16
+}
+DEFAULT_CONCURRENCY = 8  # for providers not listed above
+
+# Cumulative request counters across engine runs, shown in Settings (read them with engine_metrics)
+_engine_metrics = {'requests': 0, 'retries': 0, 'failures': 0}
+_engine_metrics_lock = Lock()
+
+
+def engine_metrics():
+    """Return a snapshot of the request, retry and failure counters of every finished engine run"""
+    with _engine_metrics_lock:
+        return dict(_engine_metrics)
+
+
+def advance_pipeline(pipeline, results=None):
+    """
+    Send results to a pipeline (start it if None) and return (False, next batch of calls), or
+    (True, result) once it returns; StopIteration cannot cross an asyncio future
+    """
+    try:
+        return False, next(pipeline) if results is None else pipeline.send(results)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+class AsyncAnalysisEngine:
+    """Analyzes many survey files concurrently over a shared async HTTP client"""
+
+    def __init__(self, provider_concurrency=None, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX, extraction_executor=None):
+        self.provider_concurrency = dict(DEFAULT_PROVIDER_CONCURRENCY)
+        self.provider_concurrency.update(provider_concurrency or {})
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.retry_policy = RetryPolicy(max_retries, backoff_base, backoff_max)
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        # Executor for text extraction; None uses the event loop's default thread pool
+        self.extraction_executor = extraction_executor
+        # Seconds spent extracting and analyzing each file, by file name
+        self.file_timings = {}
+        self._client = None
+        self._semaphores = {}
+
+    def _semaphore(self, provider):
+        if provider not in self._semaphores:
+            limit = self.provider_concurrency.get(provider, DEFAULT_CONCURRENCY)
+            self._semaphores[provider] = asyncio.Semaphore(limit)
+        return self._semaphores[provider]
+
+    async def _post_json(self, url, headers, payload, stream=False):
+        """POST a JSON payload, retrying transient failures with the same RetryPolicy as ProviderClient.post_json"""
+        attempt = 0
+        while True:
+            self.requests += 1
+            try:
+                request = self._client.build_request('POST', url, headers=headers, json=payload)
+                response = await self._client.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError):
+                delay = self.retry_policy.retry_delay(attempt)
+                if delay is None:
+                    self.failures += 1
+                    raise
+                await self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+
+            delay = self.retry_policy.retry_delay(attempt, response.status_code, response.headers.get('Retry-After'))
+            if delay is not None:
+                await response.aclose()
+                await self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+
+            if response.is_error:
+                self.failures += 1
+                await response.aclose()
+            response.raise_for_status()
+            return response
+
+    async def _sleep_before_retry(self, delay):
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    async def call_model(self, file_content, model, on_item=None, messages=None, map_item=None):
+        """Async counterpart of app.call_ai_model, sending the app.ModelCall request over the shared client"""
+        call = ModelCall(file_content, model, on_item, messages, map_item)
+        try:
+            # The cache reads and writes files, keep that off the event loop too
+            if await asyncio.to_thread(call.lookup) is None:
+                url, headers, payload = call.request()
+                async with self._semaphore(model['provider']):
+                    if call.parser:
+                        response = await self._post_json(url, headers, payload, stream=True)
+                        try:
+                            async for line in response.aiter_lines():
+                                call.feed_lines([line])
+                        finally:
+                            await response.aclose()
+                    else:
+                        response = await self._post_json(url, headers, payload)
+                        call.read_response(response.json())
+
+            # Parsing large responses is CPU work, keep it off the event loop; items reach on_item here
+            return call.deliver(await asyncio.to_thread(call.analysis))
+        except Exception as e:
+            return call.failed(e)
+
+    async def run_pipeline(self, pipeline, on_item=None):
+        """
+        Drive a file analysis pipeline, running each batch of model calls concurrently. The
+        pipeline's own steps (screening, reading and saving revisions) run in a worker thread
+        so their CPU work and file access stay off the event loop.
+        """
+        done, value = await asyncio.to_thread(advance_pipeline, pipeline)
+        while not done:
+            calls = value
+            if on_item:
+                calls = [dict(kwargs, on_item=on_item) for kwargs in calls]
+            results = await asyncio.gather(*(self.call_model(**kwargs) for kwargs in calls))
+            done, value = await asyncio.to_thread(advance_pipeline, pipeline, list(results))
+        return value
+
+    async def analyze_file(self, uploaded_file, selected_models, on_item=None, mode='full'):
+        """Async counterpart of app.analyze_single_file"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        file_content, extraction_stats = await loop.run_in_executor(self.extraction_executor, extract_uploaded_file,
+                                                                    uploaded_file)
+        extracted = time.perf_counter()
+        timings = self.file_timings[uploaded_file.name] = {'extract_seconds': extracted - started, 'analyze_seconds': 0.0}
+        timings.update(extraction_stats or {})
+
+        if not file_content:
+            return {'filename': uploaded_file.name, 'error': f"Could not process file: {uploaded_file.name}"}
+
+        result = await self.run_pipeline(file_analysis_pipeline(uploaded_file.name, file_content, selected_models, mode),
+                                         on_item=on_item)
+        timings['analyze_seconds'] = time.perf_counter() - extracted
+        return result
+
+    async def analyze_files(self, uploaded_files, selected_models, on_result=None, on_item=None, mode='full'):
+        """
+        Analyze every file concurrently and return the result dicts in input order.
+        on_result(uploaded_file, result) is called as each file finishes and
+        on_item(uploaded_file, item) as each streamed question analysis arrives.
+        """
+        max_connections = sum(self.provider_concurrency.values()) or DEFAULT_CONCURRENCY
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            self._client = client
+            self._semaphores = {}
+
+            async def analyze(uploaded_file):
+                try:
+                    file_on_item = (lambda item: on_item(uploaded_file, item)) if on_item else None
+                    result = await self.analyze_file(uploaded_file, selected_models, on_item=file_on_item, mode=mode)
+                except Exception as e:
+                    result = {'filename': uploaded_file.name, 'error': f"Error processing file {uploaded_file.name}: {str(e)}"}
+                if on_result:
+                    on_result(uploaded_file, result)
+                return result
+
+            try:
+                return list(await asyncio.gather(*(analyze(f) for f in uploaded_files)))
+            finally:
+                self._client = None
+                with _engine_metrics_lock:
+                    _engine_metrics['requests'] += self.requests
+                    _engine_metrics['retries'] += self.retries
+                    _engine_metrics['failures'] += self.failures
+
+
+def analyze_files(uploaded_files, selected_models, provider_concurrency=None, on_result=None, on_item=None,
+                  mode='full'):
+    """Run the async engine to completion from synchronous code such as the Streamlit script"""
+    engine = AsyncAnalysisEngine(provider_concurrency=provider_concurrency)
+    return asyncio.run(engine.analyze_files(uploaded_files, selected_models, on_result=on_result, on_item=on_item,
+                                            mode=mode))
@@ -0,0 +1,283 @@
+"""
+Headless batch analysis for Survey Quality Checker
+Analyzes a directory (or glob) of survey files without Streamlit: text extraction runs in a
+process pool, AI model calls run concurrently in the asyncio engine, and every file gets a
+JSON result and a DOCX report. Example:
+
+    python batch_cli.py surveys/ --output results/ --jobs 4 --resume
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+import concurrent.futures
+
+from app import ANALYSIS_MODES, load_api_keys, render_docx_bytes
+from async_engine import AsyncAnalysisEngine, DEFAULT_PROVIDER_CONCURRENCY
+from streaming import StreamingResultWriter, RESULTS_DIR, result_name
+from analysis_models import validate_analysis
+from duplicate_index import DuplicateIndex, DUPLICATE_THRESHOLD
+from sharding import item_id
+from item_export import export_items, ITEM_FORMATS
+
+SUPPORTED_EXTENSIONS = ('.txt', '.json', '.csv', '.docx', '.pdf')
+SUMMARY_FILENAME = 'batch_summary.json'
+# Item table of every run, appended to (parquet adds a part file to the items directory)
+ITEMS_DESTINATIONS = {'csv': 'items.csv', 'jsonl': 'items.jsonl', 'parquet': 'items'}
+
+
+class LocalSurveyFile:
+    """
+    A survey file on disk with the name/getvalue() interface of a Streamlit upload, plus open()
+    for streaming extraction. name defaults to the file name (see relative_names).
+    Only the path is pickled, so extraction workers read the file themselves.
+    """
+
+    def __init__(self, path, name=None):
+        self.path = path
+        self.name = name or os.path.basename(path)
+
+    def getvalue(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def open(self):
+        """Open the file for streaming extraction instead of reading it whole"""
+        return open(self.path, 'rb')
+
+
+def collect_survey_files(inputs):
+    """Expand directories and glob patterns into a sorted list of supported survey paths"""
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        paths.update(path for path in candidates
+                     if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS))
+    return sorted(paths)
+
+
+def relative_names(paths):
+    """
+    Return the name of each survey path relative to the deepest folder containing all of them, so
+    same-named files in different folders (recursive globs) are kept apart; a single folder gives
+    plain file names
+    """
+    if not paths:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    return [os.path.relpath(os.path.abspath(path), root).replace(os.sep, '/') for path in paths]
+
+
+def report_path(output_dir, filename):
+    """Path of the DOCX report for a survey, named like the Streamlit download"""
+    return os.path.join(output_dir, f"quality_report_{result_name(filename)}.docx")
+
+
+def write_report(analysis, filename, output_dir):
+    """Render the DOCX report for one analysis into output_dir (runs in an extraction worker)"""
+    destination = report_path(output_dir, filename)
+    with open(destination, 'wb') as f:
+        f.write(render_docx_bytes(analysis, filename))
+    return destination
+
+
+def summarize_items(analysis):
+    """Count analyzed and invalid items of a file analysis, and the items a local rule failed"""
+    items = validate_analysis(analysis).individual_question_analysis
+    return {'items': len(items), 'not_valid': sum(1 for item in items if item.is_not_valid),
+            'rule_failures': analysis.get('rule_screening', {}).get('failed_items', 0)}
+
+
+def shared_items(reports, threshold=DUPLICATE_THRESHOLD):
+    """
+    Return, per file, how many of its items are near-duplicates of an item in another survey of
+    the batch, and the number of such cross-survey groups
+    """
+    index = DuplicateIndex()
+    for filename, analysis in reports.items():
+        index.add_many(((filename, item_id(item)), item.get('question_text', ''))
+                       for item in analysis.get('individual_question_analysis', []))
+    counts = dict.fromkeys(reports, 0)
+    groups = [group for group in index.groups(threshold) if len({filename for filename, _ in group}) > 1]
+    for group in groups:
+        for filename, _ in group:
+            counts[filename] += 1
+    return counts, len(groups)
+
+
+def build_models(args):
+    """Build the model list the same way the Streamlit app does, from key.json or the environment"""
+    api_key = os.environ.get('DEEPSEEK_API_KEY') or load_api_keys(args.keys).get('deepseek', '')
+    model = {"name": "DeepSeek Reasoner", "api_key": api_key, "provider": "deepseek",
+             "temperature": args.temperature, "use_cache": not args.no_cache, "stream": not args.no_stream,
+             "follow_up_missing": not args.no_follow_up, "skip_rule_decided": args.skip_decided,
+             "local_duplicates": not args.no_local_duplicates}
+    if args.endpoint:
+        model['endpoint'] = args.endpoint
+    return [model]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a batch of survey questionnaires without the web interface")
+    parser.add_argument('inputs', nargs='+', help="Survey files, directories or glob patterns (quote globs)")
+    parser.add_argument('-o', '--output', default=RESULTS_DIR, help="Directory for JSON results, DOCX reports and the summary")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for text extraction and DOCX rendering")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_PROVIDER_CONCURRENCY['deepseek'],
+                        help="Maximum in-flight API requests")
+    parser.add_argument('--resume', action='store_true', help="Skip files that already have a JSON result and DOCX report")
+    parser.add_argument('--mode', choices=list(ANALYSIS_MODES), default='full', help="Analysis mode")
+    parser.add_argument('--temperature', type=float, default=0.3)
+    parser.add_argument('--keys', default='key.json', help="API keys file (DEEPSEEK_API_KEY takes precedence)")
+    parser.add_argument('--endpoint', help="Chat completions URL to use instead of the provider's")
+    parser.add_argument('--no-cache', action='store_true', help="Do not reuse cached AI responses")
+    parser.add_argument('--no-stream', action='store_true', help="Wait for complete responses instead of streaming")
+    parser.add_argument('--no-follow-up', action='store_true', help="Do not re-request items a response skipped")
+    parser.add_argument('--skip-decided', action='store_true',
+                        help="Do not send items that fail a local rule to the model (structured mode)")
+    parser.add_argument('--no-local-duplicates', action='store_true',
+                        help="Leave duplicate detection to the model instead of marking near-identical items locally")
+    parser.add_argument('--items', choices=ITEM_FORMATS,
+                        help="Append one row per analyzed item of this run to items.csv, items.jsonl or the items/ Parquet dataset")
+    return parser.parse_args(argv)
+
+
+def print_summary(summary):
+    totals = summary['totals']
+    print(f"\n{'File':<40} {'Status':<10} {'Extract':>8} {'Analyze':>8} {'Items':>6} {'Invalid':>8}")
+    for entry in summary['files']:
+        print(f"{entry['filename'][:40]:<40} {entry['status']:<10} {entry.get('extract_seconds', 0):>7.1f}s "
+              f"{entry.get('analyze_seconds', 0):>7.1f}s {entry.get('items', 0):>6} {entry.get('not_valid', 0):>8}")
+        if entry.get('error'):
+            print(f"    {entry['error']}")
+    print(f"\n{totals['files']} file(s) in {totals['wall_seconds']:.1f}s: {totals['analyzed']} analyzed, "
+          f"{totals['skipped']} skipped, {totals['failed']} failed "
+          f"({totals['requests']} API requests, {totals['retries']} retries)")
+
+
+def run_batch(paths, models, output_dir, jobs=1, concurrency=DEFAULT_PROVIDER_CONCURRENCY['deepseek'],
+              resume=False, mode='full', stream=True, items_format=None):
+    """Analyze survey files into output_dir and return the summary written to batch_summary.json"""
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    writer = StreamingResultWriter(output_dir)
+    # Keyed by relative path: folders of a recursive glob may hold files with the same name
+    names = relative_names(paths)
+    entries = {name: {'filename': name, 'path': path} for name, path in zip(names, paths)}
+
+    # With --resume, files with a JSON result only need their report; files with both are skipped
+    to_analyze = []
+    reports = {}
+    for name, path in zip(names, paths):
+        entry = entries[name]
+        has_result = os.path.exists(writer.result_path(entry['filename']))
+        if resume and has_result:
+            if os.path.exists(report_path(output_dir, entry['filename'])):
+                entry['status'] = 'skipped'
+            else:
+                with open(writer.result_path(entry['filename']), 'r', encoding='utf-8') as f:
+                    reports[entry['filename']] = json.load(f)['analysis']
+                entry['status'] = 'reported'
+        else:
+            # Items streamed by an interrupted run are superseded by this one
+            if os.path.exists(writer.partial_path(entry['filename'])):
+                os.remove(writer.partial_path(entry['filename']))
+            to_analyze.append(LocalSurveyFile(path, name))
+
+    print(f"Analyzing {len(to_analyze)} of {len(paths)} file(s) with {jobs} extraction worker(s)...")
+
+    def on_item(survey_file, item):
+        writer.append_item(survey_file.name, item)
+
+    def on_result(survey_file, result):
+        entry = entries[survey_file.name]
+        entry['finished_seconds'] = time.perf_counter() - started
+        # Model errors are recorded inside the analysis; leave those files without a result so --resume retries them
+        model_errors = [model_used['analysis']['error'] for model_used in result.get('analysis', {}).get('models_used', [])
+                        if 'error' in model_used['analysis']]
+        if 'error' in result or model_errors:
+            entry.update(status='failed', error=result.get('error') or model_errors[0])
+            print(f"[FAILED] {survey_file.name}: {entry['error']}")
+        else:
+            writer.finalize(survey_file.name, result)
+            reports[survey_file.name] = result['analysis']
+            entry['status'] = 'analyzed'
+            print(f"[DONE] {survey_file.name}")
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        provider_concurrency = {model['provider']: concurrency for model in models}
+        engine = AsyncAnalysisEngine(provider_concurrency=provider_concurrency, extraction_executor=pool)
+        if to_analyze:
+            asyncio.run(engine.analyze_files(to_analyze, models, on_result=on_result,
+                                             on_item=on_item if stream else None, mode=mode))
+
+        futures = {pool.submit(write_report, analysis, filename, output_dir): filename
+                   for filename, analysis in reports.items()}
+        for future in concurrent.futures.as_completed(futures):
+            entry = entries[futures[future]]
+            try:
+                entry['report'] = future.result()
+            except Exception as e:
+                entry.update(status='failed', error=f"Could not write report: {e}")
+
+    shared_counts, shared_groups = shared_items(reports)
+    for filename, analysis in reports.items():
+        entry = entries[filename]
+        entry.update(summarize_items(analysis))
+        entry['shared_items'] = shared_counts[filename]
+        entry.update(engine.file_timings.get(filename, {}))
+
+    files = [entries[name] for name in names]
+    items_exported = 0
+    if items_format:
+        # Only newly analyzed files, so repeated runs append each analysis once
+        items_exported = export_items(
+            ({'filename': entry['filename'], 'analysis': reports[entry['filename']]} for entry in files if entry['status'] == 'analyzed'),
+            os.path.join(output_dir, ITEMS_DESTINATIONS[items_format]), items_format)
+    summary = {
+        'files': files,
+        'totals': {
+            'files': len(files),
+            'analyzed': sum(1 for entry in files if entry['status'] == 'analyzed'),
+            'skipped': sum(1 for entry in files if entry['status'] in ('skipped', 'reported')),
+            'failed': sum(1 for entry in files if entry['status'] == 'failed'),
+            'shared_item_groups': shared_groups,
+            'items_exported': items_exported,
+            'requests': engine.requests,
+            'retries': engine.retries,
+            'wall_seconds': time.perf_counter() - started
+        }
+    }
+    with open(os.path.join(output_dir, SUMMARY_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    paths = collect_survey_files(args.inputs)
+    if not paths:
+        print("No survey files found", file=sys.stderr)
+        return 1
+
+    models = build_models(args)
+    if not all(model['api_key'] for model in models):
+        print("No API key found: set DEEPSEEK_API_KEY or provide a key.json with --keys", file=sys.stderr)
+        return 1
+
+    summary = run_batch(paths, models, args.output, jobs=args.jobs, concurrency=args.concurrency,
+                        resume=args.resume, mode=args.mode, stream=not args.no_stream, items_format=args.items)
+    print_summary(summary)
+
+    return 1 if summary['totals']['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for analysis validation
+Validates synthetic model responses with thousands of loosely typed items (string booleans,
+integer item numbers, nulls, missing fields) through analysis_models and prints items per
+second as JSON:
+
+    python bench_analysis_models.py --items 1000 10000 50000
+"""
+
+import json
+import time
+import argparse
+
+from analysis_models import validate_analysis, normalize_analysis
+
+
+def make_response(items):
+    """Build a parsed model response with the value shapes models actually return"""
+    questions = []
+    for i in range(items):
+        question = {"table_number": i // 20 + 1, "item_number": str(i % 20 + 1),
+                    "question_text": f"The staff were courteous {i}.",
+                    "validity": ["Valid", "not valid", "Not Valid", None][i % 4],
+                    "reason": "CRITERIA 2 - DOUBLE-BARRELED: two ideas in one item",
+                    "duplicates_with": None if i % 3 else [{"table_number": 1, "item_number": 1}]}
+        if i % 5:
+            question["variable_name"] = "Service Quality"
+            question["alternative_question"] = "The staff were courteous."
+        questions.append(question)
+    return {"survey_general_instructions_analysis": {"instructions_present": "true", "scale_correctly_defined": "True",
+                                                     "issues_found": None},
+            "survey_parts_analysis": {"part_2_has_only_definitions": True},
+            "individual_question_analysis": questions, "overall_assessment": "Mostly valid", "recommendations": None}
+
+
+def time_call(function, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(item_counts, repeat):
+    results = []
+    for items in item_counts:
+        response = make_response(items)
+        validate_seconds = time_call(validate_analysis, response, repeat)
+        normalize_seconds = time_call(normalize_analysis, response, repeat)
+        results.append({
+            'items': items,
+            'validate_seconds': validate_seconds,
+            'validate_items_per_second': items / validate_seconds if validate_seconds else None,
+            'normalize_seconds': normalize_seconds,
+            'normalize_items_per_second': items / normalize_seconds if normalize_seconds else None
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark validation of analysis results")
+    parser.add_argument('--items', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    print(json.dumps({'results': run_benchmark(args.items, args.repeat)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark for DOCX extraction
+Compares extraction.iter_docx_fragments, which walks the document body XML once in order, with
+the previous python-docx extractor (paragraphs, then every table through row.cells) on
+synthetic questionnaires with merged scale headers, and prints timings and prompt sizes as JSON:
+
+    python bench_docx_extraction.py --tables 10 50 200
+"""
+
+import io
+import json
+import time
+import argparse
+
+from docx import Document
+
+from extraction import iter_docx_fragments
+
+
+def legacy_extract_docx(data):
+    """The python-docx extractor that iter_docx_fragments replaced, kept for comparison"""
+    doc = Document(io.BytesIO(data))
+
+    content = '\n'.join([paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()])
+
+    table_content = []
+    for table in doc.tables:
+        for row in table.rows:
+            row_data = [cell.text for cell in row.cells]
+            table_content.append('| ' + ' | '.join(row_data) + ' |')
+        table_content.append('')
+
+    if table_content:
+        content += "\n\nExtracted Tables:\n" + '\n'.join(table_content)
+
+    return content
+
+
+def make_questionnaire(tables, items_per_table=10):
+    """Return DOCX bytes with one variable heading and Likert table per variable"""
+    doc = Document()
+    doc.add_paragraph("General Instructions: Please rate each statement using the following scale:")
+    doc.add_paragraph("4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree")
+    for number in range(1, tables + 1):
+        doc.add_paragraph(f"Variable {number}: Measures customer perception of aspect {number}")
+        table = doc.add_table(rows=items_per_table + 2, cols=5)
+        table.cell(0, 0).merge(table.cell(1, 0)).text = "Statement"
+        table.cell(0, 1).merge(table.cell(0, 4)).text = "Scale"
+        for column, label in enumerate(("4", "3", "2", "1"), 1):
+            table.cell(1, column).text = label
+        for item in range(1, items_per_table + 1):
+            table.cell(item + 1, 0).text = f"{item}. The service aspect {number}.{item} met my expectations."
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+class BytesUpload:
+    """Minimal upload object for the extractor"""
+
+    def __init__(self, data):
+        self.name = "survey.docx"
+        self._data = data
+
+    def getvalue(self):
+        return self._data
+
+
+def time_call(function, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(table_counts, items_per_table, repeat):
+    results = []
+    for tables in table_counts:
+        data = make_questionnaire(tables, items_per_table)
+        new_seconds, new_text = time_call(lambda: ''.join(iter_docx_fragments(BytesUpload(data))), repeat)
+        legacy_seconds, legacy_text = time_call(lambda: legacy_extract_docx(data), repeat)
+        results.append({
+            'tables': tables,
+            'items': tables * items_per_table,
+            'docx_bytes': len(data),
+            'new_seconds': new_seconds,
+            'legacy_seconds': legacy_seconds,
+            'speedup': legacy_seconds / new_seconds if new_seconds else None,
+            'new_chars': len(new_text),
+            'legacy_chars': len(legacy_text)
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DOCX extraction on synthetic questionnaires")
+    parser.add_argument('--tables', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--items', type=int, default=10, help="Items per table")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    print(json.dumps({'results': run_benchmark(args.tables, args.items, args.repeat)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Micro-benchmark for DOCX report rendering
+Renders reports of N synthetic question verdicts with the bulk question writer and with the
+cell-by-cell python-docx reference below (the report's original question writer), checks that both
+produce the same document body and prints the timings as JSON:
+
+    python bench_docx_report.py --items 10 100 1000
+"""
+
+import io
+import json
+import time
+import argparse
+
+from lxml import etree
+from docx.shared import RGBColor
+
+from app import build_docx_report
+from docx_report import append_question_sections
+
+
+def append_question_sections_cell_by_cell(doc, questions):
+    """Write the question sections through python-docx, one cell at a time (reference for the bulk writer)"""
+    for question in questions:
+        validity = question.validity or 'N/A'
+        # Red for invalid questions, green for valid ones
+        color = RGBColor(255, 0, 0) if question.is_not_valid else RGBColor(0, 128, 0)
+
+        # Create a heading for each question using table and item numbers
+        question_heading = doc.add_heading(
+            f'Question Table {question.table_number or "N/A"} - {question.item_number or "N/A"}', level=2)
+        question_heading.runs[0].font.color.rgb = color
+
+        # Add question details in a table for better organization
+        table = doc.add_table(rows=1, cols=2)
+        table.style = 'Table Grid'
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = 'Attribute'
+        hdr_cells[1].text = 'Value'
+
+        # Add question details
+        row_cells = table.add_row().cells
+        row_cells[0].text = 'Table Number'
+        row_cells[1].text = question.table_number or 'N/A'
+
+        row_cells = table.add_row().cells
+        row_cells[0].text = 'Item Number'
+        row_cells[1].text = question.item_number or 'N/A'
+
+        row_cells = table.add_row().cells
+        row_cells[0].text = 'Variable Name'
+        row_cells[1].text = question.variable_name or 'N/A'
+
+        row_cells = table.add_row().cells
+        row_cells[0].text = 'Question Text'
+        row_cells[1].text = question.question_text or 'N/A'
+
+        row_cells = table.add_row().cells
+        row_cells[0].text = 'Validity'
+        row_cells[1].text = validity
+        row_cells[1].paragraphs[0].runs[0].font.color.rgb = color
+        row_cells[1].paragraphs[0].runs[0].font.bold = True
+
+        row_cells = table.add_row().cells
+        row_cells[0].text = 'Reason'
+        row_cells[1].text = question.reason or 'N/A'
+
+        # Add alternative question if present and the question is not valid
+        if question.alternative_question and question.is_not_valid:
+            row_cells = table.add_row().cells
+            row_cells[0].text = 'Suggested Alternative'
+            row_cells[1].text = question.alternative_question
+
+        # Add duplicate information if present
+        if question.duplicates_with:
+            row_cells = table.add_row().cells
+            row_cells[0].text = 'Duplicates With'
+            row_cells[1].text = "; ".join(
+                f"Table {dup.table_number or 'N/A'}, Item {dup.item_number or 'N/A'}" for dup in question.duplicates_with
+            )
+
+        doc.add_paragraph("")  # Empty line for spacing
+
+
+def make_analysis(items):
+    """Return an analysis with items verdicts, every third one Not Valid with an alternative"""
+    questions = []
+    for number in range(items):
+        invalid = number % 3 == 0
+        questions.append({
+            'table_number': str(number // 10 + 1),
+            'item_number': str(number % 10 + 1),
+            'variable_name': f"Variable {number // 10 + 1}",
+            'question_text': f"The staff at location {number} were courteous and helpful.",
+            'validity': "Not Valid" if invalid else "Valid",
+            'reason': "CRITERIA 7 - DOUBLE-BARRELED: asks about two things" if invalid else "Meets all criteria",
+            'alternative_question': f"The staff at location {number} were courteous." if invalid else "",
+            'duplicates_with': [{'table_number': "1", 'item_number': "1"}] if number % 50 == 49 else []
+        })
+    return {
+        'survey_general_instructions_analysis': {'instructions_present': True, 'scale_correctly_defined': True},
+        'individual_question_analysis': questions,
+        'overall_assessment': "Synthetic survey.",
+        'recommendations': ["Split double-barreled items."]
+    }
+
+
+def render(analysis, write_questions):
+    start = time.perf_counter()
+    doc = build_docx_report(analysis, "survey.txt", write_questions)
+    doc.save(io.BytesIO())
+    return time.perf_counter() - start, doc
+
+
+def run_benchmark(item_counts, repeats):
+    results = []
+    for items in item_counts:
+        analysis = make_analysis(items)
+        cell_seconds, cell_doc = min((render(analysis, append_question_sections_cell_by_cell) for _ in range(repeats)), key=lambda run: run[0])
+        bulk_seconds, bulk_doc = min((render(analysis, append_question_sections) for _ in range(repeats)), key=lambda run: run[0])
+        # The metadata paragraph (with the generated-on time) is the only one that may differ
+        same = [etree.tostring(element) for element in cell_doc.element.body[2:]] == \
+               [etree.tostring(element) for element in bulk_doc.element.body[2:]]
+        results.append({
+            'items': items,
+            'cell_by_cell_seconds': cell_seconds,
+            'bulk_seconds': bulk_seconds,
+            'speedup': cell_seconds / bulk_seconds if bulk_seconds else None,
+            'same_body': same
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DOCX report rendering")
+    parser.add_argument('--items', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args(argv)
+    print(json.dumps({'results': run_benchmark(args.items, args.repeats)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for the near-duplicate index
+Indexes N synthetic survey items (a batch of surveys with planted rewordings) and times finding
+the near-duplicate pairs with MinHash/LSH against comparing every pair, and prints the timings
+and recall as JSON:
+
+    python bench_duplicate_index.py --items 1000 10000 50000
+"""
+
+import json
+import time
+import random
+import argparse
+from itertools import combinations
+
+from duplicate_index import DuplicateIndex, shingles, jaccard, DUPLICATE_THRESHOLD
+
+# Pairwise comparison is only timed up to this many items (it grows quadratically)
+MAX_PAIRWISE_ITEMS = 5000
+
+# Survey-like vocabulary: a few words every item uses and a long tail of topic words
+COMMON_WORDS = ["staff", "service", "customers", "restaurant", "food", "quality", "experience", "clean"]
+TOPIC_WORDS = [f"topic{i}" for i in range(4000)]
+
+
+def make_items(items, seed=1):
+    """Return item texts where every tenth item rewords an earlier one, and the planted pairs"""
+    generator = random.Random(seed)
+    texts = []
+    planted = set()
+    for number in range(items):
+        if number % 10 == 9:
+            original = generator.randrange(number)
+            texts.append(texts[original].replace(" was ", " is ").replace(".", " overall."))
+            planted.add((original, number))
+        else:
+            words = generator.sample(COMMON_WORDS, 2) + generator.sample(TOPIC_WORDS, 4)
+            texts.append(f"The {words[0]} was {words[2]} and {words[3]} with {words[1]} {words[4]} {words[5]}.")
+    return texts, planted
+
+
+def pairwise(texts, threshold):
+    sets = [shingles(text) for text in texts]
+    return {(i, j) for i, j in combinations(range(len(sets)), 2) if jaccard(sets[i], sets[j]) >= threshold}
+
+
+def run_benchmark(item_counts, threshold):
+    results = []
+    for items in item_counts:
+        texts, planted = make_items(items)
+
+        start = time.perf_counter()
+        index = DuplicateIndex()
+        index.add_many(enumerate(texts))
+        found = {(a, b) for a, b, _ in index.pairs(threshold)}
+        index_seconds = time.perf_counter() - start
+
+        result = {
+            'items': items,
+            'index_seconds': index_seconds,
+            'items_per_second': items / index_seconds if index_seconds else None,
+            'pairs_found': len(found),
+            'planted_recall': len(planted & found) / len(planted) if planted else None
+        }
+        if items <= MAX_PAIRWISE_ITEMS:
+            start = time.perf_counter()
+            expected = pairwise(texts, threshold)
+            result['pairwise_seconds'] = time.perf_counter() - start
+            result['recall_vs_pairwise'] = len(expected & found) / len(expected) if expected else None
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate detection")
+    parser.add_argument('--items', type=int, nargs='+', default=[1000, 5000, 10000, 50000])
+    parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD)
+    args = parser.parse_args(argv)
+    print(json.dumps({'results': run_benchmark(args.items, args.threshold)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Micro-benchmark for JSON extraction
+Compares json_extraction.extract_valid_json with the previous five-strategy extractor on
+synthetic 100 KB - 2 MB model responses and prints timings and speedups as JSON:
+
+    python bench_json_extraction.py --sizes 100000 500000 1000000 2000000
+"""
+
+import re
+import json
+import time
+import argparse
+
+from json_extraction import extract_json
+
+
+def legacy_extract_valid_json(content):
+    """The five-strategy extractor that json_extraction.extract_valid_json replaced, kept for comparison"""
+
+    # Strategy 1: Try to parse as-is
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        pass
+
+    # Strategy 2: Remove markdown code blocks and try to parse
+    cleaned_content = content.replace('```json', '').replace('```', '').strip()
+    try:
+        return json.loads(cleaned_content)
+    except json.JSONDecodeError:
+        pass
+
+    # Strategy 3: Extract JSON object using regex (look for content between { and })
+    # This handles cases where there's text before or after the JSON
+    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+    if json_match:
+        json_str = json_match.group()
+        try:
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            pass
+
+    # Strategy 4: Look for JSON array as well (for cases where the response is an array)
+    array_match = re.search(r'\[.*\]', content, re.DOTALL)
+    if array_match:
+        array_str = array_match.group()
+        try:
+            return json.loads(array_str)
+        except json.JSONDecodeError:
+            pass
+
+    # Strategy 5: Handle cases where the response contains multiple JSON objects
+    # Look for the main survey analysis structure specifically
+    # Find the structure that contains our expected fields
+    # Find all potential JSON objects in the content
+    potential_matches = []
+    start = 0
+    while start < len(content):
+        open_brace = content.find('{', start)
+        if open_brace == -1:
+            break
+        # Find the matching closing brace
+        brace_count = 0
+        pos = open_brace
+        while pos < len(content):
+            if content[pos] == '{':
+                brace_count += 1
+            elif content[pos] == '}':
+                brace_count -= 1
+                if brace_count == 0:
+                    potential_json = content[open_brace:pos+1]
+                    try:
+                        parsed = json.loads(potential_json)
+                        # Check if it has the expected structure
+                        if isinstance(parsed, dict) and ('individual_question_analysis' in parsed or 'survey_general_instructions_analysis' in parsed):
+                            return parsed
+                    except json.JSONDecodeError:
+                        pass
+                    break
+            pos += 1
+        start = pos + 1
+
+    # If all strategies fail, return None
+    return None
+
+
+def make_analysis(size):
+    """Build an analysis whose JSON is roughly size characters, with braces inside question texts"""
+    item = {"table_number": "1", "item_number": "1", "variable_name": "Service Quality",
+            "question_text": "The menu {daily specials} was clear and the staff said \"hi }\"",
+            "validity": "Not Valid", "reason": "CRITERIA 2 - DOUBLE-BARRELED: two ideas in one item",
+            "alternative_question": "The menu was clear.", "duplicates_with": []}
+    per_item = len(json.dumps(item)) + 2
+    items = []
+    for i in range(max(1, size // per_item)):
+        items.append(dict(item, table_number=str(i // 20 + 1), item_number=str(i % 20 + 1)))
+    return {"survey_general_instructions_analysis": {"instructions_present": True, "issues_found": []},
+            "individual_question_analysis": items, "overall_assessment": "Mostly valid", "recommendations": []}
+
+
+def make_responses(size):
+    """Return the response shapes models actually produce, keyed by name"""
+    body = json.dumps(make_analysis(size), indent=2)
+    return {
+        'markdown': "Here is the analysis of the survey:\n```json\n" + body + "\n```\nLet me know if you need more.",
+        'prose_braces': "I checked every item {all tables} and found issues [see below].\n" + body + "\nEnd of {report}",
+        'truncated': body[:len(body) * 3 // 4]
+    }
+
+
+def time_call(function, content, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(sizes, repeat):
+    results = []
+    for size in sizes:
+        for shape, content in make_responses(size).items():
+            entry = {'size': len(content), 'shape': shape, 'strategy': extract_json(content)[1],
+                     'new_seconds': time_call(extract_json, content, repeat),
+                     'legacy_seconds': time_call(legacy_extract_valid_json, content, repeat)}
+            entry['speedup'] = entry['legacy_seconds'] / entry['new_seconds'] if entry['new_seconds'] else None
+            results.append(entry)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction on synthetic model responses")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 500000, 1000000, 2000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    print(json.dumps({'results': run_benchmark(args.sizes, args.repeat)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+End-to-end throughput/latency benchmark for Survey Quality Checker
+Generates N synthetic surveys, analyzes them with M models against the local mock API
+(mock_llm_server.py) through the async engine used by the Streamlit app and through the
+batch CLI, and prints throughput, p50/p95/p99 file latency and error rates as JSON:
+
+    python bench_pipeline.py --files 50 --models 2 --latency 1.0 --error-rate 0.05 > bench.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+from mock_llm_server import MockLLMServer, config_from_args
+from async_engine import AsyncAnalysisEngine
+from batch_cli import LocalSurveyFile, run_batch
+
+SURVEY_ITEMS = [
+    "The staff were courteous.",
+    "The food was served hot and the portions were generous.",
+    "The prices were reasonable.",
+    "The restaurant was clean.",
+    "I would recommend this place and visit again.",
+]
+
+
+def make_surveys(directory, files, tables=3, items_per_table=5):
+    """Write synthetic TXT surveys and return their paths"""
+    paths = []
+    for index in range(files):
+        lines = ["General Instructions:", "Please rate each statement using the following scale:",
+                 "4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree", ""]
+        for table in range(1, tables + 1):
+            lines.append(f"Table {table}: Variable {table}")
+            lines.extend(f"{item}. {SURVEY_ITEMS[(index + table + item) % len(SURVEY_ITEMS)]}"
+                         for item in range(1, items_per_table + 1))
+            lines.append("")
+        path = os.path.join(directory, f"survey_{index:04d}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+        paths.append(path)
+    return paths
+
+
+def make_models(count, url, stream):
+    return [{"name": f"Mock Model {i + 1}", "api_key": "benchmark", "provider": "deepseek", "temperature": 0.3,
+             "endpoint": url, "use_cache": False, "stream": stream} for i in range(count)]
+
+
+def percentiles(values):
+    """Return mean, max and nearest-rank p50/p95/p99 of a list of seconds"""
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {'p50': rank(50), 'p95': rank(95), 'p99': rank(99),
+            'mean': sum(ordered) / len(ordered), 'max': ordered[-1]}
+
+
+def has_model_error(result):
+    return 'error' in result or any('error' in model_used['analysis']
+                                    for model_used in result.get('analysis', {}).get('models_used', []))
+
+
+def bench_engine(paths, models, concurrency, mode):
+    """Benchmark the asyncio engine that analyze_surveys runs for the Streamlit app"""
+    engine = AsyncAnalysisEngine(provider_concurrency={'deepseek': concurrency})
+    finished = []
+    started = time.perf_counter()
+
+    def on_result(survey_file, result):
+        finished.append((time.perf_counter() - started, has_model_error(result)))
+
+    asyncio.run(engine.analyze_files([LocalSurveyFile(path) for path in paths], models,
+                                     on_result=on_result, mode=mode))
+    wall = time.perf_counter() - started
+    return {
+        'wall_seconds': wall,
+        'latencies': [seconds for seconds, _ in finished],
+        'failed_files': sum(1 for _, failed in finished if failed),
+        'requests': engine.requests,
+        'retries': engine.retries
+    }
+
+
+def bench_batch(paths, models, concurrency, mode, jobs):
+    """Benchmark the headless batch path (process-pool extraction, JSON and DOCX output)"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        summary = run_batch(paths, models, output_dir, jobs=jobs, concurrency=concurrency, mode=mode,
+                            stream=any(model['stream'] for model in models))
+    return {
+        'wall_seconds': summary['totals']['wall_seconds'],
+        'latencies': [entry['finished_seconds'] for entry in summary['files'] if 'finished_seconds' in entry],
+        'failed_files': summary['totals']['failed'],
+        'requests': summary['totals']['requests'],
+        'retries': summary['totals']['retries']
+    }
+
+
+def run_benchmark(args):
+    """Run every selected path against a fresh mock server and return the report dict"""
+    with tempfile.TemporaryDirectory() as survey_dir:
+        paths = make_surveys(survey_dir, args.files, args.tables, args.items)
+        report = {'config': vars(args), 'runs': []}
+
+        for path_name in args.paths:
+            with MockLLMServer(config_from_args(args)) as server:
+                models = make_models(args.models, server.url, args.stream)
+                if path_name == 'engine':
+                    run = bench_engine(paths, models, args.concurrency, args.mode)
+                else:
+                    run = bench_batch(paths, models, args.concurrency, args.mode, args.jobs)
+                server_stats = dict(server.stats)
+
+            latencies = run.pop('latencies')
+            injected = server_stats['rate_limited'] + server_stats['server_errors']
+            report['runs'].append({
+                'path': path_name,
+                'files': args.files,
+                'models': args.models,
+                'wall_seconds': run['wall_seconds'],
+                'throughput_files_per_second': args.files / run['wall_seconds'] if run['wall_seconds'] else None,
+                'file_latency_seconds': percentiles(latencies),
+                'file_error_rate': run['failed_files'] / args.files if args.files else 0.0,
+                'request_error_rate': injected / server_stats['requests'] if server_stats['requests'] else 0.0,
+                'client_requests': run['requests'],
+                'client_retries': run['retries'],
+                'server': server_stats
+            })
+
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline against a local mock API")
+    parser.add_argument('--files', type=int, default=20, help="Number of synthetic surveys (N)")
+    parser.add_argument('--models', type=int, default=1, help="Models per survey (M)")
+    parser.add_argument('--tables', type=int, default=3)
+    parser.add_argument('--items', type=int, default=5, help="Items per table")
+    parser.add_argument('--paths', nargs='+', choices=['engine', 'batch'], default=['engine', 'batch'])
+    parser.add_argument('--mode', default='full')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--stream', action='store_true', help="Request streamed responses")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    # Mock server behaviour, see mock_llm_server.py
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--latency-sigma', type=float, default=0.3)
+    parser.add_argument('--tokens-per-second', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=0.0)
+    parser.add_argument('--truncate-rate', type=float, default=0.0)
+    parser.add_argument('--markdown-rate', type=float, default=0.0)
+    parser.add_argument('--replay', nargs='*', default=[])
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Progress output of the pipeline goes to stderr so stdout only carries the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmark(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark for the local rule engine
+Screens thousands of synthetic survey items (valid statements, double-barreled, multi-sentence,
+title case and fragments) through rule_engine, with every text distinct (cold) and as a batch
+of surveys that repeat a template's items (warm), and prints items per second as JSON:
+
+    python bench_rule_engine.py --items 1000 10000 50000
+"""
+
+import json
+import time
+import argparse
+
+from rule_engine import screen_text, screen_items, screen_survey
+
+TEMPLATES = [
+    "The staff were courteous during visit {i}.",
+    "The staff were friendly and the food was good on visit {i}.",
+    "Prices and/or portions were fair on visit {i}.",
+    "The Menu Was Easy To Read On Visit {i}.",
+    "The service was quick. The food arrived hot on visit {i}.",
+    "Timely service {i}",
+    "I would recommend the restaurant after visit {i}"
+]
+
+
+def make_items(items):
+    return [TEMPLATES[i % len(TEMPLATES)].format(i=i) for i in range(items)]
+
+
+def make_survey(items, per_table=20):
+    tables = []
+    texts = make_items(items)
+    for start in range(0, items, per_table):
+        rows = '\n'.join(f"{position}. {text}" for position, text in enumerate(texts[start:start + per_table], 1))
+        tables.append(f"Table {start // per_table + 1}: Service Quality\n{rows}")
+    return ("General Instructions:\nPlease rate each statement using the following scale:\n"
+            "4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree\n\n" + '\n\n'.join(tables))
+
+
+def best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        screen_text.cache_clear()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(item_counts, repeat, surveys):
+    results = []
+    for items in item_counts:
+        texts = make_items(items)
+        cold_seconds = best_of(lambda: screen_items(texts), repeat)
+
+        # A batch of surveys built from one template: only the first survey's items are new
+        survey_texts = make_items(max(items // surveys, 1))
+        batch_seconds = best_of(lambda: [screen_items(survey_texts) for _ in range(surveys)], repeat)
+        batch_items = len(survey_texts) * surveys
+
+        content = make_survey(items)
+        survey_seconds = best_of(lambda: screen_survey(content), repeat)
+        failed = screen_survey(content).summary()['failed_items']
+        results.append({
+            'items': items,
+            'cold_seconds': cold_seconds,
+            'cold_items_per_second': items / cold_seconds if cold_seconds else None,
+            'batch_surveys': surveys,
+            'batch_items_per_second': batch_items / batch_seconds if batch_seconds else None,
+            'survey_seconds': survey_seconds,
+            'survey_items_per_second': items / survey_seconds if survey_seconds else None,
+            'failed_items': failed
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the local rule engine")
+    parser.add_argument('--items', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--surveys', type=int, default=50, help="Surveys sharing one template in the batch run")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    print(json.dumps({'results': run_benchmark(args.items, args.repeat, args.surveys)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
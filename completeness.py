@@ -0,0 +1,110 @@
+"""
+Completeness checks for Survey Quality Checker
+Compares the items found in the extracted survey with the items a model actually analyzed and
+sends a narrow follow-up request for the ones it skipped
+"""
+
+from functools import partial
+
+from prompts import get_missing_items_prompt
+from sharding import split_survey_content, split_table_items, table_stem, item_id
+from revisions import normalize_text
+from survey_ir import SurveyItem, match_survey_items
+
+
+def _shard_items(shards):
+    items = []
+    for shard in shards.tables:
+        for position, text in enumerate(split_table_items(shard.text), 1):
+            items.append({'table_number': str(shard.number), 'item_number': str(position), 'question_text': text})
+    return items
+
+
+def expected_items(file_content):
+    """Return every item of the survey's tables as {'table_number', 'item_number', 'question_text'}"""
+    return _shard_items(split_survey_content(file_content))
+
+
+def find_missing_items(expected, analyzed_items):
+    """
+    Return the expected items that no analyzed item refers to. Analyzed items are matched one to
+    one like survey_ir.match_survey_items does: by question ID, then by text, and only then by
+    (table, item) number, so renumbered items are not reported (and re-requested) as missing
+    """
+    survey_items = [SurveyItem(item_id(item), item['table_number'], item['item_number'], item['question_text'])
+                    for item in expected]
+    matched = {survey_item.id for survey_item in match_survey_items(survey_items, analyzed_items) if survey_item}
+    return [item for item, survey_item in zip(expected, survey_items) if survey_item.id not in matched]
+
+
+def _number_key(value):
+    value = str(value).strip()
+    return (0, int(value), '') if value.isdigit() else (1, 0, value.lower())
+
+
+def _requested_item(table_missing, returned):
+    number = str(returned.get('item_number', '')).strip()
+    text = normalize_text(returned.get('question_text', ''))
+    return (next((item for item in table_missing if item['item_number'] == number), None)
+            or next((item for item in table_missing if normalize_text(item['question_text']) == text), None))
+
+
+def _answered_item(requested, returned):
+    item = dict(returned, table_number=requested['table_number'], item_number=requested['item_number'])
+    item.setdefault('question_text', requested['question_text'])
+    return item
+
+
+def follow_up_item(table_missing, returned):
+    """Return an item of a follow-up answer numbered as the missing item it answers, or None"""
+    requested = _requested_item(table_missing, returned)
+    return _answered_item(requested, returned) if requested is not None else None
+
+
+def completeness_pipeline(file_content, model, analysis):
+    """
+    Pipeline step (see app.file_analysis_pipeline) that checks a model's analysis against the
+    items of the survey and re-requests only the missing ones, one request per table with just
+    the table's stem and the survey context. The answers are merged into the analysis and the
+    outcome is recorded in analysis['completeness'].
+    """
+    if not isinstance(analysis, dict):
+        return
+    shards = split_survey_content(file_content)
+    expected = _shard_items(shards)
+    if not expected:
+        return
+
+    items = analysis.setdefault('individual_question_analysis', [])
+    missing = find_missing_items(expected, items)
+    report = {'expected_items': len(expected), 'missing_items': len(missing), 'recovered_items': 0, 'still_missing': []}
+    analysis['completeness'] = report
+    if not missing or not model.get('follow_up_missing', True):
+        report['still_missing'] = missing
+        return
+
+    missing_by_table = {}
+    for item in missing:
+        missing_by_table.setdefault(item['table_number'], []).append(item)
+    shards_by_number = {str(shard.number): shard for shard in shards.tables}
+    calls = [{'file_content': file_content, 'model': model, 'messages': get_missing_items_prompt(
+        shards.preamble, table_stem(shards_by_number[number].text), number,
+        [(item['item_number'], item['question_text']) for item in table_missing]),
+        'map_item': partial(follow_up_item, table_missing)}
+        for number, table_missing in missing_by_table.items()]
+
+    answers = yield calls
+
+    for table_missing, answer in zip(missing_by_table.values(), answers):
+        answered = set()
+        for returned in answer.get('individual_question_analysis', []):
+            requested = _requested_item(table_missing, returned)
+            if requested is None or id(requested) in answered:
+                continue
+            answered.add(id(requested))
+            items.append(_answered_item(requested, returned))
+            report['recovered_items'] += 1
+
+    if report['recovered_items']:
+        items.sort(key=lambda item: (_number_key(item.get('table_number', '')), _number_key(item.get('item_number', ''))))
+    report['still_missing'] = find_missing_items(missing, items)
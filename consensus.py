@@ -0,0 +1,65 @@
+"""
+Multi-model consensus for Survey Quality Checker
+Merges the question analyses of several AI models into one record per item, keyed by
+(table_number, item_number), with a weighted majority verdict and every model's verdict kept
+"""
+
+
+def item_key(item):
+    """Return the (table_number, item_number) key of an analyzed item"""
+    return (str(item.get('table_number', '')).strip(), str(item.get('item_number', '')).strip())
+
+
+def is_valid(validity):
+    return str(validity or '').strip().lower() == 'valid'
+
+
+def consensus_items(models, analyses):
+    """
+    Return one question analysis per item across all models' analyses.
+    Each model's vote counts model['weight'] (default 1.0, must be positive); ties are resolved as Not Valid so
+    disagreement is surfaced for review. The reason comes from the first model that agrees with
+    the consensus and model_verdicts records what every model said. A single model's items are
+    returned unchanged.
+    """
+    if len(models) == 1:
+        return list(analyses[0].get('individual_question_analysis', []))
+
+    # With positive weights the winning side always has a model that voted for it
+    for model in models:
+        if not model.get('weight', 1.0) > 0:
+            raise ValueError(f"Model weight must be positive, got {model.get('weight')!r} for {model['name']}")
+
+    records = {}
+    for model, analysis in zip(models, analyses):
+        for item in analysis.get('individual_question_analysis', []):
+            key = item_key(item)
+            if key not in records:
+                records[key] = {'items': [], 'verdicts': []}
+            records[key]['items'].append((model, item))
+            records[key]['verdicts'].append({
+                'model_name': model['name'],
+                'validity': item.get('validity', ''),
+                'reason': item.get('reason', '')
+            })
+
+    merged = []
+    for record in records.values():
+        valid_weight = sum(model.get('weight', 1.0) for model, item in record['items'] if is_valid(item.get('validity')))
+        invalid_weight = sum(model.get('weight', 1.0) for model, item in record['items'] if not is_valid(item.get('validity')))
+        consensus_valid = valid_weight > invalid_weight
+
+        agreeing = next(item for model, item in record['items'] if is_valid(item.get('validity')) == consensus_valid)
+        consensus = dict(agreeing)
+
+        duplicates = {}
+        for model, item in record['items']:
+            for duplicate in item.get('duplicates_with') or []:
+                duplicates.setdefault(item_key(duplicate), duplicate)
+        if duplicates:
+            consensus['duplicates_with'] = list(duplicates.values())
+
+        consensus['model_verdicts'] = record['verdicts']
+        merged.append(consensus)
+
+    return merged
@@ -0,0 +1,166 @@
+"""
+Batch dashboard for Survey Quality Checker
+Flattens every loaded analysis result into one item table of NumPy arrays (file, variable and
+table codes, validity, a criterion matrix, model agreement) and computes the batch aggregates
+with vectorized group counts: per-file quality scores, per-criterion failure rates, per-variable
+and per-table breakdowns and model agreement. The aggregates are cached until the loaded results
+change, so reruns with thousands of files only compare object identities.
+"""
+
+from threading import Lock
+from dataclasses import dataclass
+
+import numpy as np
+
+from item_export import violated_criteria
+
+# Agreement codes: items analyzed by one model have nothing to compare
+NOT_COMPARED, DISAGREE, AGREE = -1, 0, 1
+
+
+@dataclass(slots=True)
+class ItemTable:
+    """One entry per analyzed item across all results; *_codes index into the name lists"""
+    files: list
+    file_codes: np.ndarray
+    variables: list
+    variable_codes: np.ndarray
+    tables: list
+    table_codes: np.ndarray
+    valid: np.ndarray
+    not_valid: np.ndarray
+    criteria: np.ndarray        # (items, highest criterion + 1) bool, column n is CRITERIA n
+    agreement: np.ndarray
+
+    def __len__(self):
+        return len(self.file_codes)
+
+
+def _code(codes, name):
+    return codes.setdefault(name, len(codes))
+
+
+def build_item_table(results):
+    """Flatten results (dicts with filename and analysis) into an ItemTable"""
+    variables, tables = {}, {}
+    file_codes, variable_codes, table_codes, validity, cited, agreement = [], [], [], [], [], []
+    for file_code, result in enumerate(results):
+        for item in result['analysis'].get('individual_question_analysis', []):
+            file_codes.append(file_code)
+            variable_codes.append(_code(variables, item.get('variable_name') or 'N/A'))
+            table_codes.append(_code(tables, str(item.get('table_number') or 'N/A')))
+            validity.append(item.get('validity', ''))
+            cited.append(violated_criteria(item.get('reason')))
+            verdicts = item.get('model_verdicts') or []
+            agreement.append(NOT_COMPARED if not verdicts else
+                             AGREE if len({verdict['validity'] for verdict in verdicts}) == 1 else DISAGREE)
+
+    validity = np.array(validity, dtype=object)
+    # Criterion matrix filled with one fancy-indexed assignment
+    rows = np.repeat(np.arange(len(cited)), [len(numbers) for numbers in cited])
+    columns = np.fromiter((number for numbers in cited for number in numbers), dtype=np.int64, count=len(rows))
+    criteria = np.zeros((len(cited), int(columns.max()) + 1 if len(columns) else 0), dtype=bool)
+    criteria[rows, columns] = True
+    # Valid reasons can cite criteria they meet, only Not Valid items count as failures
+    not_valid = validity == 'Not Valid'
+    criteria &= not_valid[:, None]
+    return ItemTable(
+        files=[result['filename'] for result in results],
+        file_codes=np.array(file_codes, dtype=np.int64),
+        variables=list(variables),
+        variable_codes=np.array(variable_codes, dtype=np.int64),
+        tables=list(tables),
+        table_codes=np.array(table_codes, dtype=np.int64),
+        valid=validity == 'Valid',
+        not_valid=not_valid,
+        criteria=criteria,
+        agreement=np.array(agreement, dtype=np.int8)
+    )
+
+
+def _rate(numerator, denominator, scale=100.0):
+    """Elementwise numerator / denominator * scale, NaN where the denominator is zero"""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.divide(numerator * scale, denominator, out=np.full_like(numerator, np.nan), where=denominator > 0)
+
+
+def group_counts(codes, size, table):
+    """Return items, valid, not_valid, compared and agreeing counts per code"""
+    compared = table.agreement != NOT_COMPARED
+    return (np.bincount(codes, minlength=size),
+            np.bincount(codes, weights=table.valid, minlength=size).astype(np.int64),
+            np.bincount(codes, weights=table.not_valid, minlength=size).astype(np.int64),
+            np.bincount(codes, weights=compared, minlength=size).astype(np.int64),
+            np.bincount(codes, weights=table.agreement == AGREE, minlength=size).astype(np.int64))
+
+
+class BatchDashboard:
+    """Aggregates of an ItemTable, as column dicts ready for st.dataframe"""
+
+    def __init__(self, table):
+        self.table = table
+        self.file_scores = self._breakdown('file', table.files, table.file_codes, score=True)
+        self.variable_breakdown = self._breakdown('variable_name', table.variables, table.variable_codes)
+        self.table_breakdown = self._breakdown('table_number', table.tables, table.table_codes)
+        self.criteria_rates = self._criteria_rates()
+
+        compared = int(np.count_nonzero(table.agreement != NOT_COMPARED))
+        valid = int(np.count_nonzero(table.valid))
+        self.totals = {
+            'files': len(table.files),
+            'items': len(table),
+            'valid': valid,
+            'not_valid': int(np.count_nonzero(table.not_valid)),
+            # Same as the report's Question Quality Score, over every item of the batch
+            'score': valid / len(table) * 100 if len(table) else 0.0,
+            'compared_items': compared,
+            'model_agreement': np.count_nonzero(table.agreement == AGREE) / compared * 100 if compared else None
+        }
+
+    def _breakdown(self, name_column, names, codes, score=False):
+        items, valid, not_valid, compared, agreeing = group_counts(codes, len(names), self.table)
+        columns = {name_column: list(names), 'items': items, 'valid': valid, 'not_valid': not_valid}
+        if score:
+            # Files without items score 0, as in their report
+            columns['score'] = np.nan_to_num(_rate(valid, items))
+        else:
+            columns['invalid_rate'] = _rate(not_valid, items)
+        columns['model_agreement'] = _rate(agreeing, compared)
+        return columns
+
+    def _criteria_rates(self):
+        failures = self.table.criteria.sum(axis=0)
+        cited = np.flatnonzero(failures)
+        invalid = np.count_nonzero(self.table.not_valid)
+        return {
+            'criterion': [f"CRITERIA {number}" for number in cited],
+            'failures': failures[cited],
+            'files': np.array([len(np.unique(self.table.file_codes[self.table.criteria[:, number]])) for number in cited],
+                              dtype=np.int64),
+            'rate_of_items': _rate(failures[cited], np.full(len(cited), len(self.table))),
+            'rate_of_invalid': _rate(failures[cited], np.full(len(cited), invalid))
+        }
+
+
+_dashboard = None
+_dashboard_analyses = ()
+_dashboard_lock = Lock()
+
+
+def get_batch_dashboard(results):
+    """
+    Return the BatchDashboard of results, reusing the last one while the same analysis objects
+    are loaded (analyses are not modified once they are results)
+    """
+    global _dashboard, _dashboard_analyses
+    analyses = tuple(result['analysis'] for result in results)
+    with _dashboard_lock:
+        if _dashboard is not None and len(analyses) == len(_dashboard_analyses) and \
+                all(a is b for a, b in zip(analyses, _dashboard_analyses)) and \
+                [result['filename'] for result in results] == _dashboard.table.files:
+            return _dashboard
+    dashboard = BatchDashboard(build_item_table(results))
+    with _dashboard_lock:
+        _dashboard, _dashboard_analyses = dashboard, analyses
+    return dashboard
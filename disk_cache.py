@@ -0,0 +1,114 @@
+"""
+On-disk cache tier for Survey Quality Checker
+One JSON file per entry, written atomically through a unique temporary file, with age, entry
+count and byte limits enforced by removing the least recently used files. The response and
+extraction caches build on it.
+"""
+
+import os
+import json
+import time
+import tempfile
+from threading import Lock
+
+
+class DiskCache:
+    """Base class for caches that store one JSON entry file per key in cache_dir"""
+
+    def __init__(self, cache_dir, max_entries, max_bytes, max_age_seconds):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.misses = 0
+        self.evictions = 0
+        self._lock = Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key, fields):
+        """Return the entry stored for a key if it is fresh and has fields, else count a miss and return None"""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                os.remove(path)
+                with self._lock:
+                    self.misses += 1
+                    self.evictions += 1
+                return None
+
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if not all(field in entry for field in fields):
+                raise KeyError(fields)
+
+            # Touch the entry so eviction removes the least recently used files first
+            os.utime(path, None)
+            return entry
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+    def _store(self, key, entry):
+        """Write an entry for a key and evict old entries if over the limits"""
+        # A unique temporary file per write, so concurrent writers of one key (threads or processes)
+        # never share it; the atomic rename means readers never see a partially written entry
+        fd, temp_path = tempfile.mkstemp(prefix=f"{key}.", suffix='.tmp', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for dir_entry in os.scandir(self.cache_dir):
+            if dir_entry.is_file() and dir_entry.name.endswith('.json'):
+                stat = dir_entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        return entries
+
+    def evict(self):
+        """Remove expired entries, then the least recently used ones until within size limits"""
+        now = time.time()
+        with self._lock:
+            entries = []
+            for mtime, size, path in self._entries():
+                if now - mtime > self.max_age_seconds:
+                    self._remove(path)
+                else:
+                    entries.append((mtime, size, path))
+
+            entries.sort()
+            total_bytes = sum(size for _, size, _ in entries)
+            while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+                _, size, path = entries.pop(0)
+                self._remove(path)
+                total_bytes -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            self.evictions += 1
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Delete every entry on disk"""
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+
+    def disk_stats(self):
+        """Return the number of entries on disk and their total size in bytes"""
+        entries = self._entries()
+        return {'entries': len(entries), 'bytes': sum(size for _, size, _ in entries)}
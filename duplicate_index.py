@@ -0,0 +1,215 @@
+"""
+Near-duplicate index for Survey Quality Checker
+Finds items with nearly identical wording (criterion 1) locally instead of asking the model to
+compare every item with every other one. Item texts are normalized to content-word sets,
+MinHash signatures are computed for all of them at once with NumPy, locality-sensitive hashing
+over signature bands proposes candidate pairs and the candidates are scored by their Jaccard
+similarity. The index covers one survey or every item of a batch of surveys.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from revisions import normalize_text
+
+# Pairs at or above this Jaccard similarity are recorded in duplicates_with
+DUPLICATE_THRESHOLD = 0.8
+# Pairs at or above this similarity are passed to the model as hints to check
+HINT_THRESHOLD = 0.5
+# 64 hash functions in 16 bands of 4: pairs near 0.5 similarity become candidates about half the time
+NUM_PERM = 64
+BANDS = 16
+# Items whose signatures, and candidate pairs whose estimates, are computed in one vectorized step
+# (bounds the temporary arrays)
+SIGNATURE_BLOCK = 4096
+SCORE_BLOCK = 262144
+# Band buckets with more texts than this hold items that only share common words; they are skipped
+# (true near-duplicates also share other bands)
+MAX_BUCKET_SIZE = 64
+# Candidates whose estimated similarity is this far below the threshold are not scored exactly
+ESTIMATE_MARGIN = 0.25
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32, so hashes fit uint64 arithmetic
+_BAND_MULTIPLIER = np.uint64(1000003)
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'at', 'for', 'with', 'by', 'from', 'is', 'are',
+             'was', 'were', 'be', 'been', 'am', 'i', 'my', 'me', 'we', 'our', 'us', 'it', 'its', 'this', 'that',
+             'very', 'all', 'do', 'does', 'did', 'has', 'have', 'had', 'their', 'they', 'them'}
+SUFFIXES = ('ingly', 'edly', 'ing', 'ly', 'ed', 's')
+
+
+def _stem(token):
+    """Strip common inflections so "serve", "served", "serves" and "serving" share one shingle"""
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and not token.endswith('ss') and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    return token[:-1] if token.endswith('e') and len(token) > 3 else token
+
+
+def shingles(text):
+    """Return the set of stemmed content words of an item text (the whole text if it has none)"""
+    normalized = normalize_text(text)
+    words = {_stem(token) for token in TOKEN.findall(normalized) if token not in STOPWORDS}
+    return frozenset(words or {normalized})
+
+
+@lru_cache(maxsize=MAX_BUCKET_SIZE)
+def _pair_indices(size):
+    return np.triu_indices(size, 1)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class DuplicateIndex:
+    """
+    MinHash/LSH index of item texts. Keys are any hashable item identifiers (item IDs within a
+    survey, (filename, item ID) across a batch); identical texts are stored once.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        generator = np.random.default_rng(seed)
+        self.bands = bands
+        self._a = generator.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._keys = []            # keys per distinct text
+        self._sets = []            # shingle set per distinct text
+        self._text_index = {}      # shingle set -> distinct text position
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._pending = 0          # distinct texts added since the last signature update
+
+    def __len__(self):
+        return sum(len(keys) for keys in self._keys)
+
+    def add(self, key, text):
+        """Add one item"""
+        words = shingles(text)
+        position = self._text_index.get(words)
+        if position is None:
+            position = self._text_index[words] = len(self._sets)
+            self._sets.append(words)
+            self._keys.append([])
+            self._pending += 1
+        self._keys[position].append(key)
+
+    def add_many(self, items):
+        """Add (key, text) pairs"""
+        for key, text in items:
+            self.add(key, text)
+
+    def _update_signatures(self):
+        if not self._pending:
+            return
+        new_sets = self._sets[len(self._sets) - self._pending:]
+        blocks = [self._signatures]
+        for start in range(0, len(new_sets), SIGNATURE_BLOCK):
+            block = new_sets[start:start + SIGNATURE_BLOCK]
+            hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for words in block for word in words),
+                                 dtype=np.uint64)
+            offsets = np.cumsum([0] + [len(words) for words in block[:-1]])
+            # (a * x + b) mod p for every hash function and shingle, then the minimum per item
+            permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+            blocks.append(np.minimum.reduceat(permuted, offsets, axis=1).T.astype(np.uint32))
+        self._signatures = np.concatenate(blocks)
+        self._pending = 0
+
+    def _candidate_texts(self):
+        """Return (i, j) arrays of distinct texts that share at least one signature band"""
+        self._update_signatures()
+        count = len(self._sets)
+        if count < 2:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        rows = self._signatures.shape[1] // self.bands
+        codes = []
+        for band in range(self.bands):
+            # One 64-bit key per band; a rare collision only adds a candidate that scoring rejects
+            key = np.zeros(count, dtype=np.uint64)
+            for column in self._signatures[:, band * rows:(band + 1) * rows].T:
+                key = key * _BAND_MULTIPLIER ^ column
+            order = np.argsort(key, kind='stable')
+            sorted_keys = key[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            sizes = np.diff(np.r_[starts, count])
+            shared = (sizes > 1) & (sizes <= MAX_BUCKET_SIZE)
+            for start, size in zip(starts[shared].tolist(), sizes[shared].tolist()):
+                members = np.sort(order[start:start + size])
+                first, second = _pair_indices(size)
+                codes.append(members[first] * count + members[second])
+        if not codes:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.divmod(np.unique(np.concatenate(codes)), count)
+
+    def similar_texts(self, threshold=HINT_THRESHOLD):
+        """Return (i, j, similarity) for distinct texts at or above threshold"""
+        first, second = self._candidate_texts()
+        result = []
+        for start in range(0, len(first), SCORE_BLOCK):
+            block_first, block_second = first[start:start + SCORE_BLOCK], second[start:start + SCORE_BLOCK]
+            # Signature agreement estimates the similarity of a whole block at once; only likely pairs are scored exactly
+            estimate = (self._signatures[block_first] == self._signatures[block_second]).mean(axis=1)
+            likely = np.flatnonzero(estimate >= threshold - ESTIMATE_MARGIN)
+            for i, j in zip(block_first[likely].tolist(), block_second[likely].tolist()):
+                similarity = jaccard(self._sets[i], self._sets[j])
+                if similarity >= threshold:
+                    result.append((i, j, similarity))
+        return result
+
+    def pairs(self, threshold=HINT_THRESHOLD):
+        """Return (key_a, key_b, similarity) for every pair of near-duplicate items, most similar first"""
+        result = []
+        for keys in self._keys:
+            result.extend((keys[x], keys[y], 1.0) for x in range(len(keys)) for y in range(x + 1, len(keys)))
+        for i, j, similarity in self.similar_texts(threshold):
+            result.extend((key_a, key_b, similarity) for key_a in self._keys[i] for key_b in self._keys[j])
+        result.sort(key=lambda pair: -pair[2])
+        return result
+
+    def groups(self, threshold=DUPLICATE_THRESHOLD):
+        """Return groups (lists of keys, in insertion order) of items that are near-duplicates of each other"""
+        parent = list(range(len(self._sets)))
+
+        def find(position):
+            while parent[position] != position:
+                parent[position] = parent[parent[position]]
+                position = parent[position]
+            return position
+
+        for i, j, _ in self.similar_texts(threshold):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        members = {}
+        for position, keys in enumerate(self._keys):
+            members.setdefault(find(position), []).extend(keys)
+        return [keys for root, keys in sorted(members.items()) if len(keys) > 1]
+
+
+def survey_duplicate_pairs(survey, threshold=HINT_THRESHOLD):
+    """Return (item_id, item_id, similarity) for the near-duplicate items of a survey_ir.SurveyIR"""
+    index = DuplicateIndex()
+    index.add_many((item.id, item.text) for item in survey.items())
+    return index.pairs(threshold)
+
+
+def duplicate_groups(pairs, order, threshold=DUPLICATE_THRESHOLD):
+    """
+    Return the groups of keys linked by pairs at or above threshold, each sorted by its position
+    in order (the first key is the original), for sharding.apply_duplicate_groups
+    """
+    positions = {key: position for position, key in enumerate(order)}
+    groups = []
+    for key_a, key_b, similarity in pairs:
+        if similarity < threshold:
+            continue
+        found = [group for group in groups if key_a in group or key_b in group]
+        merged = {key for group in found for key in group} | {key_a, key_b}
+        groups = [group for group in groups if group not in found] + [merged]
+    return sorted((sorted(group, key=positions.get) for group in groups), key=lambda group: positions[group[0]])
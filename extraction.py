@@ -0,0 +1,348 @@
+"""
+Text extraction for Survey Quality Checker
+Every file type is read as a generator of text fragments (a page, paragraph, table row or
+chunk of text) that are collected by ExtractionBuffer into one string, spilling to a
+temporary file past a size threshold so large uploads are never held as many copies.
+Large PDFs are split into page ranges that are extracted in parallel worker processes, each
+opening the document from the uploaded bytes, and reassembled in page order. Table detection
+only runs on pages that have ruling lines or grid-like text.
+"""
+
+import io
+import os
+import csv
+import json
+import math
+import zipfile
+import tempfile
+import multiprocessing
+import concurrent.futures
+from threading import Lock
+
+from lxml import etree
+
+# Bump whenever the extracted text changes so cached extractions from older extractors are not reused
+EXTRACTOR_VERSION = "1"
+
+# Largest extracted text accepted (characters), beyond which extraction fails
+MAX_EXTRACTED_CHARS = int(os.environ.get('SQ_CHECKER_MAX_EXTRACTED_CHARS', 256 * 1024 * 1024))
+# Extracted text larger than this is buffered in a temporary file instead of memory
+SPILL_CHARS = int(os.environ.get('SQ_CHECKER_SPILL_CHARS', 16 * 1024 * 1024))
+# Fragments are coalesced into chunks of about this size before being buffered
+CHUNK_CHARS = 1024 * 1024
+
+# WordprocessingML elements read by the DOCX extractor
+W_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_BODY, W_P, W_TBL, W_TR, W_TC, W_TCPR, W_VMERGE, W_VAL = (W_NAMESPACE + tag for tag in (
+    'body', 'p', 'tbl', 'tr', 'tc', 'tcPr', 'vMerge', 'val'))
+W_T, W_TAB, W_BR, W_CR, W_SDT_CONTENT = (W_NAMESPACE + tag for tag in ('t', 'tab', 'br', 'cr', 'sdtContent'))
+OFFICE_DOCUMENT_RELATIONSHIP = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+# PDFs with fewer pages are extracted in the calling process (starting workers costs more)
+PDF_PARALLEL_MIN_PAGES = 16
+# Smallest page range handed to one worker
+PDF_MIN_SHARD_PAGES = 4
+MAX_PDF_WORKERS = os.cpu_count() or 1
+
+# Horizontal gap (points) between two words that separates table columns
+COLUMN_GAP = 15
+# Lines with at least two column gaps a page needs before text-based table detection runs
+GRID_MIN_LINES = 3
+# Words whose baselines are this close (points) are on the same row
+BASELINE_TOLERANCE = 3
+
+_pdf_executor = None
+_pdf_executor_lock = Lock()
+
+
+def get_pdf_executor():
+    """Return the shared process pool for PDF extraction"""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            _pdf_executor = concurrent.futures.ProcessPoolExecutor(max_workers=MAX_PDF_WORKERS)
+        return _pdf_executor
+
+
+def page_has_ruling_lines(page):
+    """Whether the page draws any lines or rectangles, which table detection needs to find a table"""
+    return any(item[0] in ('l', 're', 'qu') for drawing in page.get_cdrawings() for item in drawing['items'])
+
+
+def page_has_grid_text(page):
+    """Whether the page has several text lines split into columns by wide gaps"""
+    # Group words by baseline rather than by text line: cells of one row are often separate text lines
+    lines = {}
+    for x0, y0, x1, y1, *_ in page.get_text("words"):
+        lines.setdefault(round(y1 / BASELINE_TOLERANCE), []).append((x0, x1))
+    columnar = 0
+    for words in lines.values():
+        words.sort()
+        gaps = sum(1 for (_, end), (start, _) in zip(words, words[1:]) if start - end > COLUMN_GAP)
+        if gaps >= 2:
+            columnar += 1
+            if columnar >= GRID_MIN_LINES:
+                return True
+    return False
+
+
+def find_page_tables(page):
+    """Return the page's tables, skipping detection on pages that cannot contain one"""
+    if page_has_ruling_lines(page):
+        return page.find_tables().tables
+    if page_has_grid_text(page):
+        return page.find_tables(strategy="text").tables
+    return []
+
+
+def extract_pdf_page(page):
+    """Return the text of one page followed by its tables, one ' | '-separated row per line"""
+    parts = [page.get_text(), "\n"]
+    try:
+        for i, table in enumerate(find_page_tables(page)):
+            parts.append(f"\nTable {i+1}:\n")
+            for row in table.extract():
+                parts.append(" | ".join((cell or '').strip() for cell in row) + "\n")
+            parts.append("\n")
+    except Exception:
+        # If table extraction fails, continue with just text
+        pass
+    return ''.join(parts)
+
+
+def extract_pdf_pages(pdf_bytes, start, stop):
+    """Extract pages [start, stop) of a PDF given as bytes (runs in a worker process)"""
+    import fitz  # PyMuPDF for PDF processing
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf_document:
+        return [extract_pdf_page(pdf_document.load_page(page_num)) for page_num in range(start, stop)]
+
+
+def page_ranges(page_count, workers):
+    """Split page_count pages into contiguous (start, stop) ranges, about one per worker"""
+    size = max(PDF_MIN_SHARD_PAGES, math.ceil(page_count / max(1, workers)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def iter_pdf_fragments(pdf_bytes, executor=None, workers=MAX_PDF_WORKERS):
+    """
+    Yield the text and tables of a PDF one page at a time, in page order.
+    Page ranges are extracted in parallel by executor (default: the shared process pool, which
+    has MAX_PDF_WORKERS processes) when the document is large and workers, the number of
+    processes executor runs, is more than one. Inside a worker process, e.g. the batch CLI's
+    extraction pool, pages are extracted serially.
+    """
+    import fitz  # PyMuPDF for PDF processing
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf_document:
+        page_count = pdf_document.page_count
+        parallel = (page_count >= PDF_PARALLEL_MIN_PAGES and workers > 1
+                    and (executor is not None or multiprocessing.parent_process() is None))
+        if not parallel:
+            for page_num in range(page_count):
+                yield extract_pdf_page(pdf_document.load_page(page_num))
+            return
+
+    executor = executor or get_pdf_executor()
+    futures = [executor.submit(extract_pdf_pages, pdf_bytes, start, stop) for start, stop in page_ranges(page_count, workers)]
+    for future in futures:
+        yield from future.result()
+
+
+def extract_pdf_text(pdf_bytes, executor=None, workers=MAX_PDF_WORKERS):
+    """Return the text and tables of a PDF in page order (see iter_pdf_fragments)"""
+    return ''.join(iter_pdf_fragments(pdf_bytes, executor, workers))
+
+
+def open_upload(uploaded_file):
+    """Return a binary file object for an upload; files on disk are read as they are consumed"""
+    if hasattr(uploaded_file, 'open'):
+        return uploaded_file.open()
+    # BytesIO shares the bytes returned by getvalue() instead of copying them
+    return io.BytesIO(uploaded_file.getvalue())
+
+
+def iter_text_fragments(uploaded_file):
+    """Yield a TXT upload as decoded chunks"""
+    with io.TextIOWrapper(open_upload(uploaded_file), encoding='utf-8', newline='') as text:
+        yield from iter(lambda: text.read(CHUNK_CHARS), '')
+
+
+def iter_json_fragments(uploaded_file):
+    """Yield a JSON upload re-serialized with indentation, as the encoder produces it"""
+    with io.TextIOWrapper(open_upload(uploaded_file), encoding='utf-8') as text:
+        json_data = json.load(text)
+    yield from json.JSONEncoder(indent=2).iterencode(json_data)
+
+
+def iter_csv_fragments(uploaded_file):
+    """Yield a CSV upload one comma-joined row at a time"""
+    with io.TextIOWrapper(open_upload(uploaded_file), encoding='utf-8', newline='') as text:
+        for index, row in enumerate(csv.reader(text)):
+            yield ('\n' if index else '') + ','.join(row)
+
+
+def docx_document_part(package):
+    """Return the name of the main document part of an opened DOCX zip"""
+    relationships = etree.fromstring(package.read('_rels/.rels'))
+    for relationship in relationships:
+        if relationship.get('Type') == OFFICE_DOCUMENT_RELATIONSHIP:
+            return relationship.get('Target').lstrip('/')
+    return 'word/document.xml'
+
+
+def docx_paragraph_text(paragraph):
+    """Return the text of a w:p element: its runs' text, with tabs and breaks"""
+    parts = []
+    for node in paragraph.iter(W_T, W_TAB, W_BR, W_CR):
+        if node.tag == W_T:
+            parts.append(node.text or '')
+        elif node.tag == W_TAB:
+            parts.append('\t')
+        else:
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def docx_table_rows(table):
+    """
+    Yield the cell texts of each row of a w:tbl element. A cell spanning several grid columns
+    appears once and cells continuing a vertical merge are empty, instead of repeating the
+    merged cell's text as python-docx's row.cells does.
+    """
+    for row in table.iterchildren(W_TR):
+        cells = []
+        for cell in row.iterchildren(W_TC):
+            properties = cell.find(W_TCPR)
+            merge = properties.find(W_VMERGE) if properties is not None else None
+            if merge is not None and merge.get(W_VAL, 'continue') == 'continue':
+                cells.append('')
+            else:
+                texts = (docx_paragraph_text(paragraph).strip() for paragraph in cell.iterchildren(W_P))
+                cells.append(' '.join(text for text in texts if text))
+        yield cells
+
+
+def iter_docx_fragments(uploaded_file):
+    """
+    Yield the non-empty paragraphs and the tables of a DOCX upload in document order, so each
+    table follows the variable heading above it. Table rows are written as '| '-delimited
+    lines directly below the preceding paragraph and end with a blank line. The document body
+    XML is parsed once, incrementally, and every element is released once written.
+    """
+    with open_upload(uploaded_file) as f, zipfile.ZipFile(f) as package:
+        with package.open(docx_document_part(package)) as document_xml:
+            pending_break = False
+            for event, element in etree.iterparse(document_xml, events=('end',), tag=(W_P, W_TBL)):
+                container = element.getparent()
+                # Content controls wrap body paragraphs and tables in w:sdt/w:sdtContent
+                parent = container.getparent().getparent() if container.tag == W_SDT_CONTENT else container
+                if parent is None or parent.tag != W_BODY:
+                    # Paragraphs and tables inside a table are written with their top-level table
+                    continue
+
+                if element.tag == W_P:
+                    # Images are ignored, only text runs are read
+                    text = docx_paragraph_text(element)
+                    if text.strip():
+                        yield ('\n' if pending_break else '') + text
+                        pending_break = True
+                else:
+                    for cells in docx_table_rows(element):
+                        yield ('\n' if pending_break else '') + '| ' + ' | '.join(cells) + ' |'
+                        pending_break = True
+                    # Blank line after each table so each table can be analyzed on its own
+                    yield '\n'
+
+                element.clear()
+                while element.getprevious() is not None:
+                    del container[0]
+
+
+def iter_upload_fragments(uploaded_file):
+    """Return the fragment generator for an upload's file type, or None if the type is not supported"""
+    file_extension = uploaded_file.name.split('.')[-1].lower()
+    if file_extension == 'txt':
+        return iter_text_fragments(uploaded_file)
+    if file_extension == 'json':
+        return iter_json_fragments(uploaded_file)
+    if file_extension == 'csv':
+        return iter_csv_fragments(uploaded_file)
+    if file_extension == 'docx':
+        return iter_docx_fragments(uploaded_file)
+    if file_extension == 'pdf':
+        return iter_pdf_fragments(uploaded_file.getvalue())
+    return None
+
+
+class ExtractionLimitError(ValueError):
+    """Raised when extracted text exceeds the configured maximum size"""
+
+
+class ExtractionBuffer:
+    """
+    Collects text fragments into one string. Fragments are coalesced into chunks; once more
+    than spill_chars characters are buffered, chunks go to a temporary file so only the final
+    string is held in memory. Raises ExtractionLimitError past max_chars.
+    """
+
+    def __init__(self, max_chars=None, spill_chars=None):
+        self.max_chars = MAX_EXTRACTED_CHARS if max_chars is None else max_chars
+        self.spill_chars = SPILL_CHARS if spill_chars is None else spill_chars
+        self.chars = 0
+        self.bytes = 0
+        self.fragments = 0
+        self._pending = []
+        self._pending_chars = 0
+        self._chunks = []
+        self._spill_file = None
+
+    def write(self, fragment):
+        self.fragments += 1
+        self._pending.append(fragment)
+        self._pending_chars += len(fragment)
+        if self._pending_chars >= CHUNK_CHARS:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        chunk = ''.join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+        self.chars += len(chunk)
+        self.bytes += len(chunk.encode('utf-8'))
+        if self.chars > self.max_chars:
+            raise ExtractionLimitError(f"Extracted text exceeds {self.max_chars} characters")
+        if self._spill_file is None and self.chars > self.spill_chars:
+            self._spill_file = tempfile.TemporaryFile(mode='w+', encoding='utf-8', newline='')
+            self._spill_file.writelines(self._chunks)
+            self._chunks = []
+        if self._spill_file is not None:
+            self._spill_file.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def getvalue(self):
+        """Return the collected text and release the buffer"""
+        self._flush()
+        if self._spill_file is None:
+            content = ''.join(self._chunks)
+            self._chunks = []
+            return content
+        with self._spill_file:
+            self._spill_file.seek(0)
+            return self._spill_file.read()
+
+    def stats(self):
+        return {'extracted_chars': self.chars, 'extracted_bytes': self.bytes, 'fragments': self.fragments,
+                'spilled': self._spill_file is not None}
+
+
+def collect_fragments(fragments, max_chars=None, spill_chars=None):
+    """Drain a fragment generator into one string; returns (content, stats)"""
+    buffer = ExtractionBuffer(max_chars, spill_chars)
+    for fragment in fragments:
+        buffer.write(fragment)
+    content = buffer.getvalue()
+    return content, buffer.stats()
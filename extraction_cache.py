@@ -0,0 +1,126 @@
+"""
+Extraction cache for Survey Quality Checker
+Keeps the text extracted from uploaded files, keyed by a SHA-256 of the file bytes, file type
+and extractor version, in an in-memory LRU tier backed by an on-disk tier, so Streamlit reruns,
+other sessions and repeat analyses of the same upload skip extraction entirely
+"""
+
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+
+from extraction import EXTRACTOR_VERSION, open_upload
+from disk_cache import DiskCache
+
+# Default cache location and limits (override the directory with SQ_CHECKER_CACHE_DIR)
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('SQ_CHECKER_CACHE_DIR', '.cache'), 'extractions')
+DEFAULT_MAX_MEMORY_BYTES = 64 * 1024 * 1024  # 64 MB
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024  # 500 MB
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 60 * 60  # 30 days
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def make_extraction_key(uploaded_file, extractor_version=EXTRACTOR_VERSION):
+    """Return a SHA-256 key for an upload from its bytes, file type and the extractor version"""
+    digest = hashlib.sha256()
+    file_extension = uploaded_file.name.split('.')[-1].lower()
+    digest.update(f"{extractor_version}\0{file_extension}\0".encode('utf-8'))
+    with open_upload(uploaded_file) as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache(DiskCache):
+    """Two-tier cache of extracted text: an LRU dict in memory and one JSON file per entry on disk"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        super().__init__(cache_dir, max_entries, max_bytes, max_age_seconds)
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+
+    def _remember(self, key, content, stats):
+        """Add an entry to the memory tier, evicting the least recently used ones over the limit"""
+        size = len(content.encode('utf-8'))
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[2]
+        self._memory[key] = (content, stats, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def get(self, key):
+        """Return (content, stats) for a key from memory or disk, or None on a miss"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                content, stats, _ = self._memory[key]
+                return content, stats
+
+        entry = self._load(key, ('content', 'stats'))
+        if entry is None:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, entry['content'], entry['stats'])
+        return entry['content'], entry['stats']
+
+    def put(self, key, content, stats, metadata=None):
+        """Store extracted content in both tiers and evict old disk entries if over the limits"""
+        with self._lock:
+            self._remember(key, content, stats)
+        self._store(key, {
+            'content': content,
+            'stats': stats,
+            'metadata': metadata or {},
+            'created': time.time()
+        })
+
+    def clear(self):
+        """Delete every cached extraction from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        super().clear()
+
+    def stats(self):
+        """Return hit/miss counters per tier and the current size of both tiers"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        with self._lock:
+            memory_entries, memory_bytes = len(self._memory), self._memory_bytes
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'memory_entries': memory_entries,
+            'memory_bytes': memory_bytes,
+            **self.disk_stats()
+        }
+
+
+_extraction_cache = None
+_extraction_cache_lock = Lock()
+
+
+def get_extraction_cache():
+    """Return the process-wide extraction cache, shared across Streamlit reruns and sessions"""
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            _extraction_cache = ExtractionCache()
+        return _extraction_cache
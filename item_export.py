@@ -0,0 +1,147 @@
+"""
+Per-item export for Survey Quality Checker
+Flattens analysis results into one row per analyzed item (file, table and item numbers,
+validity, violated criteria, models, timestamps) for analytics across many surveys. Rows are
+generated one result at a time and written as they come: CSV and JSON Lines files are appended
+to, and the compact columnar variant adds one Parquet part file per export to a dataset
+directory, written in row groups. Memory stays constant however many rows are exported.
+"""
+
+import os
+import re
+import csv
+import json
+import glob
+from datetime import datetime
+
+from sharding import item_id
+from rule_engine import FAIL
+
+ITEM_COLUMNS = ('file', 'item_id', 'table_number', 'item_number', 'variable_name', 'question_text', 'validity',
+                'criteria', 'rule_criteria', 'decided_by_rules', 'models', 'models_agree', 'analyzed_at', 'exported_at')
+ITEM_FORMATS = ('csv', 'jsonl', 'parquet')
+# Rows buffered per Parquet row group
+ROW_GROUP_SIZE = 65536
+
+CRITERIA_REFERENCE = re.compile(r'CRITERIA\s*(\d+)', re.IGNORECASE)
+
+
+def join_values(values):
+    """Join values with ';' (multi-valued cells stay one string column in every format)"""
+    return ';'.join(str(value) for value in values)
+
+
+def violated_criteria(reason):
+    """Return the criterion numbers cited in a reason ("CRITERIA 7 - ...; CRITERIA 10 - ..."), in order"""
+    return sorted({int(number) for number in CRITERIA_REFERENCE.findall(reason or '')})
+
+
+def item_row(filename, item, models, analyzed_at, exported_at):
+    verdicts = item.get('model_verdicts') or []
+    return {
+        'file': filename,
+        'item_id': item_id(item),
+        'table_number': str(item.get('table_number', '')),
+        'item_number': str(item.get('item_number', '')),
+        'variable_name': item.get('variable_name', '') or '',
+        'question_text': item.get('question_text', '') or '',
+        'validity': item.get('validity', '') or '',
+        # Valid reasons can cite criteria they meet, only Not Valid ones cite violations
+        'criteria': join_values(violated_criteria(item.get('reason'))) if item.get('validity') == 'Not Valid' else '',
+        'rule_criteria': join_values(sorted({finding['criterion'] for finding in item.get('rule_findings', [])
+                                             if finding['severity'] == FAIL})),
+        'decided_by_rules': bool(item.get('decided_by_rules')),
+        'models': models,
+        # Only items analyzed by several models have verdicts to compare
+        'models_agree': len({verdict['validity'] for verdict in verdicts}) == 1 if verdicts else None,
+        'analyzed_at': analyzed_at,
+        'exported_at': exported_at
+    }
+
+
+def iter_item_rows(results, exported_at=None):
+    """Yield one row dict (ITEM_COLUMNS) per analyzed item of results (dicts with filename and analysis)"""
+    exported_at = exported_at or datetime.now().isoformat()
+    for result in results:
+        analysis = result['analysis']
+        models = join_values(model_used['model_name'] for model_used in analysis.get('models_used', []))
+        for item in analysis.get('individual_question_analysis', []):
+            yield item_row(result['filename'], item, models, analysis.get('timestamp', ''), exported_at)
+
+
+def iter_result_files(directory):
+    """Yield the saved results (StreamingResultWriter files) of a directory one at a time"""
+    for path in sorted(glob.glob(os.path.join(directory, 'analysis_result_*.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield json.load(f)
+
+
+def write_csv_rows(rows, f, header=True):
+    """Write rows to an open text file as CSV; returns the number of rows written"""
+    writer = csv.DictWriter(f, fieldnames=ITEM_COLUMNS)
+    if header:
+        writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow({column: '' if value is None else value for column, value in row.items()})
+        count += 1
+    return count
+
+
+def write_items_csv(rows, path, append=True):
+    """Write rows to a CSV file, appending after an existing header; returns the number of rows written"""
+    new_file = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a' if append else 'w', encoding='utf-8', newline='') as f:
+        return write_csv_rows(rows, f, header=new_file)
+
+
+def write_items_jsonl(rows, path, append=True):
+    """Write rows to a JSON Lines file, one object per line; returns the number of rows written"""
+    count = 0
+    with open(path, 'a' if append else 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def write_items_parquet(rows, directory, row_group_size=ROW_GROUP_SIZE):
+    """
+    Write rows as a new Parquet part file in a dataset directory (earlier parts are kept, so the
+    directory accumulates a history); returns the number of rows written. Needs pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("The Parquet item export needs pyarrow: pip install pyarrow") from e
+
+    schema = pa.schema([(column, pa.bool_() if column in ('decided_by_rules', 'models_agree') else pa.string())
+                        for column in ITEM_COLUMNS])
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.parquet")
+    count = 0
+    buffer = []
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) == row_group_size:
+                writer.write_table(pa.Table.from_pylist(buffer, schema=schema))
+                count += len(buffer)
+                buffer = []
+        if buffer or not count:
+            writer.write_table(pa.Table.from_pylist(buffer, schema=schema))
+            count += len(buffer)
+    return count
+
+
+def export_items(results, destination, fmt='csv', append=True):
+    """Write the item rows of results to destination in fmt (csv, jsonl or parquet); returns the row count"""
+    rows = iter_item_rows(results)
+    if fmt == 'csv':
+        return write_items_csv(rows, destination, append)
+    if fmt == 'jsonl':
+        return write_items_jsonl(rows, destination, append)
+    if fmt == 'parquet':
+        return write_items_parquet(rows, destination)
+    raise ValueError(f"Unknown item export format: {fmt}")
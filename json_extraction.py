@@ -0,0 +1,215 @@
+"""
+JSON extraction for Survey Quality Checker
+Finds the analysis object in a model response that may wrap it in markdown fences or prose,
+in a single string-aware pass built on json.JSONDecoder.raw_decode
+"""
+
+import re
+import json
+
+# Top-level keys of the responses we ask the models for; the candidate with the most of them wins
+EXPECTED_KEYS = (
+    'individual_question_analysis',
+    'survey_general_instructions_analysis',
+    'survey_parts_analysis',
+    'overall_assessment',
+    'recommendations',
+    'duplicate_groups'
+)
+
+# Sections of a complete survey analysis
+ANALYSIS_SECTIONS = (
+    'survey_general_instructions_analysis',
+    'survey_parts_analysis',
+    'individual_question_analysis',
+    'overall_assessment',
+    'recommendations'
+)
+
+# Keys that identify an analysis object nested inside a broken container (section values such as
+# survey_general_instructions_analysis have their own 'recommendations' key)
+PRIMARY_KEYS = ('individual_question_analysis', 'survey_general_instructions_analysis', 'duplicate_groups')
+
+# Outside JSON only openers matter (prose may contain stray quotes)
+OPENER = re.compile(r'[{\[]')
+# Inside a container that failed to parse, skip whole string literals so braces in text are ignored
+TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]', re.DOTALL)
+
+_decoder = json.JSONDecoder()
+
+
+def _score(value):
+    if not isinstance(value, dict):
+        return 0
+    return sum(1 for key in EXPECTED_KEYS if key in value)
+
+
+def iter_json_candidates(content):
+    """
+    Yield every complete JSON object or array in content, in order, as (value, start, depth) where
+    depth is the number of enclosing containers that failed to parse (0 for top-level values).
+    Each opener is handed to raw_decode; a successful parse skips the whole value, and a failed
+    one (e.g. a truncated container) is stepped into so the complete values inside it are still
+    found. Every character is scanned once, plus one raw_decode per enclosing container that fails.
+    """
+    pos = 0
+    depth = 0
+    length = len(content)
+    while pos < length:
+        match = (TOKEN if depth else OPENER).search(content, pos)
+        if match is None:
+            return
+        token = match.group()
+        pos = match.end()
+
+        if token in '}]':
+            depth -= 1
+            continue
+        if token[0] == '"':
+            continue
+
+        try:
+            value, end = _decoder.raw_decode(content, match.start())
+        except json.JSONDecodeError:
+            depth += 1
+            continue
+        yield value, match.start(), depth
+        pos = end
+
+
+def extract_json(content):
+    """
+    Return (value, strategy) for the analysis JSON in content, or (None, None).
+    strategy is 'direct' when the whole response is JSON, 'expected_keys' when an embedded object
+    with the expected top-level keys was found, and 'first_value' when only some other complete
+    top-level JSON value was.
+    """
+    try:
+        return json.loads(content), 'direct'
+    except json.JSONDecodeError:
+        pass
+
+    best = None
+    best_score = 0
+    first = None
+    for value, start, depth in iter_json_candidates(content):
+        # Fragments of a broken container (e.g. a truncated response) only count if they look like an analysis
+        if depth and not (isinstance(value, dict) and any(key in value for key in PRIMARY_KEYS)):
+            continue
+        if first is None and depth == 0:
+            first = value
+        score = _score(value)
+        if score > best_score:
+            best, best_score = value, score
+
+    if best is not None:
+        return best, 'expected_keys'
+    if first is not None:
+        return first, 'first_value'
+    return None, None
+
+
+def extract_valid_json(content):
+    """
+    Extract valid JSON from content that may contain additional text or formatting.
+    Returns the parsed value, or None when the response holds no complete JSON value.
+    """
+    return extract_json(content)[0]
+
+
+# Start of the analysis object: an opening brace followed by its first key
+OBJECT_START = re.compile(r'\{\s*"')
+# Boundary between two array elements, used to resynchronize after a malformed element
+NEXT_ELEMENT = re.compile(r'\}\s*,\s*\{')
+WHITESPACE = re.compile(r'\s*')
+ITEMS_KEY = 'individual_question_analysis'
+
+
+def _skip_whitespace(content, pos):
+    return WHITESPACE.match(content, pos).end()
+
+
+def _salvage_array(content, pos, report):
+    """Recover the complete elements of the items array starting at pos; returns (elements, end or None)"""
+    elements = []
+    resyncing = False
+    pos = _skip_whitespace(content, pos + 1)
+    while pos < len(content):
+        if content[pos] == ']' and not resyncing:
+            return elements, pos + 1
+        try:
+            element, end = _decoder.raw_decode(content, pos)
+        except json.JSONDecodeError:
+            element, end = None, None
+        # After a malformed item the next boundary may be inside it (e.g. between two duplicates_with
+        # entries), so only accept elements that look like a question analysis
+        if end is None or (resyncing and not (isinstance(element, dict) and 'validity' in element)):
+            boundary = NEXT_ELEMENT.search(content, end or pos + 1)
+            if boundary is None:
+                return elements, None
+            if not resyncing:
+                report['skipped_items'] += 1
+                resyncing = True
+            pos = boundary.end() - 1
+            continue
+
+        resyncing = False
+        elements.append(element)
+        pos = _skip_whitespace(content, end)
+        if content.startswith(',', pos):
+            pos = _skip_whitespace(content, pos + 1)
+        elif not content.startswith(']', pos):
+            return elements, None
+    return elements, None
+
+
+def salvage_json(content):
+    """
+    Recover what a truncated or malformed analysis object still holds: every complete top-level
+    section and every complete individual_question_analysis element.
+    Returns (sections, report) or (None, None) when nothing could be recovered. report lists the
+    sections that were cut off ('partial_sections'), the number of malformed items that were
+    skipped ('skipped_items') and whether the document ended before the object closed ('truncated').
+    """
+    start = OBJECT_START.search(content)
+    if start is None:
+        return None, None
+
+    sections = {}
+    report = {'partial_sections': [], 'skipped_items': 0, 'truncated': True}
+    pos = start.start() + 1
+    while True:
+        pos = _skip_whitespace(content, pos)
+        if content.startswith('}', pos):
+            report['truncated'] = False
+            break
+        try:
+            key, pos = _decoder.raw_decode(content, pos)
+        except json.JSONDecodeError:
+            break
+        pos = _skip_whitespace(content, pos)
+        if not isinstance(key, str) or not content.startswith(':', pos):
+            break
+        pos = _skip_whitespace(content, pos + 1)
+
+        try:
+            sections[key], pos = _decoder.raw_decode(content, pos)
+        except json.JSONDecodeError:
+            if key != ITEMS_KEY or not content.startswith('[', pos):
+                report['partial_sections'].append(key)
+                break
+            sections[key], end = _salvage_array(content, pos, report)
+            if end is None:
+                report['partial_sections'].append(key)
+                break
+            pos = end
+
+        pos = _skip_whitespace(content, pos)
+        if content.startswith(',', pos):
+            pos += 1
+        elif not content.startswith('}', pos):
+            break
+
+    if not sections:
+        return None, None
+    return sections, report
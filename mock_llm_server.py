@@ -0,0 +1,275 @@
+"""
+Local stand-in for the DeepSeek/OpenAI chat completions API
+Serves survey analyses with configurable latency, token rate, injected 429/5xx errors and
+truncated or markdown-wrapped responses, so the pipeline can be benchmarked and regression-tested
+without API credits. Tests can script the answers with an answer(payload) function. Point a model at
+it with model['endpoint'] (or batch_cli.py --endpoint):
+
+    python mock_llm_server.py --port 8001 --latency 2.0 --error-rate 0.05
+"""
+
+import re
+import glob
+import json
+import time
+import random
+import argparse
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Keys of a single model analysis, as the real model returns it
+ANALYSIS_KEYS = ('survey_general_instructions_analysis', 'survey_parts_analysis', 'individual_question_analysis',
+                 'overall_assessment', 'recommendations')
+# "1. The staff were courteous." lines in the survey content of a prompt ("1: ..." in follow-up prompts)
+PROMPT_ITEM = re.compile(r'^\s*(\d+)\s*[.):]\s*(.+)$', re.MULTILINE)
+# "T1-2: The service was timely." lines in structured outline prompts (see survey_ir.py)
+PROMPT_ITEM_ID = re.compile(r'^\s*(T\d+-\d+)\s*:\s*(.+)$', re.MULTILINE)
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class MockLLMConfig:
+    latency: float = 0.0              # median seconds before the first byte
+    latency_sigma: float = 0.0        # log-normal spread of the latency (0 = fixed)
+    tokens_per_second: float = 0.0    # output token rate, 0 = send the whole answer at once
+    rate_limit_rate: float = 0.0      # fraction of requests answered with 429
+    server_error_rate: float = 0.0    # fraction of requests answered with 500/502/503
+    retry_after: float = 0.0          # Retry-After seconds sent with 429 responses
+    truncate_rate: float = 0.0        # fraction of answers cut off mid-JSON
+    markdown_rate: float = 0.0        # fraction of answers wrapped in ```json fences
+    default_items: int = 10           # items to invent when the prompt has no numbered items
+    replay_files: list = field(default_factory=list)  # analysis_result_*.json files to serve in turn
+    seed: int = None
+
+
+def load_replay_analysis(path):
+    """Return the model analysis stored in an analysis_result_*.json file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+    # Newer results wrap the record in 'analysis'; the committed sample is the bare record
+    analysis = result.get('analysis', result)
+    return {key: analysis[key] for key in ANALYSIS_KEYS if key in analysis}
+
+
+def synthesize_verdict(text):
+    return {'validity': 'Not Valid' if ' and ' in text else 'Valid',
+            'reason': 'Double-barreled statement' if ' and ' in text else 'Clear and relevant statement',
+            'duplicates_with': []}
+
+
+def synthesize_analysis(prompt, default_items=10):
+    """Invent a plausible analysis with one verdict per numbered item (or item ID) in the prompt"""
+    identified = PROMPT_ITEM_ID.findall(prompt)
+    if identified:
+        questions = [dict(synthesize_verdict(text), item_id=identifier) for identifier, text in identified]
+    else:
+        items = PROMPT_ITEM.findall(prompt) or [(str(i), f"Synthetic item {i}") for i in range(1, default_items + 1)]
+        questions = [dict(synthesize_verdict(text), table_number='1', item_number=number, question_text=text.strip())
+                     for number, text in items]
+    return {
+        'survey_general_instructions_analysis': {'instructions_present': True, 'scale_correctly_defined': True,
+                                                 'issues_found': [], 'recommendations': []},
+        'survey_parts_analysis': {'part_2_has_only_definitions': True, 'part_3_has_only_definitions': True},
+        'individual_question_analysis': questions,
+        'overall_assessment': 'Synthetic assessment from the mock server',
+        'recommendations': []
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    # Benchmarks open many connections at once; the default listen backlog of 5 would stall them
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class MockLLMServer:
+    """
+    Threaded mock API server; use as a context manager or call start()/stop(). answer, if given,
+    is called with each request payload (from the server's threads) and returns the analysis to
+    send, or an HTTP status code to fail the request with; otherwise replayed or synthesized
+    analyses are sent.
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0, answer=None):
+        self.config = config or MockLLMConfig()
+        self.answer = answer
+        self._random = random.Random(self.config.seed)
+        self._replay = [load_replay_analysis(path) for path in self.config.replay_files]
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'rate_limited': 0, 'server_errors': 0, 'rejected': 0, 'truncated': 0,
+                      'streamed': 0}
+        self._server = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/chat/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _plan_response(self, payload):
+        """Decide, under the lock so runs are reproducible with a seed, how to answer one request"""
+        config = self.config
+        with self._lock:
+            self.stats['requests'] += 1
+            request_number = self.stats['requests']
+            draw = self._random.random()
+            latency = config.latency * (self._random.lognormvariate(0, config.latency_sigma) if config.latency_sigma else 1)
+            truncate = self._random.random() < config.truncate_rate
+            markdown = self._random.random() < config.markdown_rate
+            error_status = self._random.choice([500, 502, 503])
+
+        if draw < config.rate_limit_rate:
+            return {'status': 429, 'latency': latency}
+        if draw < config.rate_limit_rate + config.server_error_rate:
+            return {'status': error_status, 'latency': latency}
+
+        if self.answer is not None:
+            analysis = self.answer(payload)
+            if isinstance(analysis, int):
+                return {'status': analysis, 'latency': latency}
+        elif self._replay:
+            analysis = self._replay[(request_number - 1) % len(self._replay)]
+        else:
+            prompt = payload['messages'][-1]['content'] if payload.get('messages') else ''
+            analysis = synthesize_analysis(prompt, config.default_items)
+
+        content = json.dumps(analysis, indent=2, ensure_ascii=False)
+        if markdown:
+            content = f"Here is the analysis:\n```json\n{content}\n```"
+        if truncate:
+            content = content[:len(content) * 2 // 3]
+        return {'status': 200, 'latency': latency, 'content': content, 'truncated': truncate}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                plan = server._plan_response(payload)
+                time.sleep(plan['latency'])
+
+                if plan['status'] != 200:
+                    server._count('rate_limited' if plan['status'] == 429 else
+                                  'server_errors' if plan['status'] >= 500 else 'rejected')
+                    body = json.dumps({'error': {'message': 'Injected error', 'code': plan['status']}}).encode('utf-8')
+                    self.send_response(plan['status'])
+                    if plan['status'] == 429:
+                        self.send_header('Retry-After', str(server.config.retry_after))
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                if plan['truncated']:
+                    server._count('truncated')
+                if payload.get('stream'):
+                    server._count('streamed')
+                    self._send_stream(plan['content'])
+                else:
+                    self._send_json(plan['content'])
+
+            def _token_delay(self, text):
+                rate = server.config.tokens_per_second
+                return len(text) / CHARS_PER_TOKEN / rate if rate else 0
+
+            def _send_json(self, content):
+                time.sleep(self._token_delay(content))
+                body = json.dumps({
+                    'choices': [{'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                    'usage': {'completion_tokens': len(content) // CHARS_PER_TOKEN}
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self, content, chunk_chars=64):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                for i in range(0, len(content), chunk_chars):
+                    chunk = content[i:i + chunk_chars]
+                    time.sleep(self._token_delay(chunk))
+                    event = {'choices': [{'delta': {'content': chunk}}]}
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local mock of the chat completions API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help="Median seconds before responding")
+    parser.add_argument('--latency-sigma', type=float, default=0.0, help="Log-normal spread of the latency")
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help="Output token rate (0 = instant)")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of 5xx responses")
+    parser.add_argument('--retry-after', type=float, default=0.0, help="Retry-After seconds on 429")
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help="Fraction of truncated JSON answers")
+    parser.add_argument('--markdown-rate', type=float, default=0.0, help="Fraction of ```json wrapped answers")
+    parser.add_argument('--replay', nargs='*', default=[], help="analysis_result_*.json files (or globs) to replay")
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args):
+    replay_files = sorted({path for pattern in args.replay for path in glob.glob(pattern)})
+    return MockLLMConfig(latency=args.latency, latency_sigma=args.latency_sigma,
+                         tokens_per_second=args.tokens_per_second, rate_limit_rate=args.rate_limit_rate,
+                         server_error_rate=args.error_rate, retry_after=args.retry_after,
+                         truncate_rate=args.truncate_rate, markdown_rate=args.markdown_rate,
+                         replay_files=replay_files, seed=args.seed)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = MockLLMServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"Mock chat completions API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.stats))
+
+
+if __name__ == "__main__":
+    main()
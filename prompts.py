@@ -3,9 +3,42 @@ AI Evaluation Prompts for Survey Quality Checker
 This file contains all the prompts used for AI evaluation of survey questionnaires with DeepSeek
 """
 
-def get_survey_system_prompt():
+# Bump whenever the prompt text changes so cached responses from older prompts are not reused
+PROMPT_VERSION = "1"
+
+# JSON structure of one "individual_question_analysis" entry
+SURVEY_ITEM_SCHEMA = """            {
+                "question_id": "unique_identifier_for_question",
+                "table_number": "table_number_containing_question",
+                "item_number": "item_number_within_table",
+                "variable_name": "name_of_the_variable_from_contextual_statement",
+                "question_text": "exact_question_text",
+                "validity": "Valid or Not Valid",
+                "reason": "specific_reasons_for_validity_assessment",
+                "alternative_question": "suggested_alternative_question_if_invalid_or_empty_string_if_valid",
+                "duplicates_with": [
+                    {
+                        "table_number": "table_number_of_duplicate",
+                        "item_number": "item_number_of_duplicate",
+                        "question_text": "text_of_duplicate_question"
+                    }
+                ]
+            }"""
+
+# Entry structure for surveys sent as a structured outline (see survey_ir.py): items are referenced
+# by the ids given in the outline, so their text, table and variable are not echoed back
+STRUCTURED_ITEM_SCHEMA = """            {
+                "item_id": "id_of_the_item_as_given_in_the_outline",
+                "validity": "Valid or Not Valid",
+                "reason": "specific_reasons_for_validity_assessment",
+                "alternative_question": "suggested_alternative_question_if_invalid_or_empty_string_if_valid",
+                "duplicates_with": [{"item_id": "item_id_of_duplicate"}]
+            }"""
+
+def get_survey_system_prompt(item_schema=SURVEY_ITEM_SCHEMA):
     """
-    System prompt with instructions for survey analysis
+    System prompt with instructions for survey analysis. item_schema is the JSON structure
+    requested for each entry of "individual_question_analysis".
     """
     return """
    YOUR ARE A Survey Quality Analyst. Analyze this survey questionnaire focusing on the validity of each question. For each question, determine if it is "Valid" or "Not Valid" with specific reasons.
@@ -68,23 +101,7 @@ def get_survey_system_prompt():
             "part_3_recommendations": ["list of recommendations for part 3 if any"]
         },
         "individual_question_analysis": [
-            {
-                "question_id": "unique_identifier_for_question",
-                "table_number": "table_number_containing_question",
-                "item_number": "item_number_within_table",
-                "variable_name": "name_of_the_variable_from_contextual_statement",
-                "question_text": "exact_question_text",
-                "validity": "Valid or Not Valid",
-                "reason": "specific_reasons_for_validity_assessment",
-                "alternative_question": "suggested_alternative_question_if_invalid_or_empty_string_if_valid",
-                "duplicates_with": [
-                    {
-                        "table_number": "table_number_of_duplicate",
-                        "item_number": "item_number_of_duplicate",
-                        "question_text": "text_of_duplicate_question"
-                    }
-                ]
-            }
+""" + item_schema + """
         ]
     }
 
@@ -119,4 +136,104 @@ def get_deepseek_prompt(file_content):
     return [
         {"role": "system", "content": get_survey_system_prompt()},
         {"role": "user", "content": get_survey_user_prompt(file_content)}
-    ]
\ No newline at end of file
+    ]
+
+def get_preamble_prompt(preamble_content):
+    """
+    Return messages that evaluate only the general instructions and Part 2/Part 3 sections
+    of a survey whose tables are analyzed in separate requests
+    """
+    return [
+        {"role": "system", "content": get_survey_system_prompt()},
+        {"role": "user", "content": (
+            "The tables of this survey are analyzed separately. Analyze ONLY the general instructions "
+            "and the Part 2 and Part 3 sections below. Return \"individual_question_analysis\" as an empty list.\n\n"
+            f"{get_survey_user_prompt(preamble_content)}"
+        )}
+    ]
+
+
+def get_table_shard_prompt(preamble_content, table_content, table_number, items_to_evaluate=None):
+    """
+    Return messages that evaluate the items of a single table, using the general instructions
+    and variable definitions as context. items_to_evaluate, a list of (item_number, question_text)
+    pairs, restricts the evaluation to those items (the rest of the table is context only).
+    """
+    if items_to_evaluate:
+        item_lines = '\n'.join(f"{item_number}: {question_text}" for item_number, question_text in items_to_evaluate)
+        scope = (
+            "Evaluate ONLY the following items of the table below, using the given numbers as item_number; "
+            f"the other items are context only:\n{item_lines}\n\n"
+        )
+    else:
+        scope = "Analyze ONLY the items of the table below, numbering them by their position in the table. "
+    return [
+        {"role": "system", "content": get_survey_system_prompt()},
+        {"role": "user", "content": (
+            "The survey is analyzed one table at a time. The general instructions and variable definitions "
+            f"are given for context only; do not analyze them. {scope}"
+            f"Use \"{table_number}\" as the table_number of every item, and return "
+            "\"survey_general_instructions_analysis\" and \"survey_parts_analysis\" as empty objects.\n\n"
+            f"Survey context: {preamble_content}\n\n"
+            f"Table {table_number}:\n{table_content}"
+        )}
+    ]
+
+
+def get_missing_items_prompt(preamble_content, table_stem, table_number, items):
+    """
+    Return messages for a follow-up request that evaluates only the items an earlier analysis
+    skipped. items is a list of (item_number, question_text) pairs of one table; only the
+    table's heading/stem is sent with them.
+    """
+    item_lines = '\n'.join(f"{item_number}: {question_text}" for item_number, question_text in items)
+    return [
+        {"role": "system", "content": get_survey_system_prompt()},
+        {"role": "user", "content": (
+            f"An earlier analysis of this survey skipped some items of Table {table_number}. Evaluate ONLY the items "
+            "listed below, using the given numbers as item_number and "
+            f"\"{table_number}\" as the table_number. The general instructions and variable definitions are "
+            "given for context only; return \"survey_general_instructions_analysis\" and "
+            "\"survey_parts_analysis\" as empty objects.\n\n"
+            f"Survey context: {preamble_content}\n\n"
+            f"Table {table_number}:\n{table_stem}\n\n"
+            f"Items to evaluate:\n{item_lines}"
+        )}
+    ]
+
+
+def get_duplicate_check_prompt(items):
+    """
+    Return messages for a cheap final pass that finds items with substantially identical
+    meaning across tables (criterion 1). items is a list of (item_id, question_text) pairs.
+    """
+    item_lines = '\n'.join(f"{item_id}: {question_text}" for item_id, question_text in items)
+    return [
+        {"role": "system", "content": (
+            "You check survey questionnaires for duplicated items. Two items are duplicates when they have "
+            "substantially identical meaning, even if worded differently. You MUST respond in valid JSON "
+            "with this exact structure: {\"duplicate_groups\": [[\"item_id\", \"item_id\"]]} "
+            "listing every group of duplicated items, or an empty list if there are none."
+        )},
+        {"role": "user", "content": f"Survey items:\n{item_lines}"}
+    ]
+
+
+def get_structured_survey_prompt(survey_outline, has_decided_items=False):
+    """
+    Return messages that evaluate a survey sent as a structured outline (see survey_ir.py), in
+    which every table item is listed as "ID: text" and verdicts are returned keyed by that ID.
+    has_decided_items adds the instruction for items marked "[decided]" by the local rule engine.
+    """
+    decided = (" Items marked [decided] were already found Not Valid by local checks; use them only for the "
+               "duplication check and do not return them." if has_decided_items else "")
+    return [
+        {"role": "system", "content": get_survey_system_prompt(STRUCTURED_ITEM_SCHEMA)},
+        {"role": "user", "content": (
+            "The survey below was parsed into sections and variable tables. Each table gives its variable, "
+            "definition and stem, and lists its items as \"ID: text\". Return one entry per item in "
+            "\"individual_question_analysis\" with its ID as item_id; do not repeat the item text, table "
+            f"or variable. List duplicates by their IDs.{decided}\n\n"
+            f"Survey outline:\n{survey_outline}"
+        )}
+    ]
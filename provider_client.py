@@ -0,0 +1,173 @@
+"""
+Shared HTTP client for AI provider calls
+Keeps a pooled keep-alive session, applies connect/read timeouts and retries transient
+failures (429, 5xx, dropped connections) with exponential backoff, jitter and Retry-After
+"""
+
+import time
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CONNECT_TIMEOUT = 10  # seconds
+DEFAULT_READ_TIMEOUT = 300  # seconds, the reasoner can think for several minutes
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 1.0  # seconds
+DEFAULT_BACKOFF_MAX = 60.0  # seconds
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds from a Retry-After header (seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def compute_backoff(attempt, retry_after=None, base=DEFAULT_BACKOFF_BASE, cap=DEFAULT_BACKOFF_MAX):
+    """Return the delay before retry number `attempt` (0-based) using exponential backoff with full jitter"""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        # The server told us how long to wait; never retry sooner than that
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+class RetryPolicy:
+    """
+    When to retry a provider request and how long to wait first, shared by ProviderClient and
+    the asyncio engine: transient status codes and dropped connections are retried with backoff
+    up to max_retries times
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def retry_delay(self, attempt, status_code=None, retry_after=None):
+        """
+        Return the seconds to wait before retrying attempt (0-based) after a connection error
+        (status_code None) or a response with status_code and Retry-After header value, or None
+        if the request should not be retried
+        """
+        if status_code is not None and status_code not in RETRY_STATUS_CODES:
+            return None
+        if attempt >= self.max_retries:
+            return None
+        return compute_backoff(attempt, parse_retry_after(retry_after), self.backoff_base, self.backoff_max)
+
+
+class ProviderClient:
+    """Pooled HTTP client with timeouts, retries and connection metrics"""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX):
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry_policy = RetryPolicy(max_retries, backoff_base, backoff_max)
+
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+        self._lock = Lock()
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+
+    def post_json(self, url, headers, payload, stream=False):
+        """POST a JSON payload and return the successful response, retrying transient failures"""
+        attempt = 0
+        while True:
+            with self._lock:
+                self._requests += 1
+            try:
+                response = self.session.post(url, headers=headers, json=payload,
+                                             timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self.retry_policy.retry_delay(attempt)
+                if delay is None:
+                    self._record_failure()
+                    raise
+                self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+
+            delay = self.retry_policy.retry_delay(attempt, response.status_code, response.headers.get('Retry-After'))
+            if delay is not None:
+                response.close()
+                self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+
+            if not response.ok:
+                self._record_failure()
+            response.raise_for_status()
+            return response
+
+    def _sleep_before_retry(self, delay):
+        with self._lock:
+            self._retries += 1
+        time.sleep(delay)
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+
+    def metrics(self):
+        """Return request, retry and connection reuse counters"""
+        connections_opened = 0
+        pooled_requests = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections_opened += pool.num_connections
+                pooled_requests += pool.num_requests
+
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'retries': self._retries,
+                'failures': self._failures,
+                'connections_opened': connections_opened,
+                'connections_reused': max(0, pooled_requests - connections_opened),
+                'pool_size': self.pool_size
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_provider_client = None
+_provider_client_lock = Lock()
+
+
+def get_provider_client(pool_size=DEFAULT_POOL_SIZE):
+    """Return the process-wide provider client, created on first use with the given pool size"""
+    global _provider_client
+    with _provider_client_lock:
+        if _provider_client is None:
+            _provider_client = ProviderClient(pool_size=pool_size)
+        return _provider_client
@@ -0,0 +1,182 @@
+"""
+Report cache for Survey Quality Checker
+Keeps rendered DOCX reports in memory as bytes, keyed by a SHA-256 of the analysis and the
+report template version, with an LRU byte budget. Reports are rendered once, either when first
+requested or ahead of time in a background worker, so Streamlit reruns with loaded results only
+look them up instead of rebuilding every Word document.
+"""
+
+import os
+import json
+import hashlib
+import concurrent.futures
+from collections import OrderedDict
+from threading import Lock
+
+# Memory budget for rendered reports (override in MB with SQ_CHECKER_REPORT_CACHE_MB)
+DEFAULT_MAX_BYTES = int(os.environ.get('SQ_CHECKER_REPORT_CACHE_MB', 128)) * 1024 * 1024
+# Background workers that render reports ahead of the download
+DEFAULT_RENDER_WORKERS = 1
+# Analysis objects whose key is remembered, so reruns do not serialize them again
+MAX_REMEMBERED_KEYS = 1024
+
+
+def make_report_key(analysis, filename, template_version):
+    """Return a SHA-256 key for the report of an analysis dict"""
+    key_material = json.dumps({
+        'analysis': analysis,
+        'filename': filename,
+        'template_version': template_version
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+
+class ReportCache:
+    """In-memory LRU cache of rendered reports with a background render worker"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, workers=DEFAULT_RENDER_WORKERS):
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.evictions = 0
+        self._reports = OrderedDict()
+        self._bytes = 0
+        self._pending = {}
+        self._keys = OrderedDict()
+        self._executor = None
+        self._lock = Lock()
+
+    def key_for(self, analysis, filename, template_version):
+        """
+        Return the report key of an analysis dict. The key is remembered per analysis object, so
+        analyses must not be modified once their report has been requested.
+        """
+        with self._lock:
+            remembered = self._keys.get(id(analysis))
+            # The analysis is kept with its key so its id cannot be reused by another object
+            if remembered and remembered[0] is analysis and remembered[1:3] == (filename, template_version):
+                self._keys.move_to_end(id(analysis))
+                return remembered[3]
+        key = make_report_key(analysis, filename, template_version)
+        with self._lock:
+            self._keys[id(analysis)] = (analysis, filename, template_version, key)
+            while len(self._keys) > MAX_REMEMBERED_KEYS:
+                self._keys.popitem(last=False)
+        return key
+
+    def _store(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        if key in self._reports:
+            self._bytes -= len(self._reports.pop(key))
+        self._reports[key] = data
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._reports.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def get(self, key):
+        """Return the rendered report bytes for a key, or None"""
+        with self._lock:
+            data = self._reports.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._reports.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """Store rendered report bytes, evicting the least recently used reports over the budget"""
+        with self._lock:
+            self._store(key, data)
+
+    def _running(self, key):
+        future = self._pending.get(key)
+        return future if future is not None and not future.done() else None
+
+    def pending(self, key):
+        """Return whether the report is being rendered in the background"""
+        with self._lock:
+            return self._running(key) is not None
+
+    def _render(self, key, render):
+        data = render()
+        with self._lock:
+            self.renders += 1
+            self._store(key, data)
+        return data
+
+    def _finished(self, key, future):
+        # Runs once the background render succeeded or failed; a failed one is dropped so it can be retried
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def prefetch(self, key, render):
+        """Render a report in the background unless it is cached or already being rendered"""
+        with self._lock:
+            if key in self._reports or self._running(key) is not None:
+                return
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='report-render')
+            future = self._executor.submit(self._render, key, render)
+            self._pending[key] = future
+        # Outside the lock: the callback runs at once if the render already finished
+        future.add_done_callback(lambda done: self._finished(key, done))
+
+    def render(self, key, render):
+        """
+        Return the report for a key, waiting for a background render or rendering it now (also
+        when the background render failed)
+        """
+        data = self.get(key)
+        if data is not None:
+            return data
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            try:
+                return future.result()
+            except Exception:
+                pass
+        return self._render(key, render)
+
+    def clear(self):
+        """Drop every cached report"""
+        with self._lock:
+            self._reports.clear()
+            self._keys.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss/render counters and the current size of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'renders': self.renders,
+                'evictions': self.evictions,
+                'pending': sum(1 for future in self._pending.values() if not future.done()),
+                'entries': len(self._reports),
+                'bytes': self._bytes
+            }
+
+
+_report_cache = None
+_report_cache_lock = Lock()
+
+
+def get_report_cache():
+    """Return the process-wide report cache, shared across Streamlit reruns and sessions"""
+    global _report_cache
+    with _report_cache_lock:
+        if _report_cache is None:
+            _report_cache = ReportCache()
+        return _report_cache
@@ -0,0 +1,152 @@
+"""
+Bulk report export for Survey Quality Checker
+Writes every analysis result into one ZIP: a DOCX report and the raw JSON result per file, an
+index of the files and a CSV with one row per analyzed item. Reports missing from the report cache are rendered in a process pool, a few
+per worker at a time, and written to the archive in order as they finish, so only the reports in
+flight are held in memory.
+"""
+
+import io
+import os
+import json
+import atexit
+import zipfile
+import tempfile
+import collections
+import concurrent.futures
+from threading import Lock
+
+from app import render_docx_bytes, report_key
+from analysis_models import validate_analysis
+from report_cache import get_report_cache
+from item_export import iter_item_rows, write_csv_rows
+
+# Worker processes for rendering reports (override with SQ_CHECKER_EXPORT_WORKERS)
+MAX_EXPORT_WORKERS = int(os.environ.get('SQ_CHECKER_EXPORT_WORKERS', os.cpu_count() or 1))
+# Reports rendered ahead of the archive writer per worker (bounds the reports held in memory)
+RENDERS_IN_FLIGHT_PER_WORKER = 2
+INDEX_FILENAME = 'index.json'
+ITEMS_FILENAME = 'items.csv'
+
+_export_executor = None
+_export_executor_lock = Lock()
+# Named temporary ZIP files offered for download, removed when replaced or at exit
+_export_archives = set()
+_export_archives_lock = Lock()
+
+
+def get_export_executor():
+    """Return the shared process pool for rendering exported reports"""
+    global _export_executor
+    with _export_executor_lock:
+        if _export_executor is None:
+            _export_executor = concurrent.futures.ProcessPoolExecutor(max_workers=MAX_EXPORT_WORKERS)
+        return _export_executor
+
+
+def archive_names(filenames):
+    """Return a unique archive base name per result, numbering repeated file names like "name (2)" """
+    seen = collections.Counter()
+    names = []
+    for filename in filenames:
+        base = os.path.basename(filename) or "survey"
+        seen[base] += 1
+        names.append(base if seen[base] == 1 else f"{base} ({seen[base]})")
+    return names
+
+
+def index_entry(result, name, report_size):
+    items = validate_analysis(result['analysis']).individual_question_analysis
+    return {
+        'filename': result['filename'],
+        'report': f"reports/quality_report_{name}.docx",
+        'result': f"results/{name}.json",
+        'items': len(items),
+        'valid': sum(1 for item in items if item.is_valid),
+        'not_valid': sum(1 for item in items if item.is_not_valid),
+        'report_bytes': report_size
+    }
+
+
+def export_reports_zip(results, destination, executor=None, workers=MAX_EXPORT_WORKERS, cache=None):
+    """
+    Write the DOCX report and JSON result of every analysis result (dicts with filename and
+    analysis), an index.json and an items.csv (item_export rows) into a ZIP at destination (a path or binary file object).
+    Reports already in the report cache are reused, the others are rendered with executor
+    (the shared export pool of workers processes by default) and added to the cache. Returns the
+    index entries.
+    """
+    results = list(results)
+    cache = cache or get_report_cache()
+    executor = executor or get_export_executor()
+    window = RENDERS_IN_FLIGHT_PER_WORKER * max(workers, 1)
+    index = []
+
+    with zipfile.ZipFile(destination, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        def write(result, name, key, report):
+            if not isinstance(report, bytes):
+                report = report.result()
+                cache.put(key, report)
+            # Reports are already compressed DOCX packages
+            archive.writestr(f"reports/quality_report_{name}.docx", report, compress_type=zipfile.ZIP_STORED)
+            archive.writestr(f"results/{name}.json", json.dumps(result, indent=2, ensure_ascii=False, default=str))
+            index.append(index_entry(result, name, len(report)))
+
+        pending = collections.deque()
+        for result, name in zip(results, archive_names(result['filename'] for result in results)):
+            key = report_key(result)
+            report = cache.get(key)
+            if report is None:
+                report = executor.submit(render_docx_bytes, result['analysis'], result['filename'])
+            pending.append((result, name, key, report))
+            # Write finished reports in order once the window is full, so rendering stays ahead of writing
+            while len(pending) > window or (pending and isinstance(pending[0][3], bytes)):
+                write(*pending.popleft())
+        while pending:
+            write(*pending.popleft())
+
+        archive.writestr(INDEX_FILENAME, json.dumps({'files': index}, indent=2, ensure_ascii=False))
+        with archive.open(ITEMS_FILENAME, 'w') as raw, io.TextIOWrapper(raw, encoding='utf-8', newline='') as f:
+            write_csv_rows(iter_item_rows(results), f)
+    return index
+
+
+def create_export_archive(results, **options):
+    """
+    Export results (see export_reports_zip, which takes the options) into a new named temporary
+    ZIP file and return its path; the file is deleted by remove_export_archive or at exit
+    """
+    fd, path = tempfile.mkstemp(prefix='quality_reports_', suffix='.zip')
+    with _export_archives_lock:
+        _export_archives.add(path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            export_reports_zip(results, f, **options)
+    except BaseException:
+        remove_export_archive(path)
+        raise
+    return path
+
+
+def read_export_archive(path):
+    """Return the bytes of an export archive, read when its download is requested"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def remove_export_archive(path):
+    """Delete an export archive created by create_export_archive"""
+    with _export_archives_lock:
+        _export_archives.discard(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@atexit.register
+def _remove_export_archives():
+    with _export_archives_lock:
+        paths = list(_export_archives)
+    for path in paths:
+        remove_export_archive(path)
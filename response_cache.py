@@ -0,0 +1,81 @@
+"""
+On-disk response cache for Survey Quality Checker
+Stores raw AI model responses keyed by a hash of the prompt messages, model name,
+temperature and prompt version so repeat analyses skip the API call entirely
+"""
+
+import os
+import json
+import time
+import hashlib
+from threading import Lock
+
+from prompts import PROMPT_VERSION
+from disk_cache import DiskCache
+
+# Default cache location and limits (override the directory with SQ_CHECKER_CACHE_DIR)
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('SQ_CHECKER_CACHE_DIR', '.cache'), 'responses')
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200 MB
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60  # 7 days
+
+
+def make_cache_key(messages, model_name, temperature, prompt_version=PROMPT_VERSION):
+    """Return a SHA-256 key for a chat completions request"""
+    key_material = json.dumps({
+        'messages': messages,
+        'model': model_name,
+        'temperature': temperature,
+        'prompt_version': prompt_version
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+
+class ResponseCache(DiskCache):
+    """Content-addressed cache of model responses stored as one JSON file per entry"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        super().__init__(cache_dir, max_entries, max_bytes, max_age_seconds)
+        self.hits = 0
+
+    def get(self, key):
+        """Return the cached response content for a key, or None on a miss"""
+        entry = self._load(key, ('content',))
+        if entry is None:
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry['content']
+
+    def put(self, key, content, metadata=None):
+        """Store response content for a key and evict old entries if over the limits"""
+        self._store(key, {
+            'content': content,
+            'metadata': metadata or {},
+            'created': time.time()
+        })
+
+    def stats(self):
+        """Return hit/miss counters and the current size of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            **self.disk_stats()
+        }
+
+
+_response_cache = None
+_response_cache_lock = Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, shared across Streamlit reruns"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
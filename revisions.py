@@ -0,0 +1,292 @@
+"""
+Incremental re-analysis for Survey Quality Checker
+Remembers the verdicts of the last analyzed revision of each document and, when a corrected
+version is resubmitted, only sends the tables and items that changed to the AI model
+"""
+
+import os
+import re
+import copy
+import json
+import hashlib
+import tempfile
+from functools import partial
+from threading import Lock
+
+from prompts import PROMPT_VERSION, get_preamble_prompt, get_table_shard_prompt
+from sharding import TABLE_HEADING, split_survey_content, split_table_items, duplicate_check_pipeline, ignored_item
+
+# Location of stored revisions (override the parent directory with SQ_CHECKER_CACHE_DIR)
+DEFAULT_REVISION_DIR = os.path.join(os.environ.get('SQ_CHECKER_CACHE_DIR', '.cache'), 'revisions')
+
+# Suffixes students add to resubmitted files: "survey (1).docx", "survey_v2.docx", "survey-revised.docx"
+COPY_SUFFIX = re.compile(r'\s*\(\d+\)$')
+REVISION_SUFFIX = re.compile(r'[\s_-]*(v\d+|rev(ision)?[\s_-]*\d*|revised|corrected|updated|final)$')
+
+# Word overlap (Jaccard) a stored revision needs with a resubmission to count as the same survey;
+# surveys written from the same template share the instructions but not the variables
+MIN_PREAMBLE_OVERLAP = 0.6
+MIN_VARIABLE_OVERLAP = 0.5
+
+
+def document_key(filename):
+    """
+    Return the identity of a document across revisions, derived from its file name (its stored
+    revision is only reused if the content matches too, see same_document)
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0].lower().strip()
+    previous = None
+    while stem != previous:
+        previous = stem
+        stem = COPY_SUFFIX.sub('', stem)
+        stem = REVISION_SUFFIX.sub('', stem)
+    return re.sub(r'[\s_-]+', '-', stem).strip('-')
+
+
+def content_words(text):
+    return sorted(set(re.findall(r'[a-z0-9]+', text.lower())))
+
+
+def document_fingerprint(shards):
+    """Return the words of the preamble and of the table headings (variable names) of a survey"""
+    headings = [TABLE_HEADING.sub('', shard.text.split('\n', 1)[0]) for shard in shards.tables]
+    return {'preamble': content_words(shards.preamble), 'variables': content_words('\n'.join(headings))}
+
+
+def word_overlap(words, other_words):
+    words, other_words = set(words), set(other_words)
+    if not words and not other_words:
+        return 1.0
+    return len(words & other_words) / len(words | other_words)
+
+
+def same_document(fingerprint, stored_fingerprint):
+    """
+    True if a survey is a revision of a stored one: a shared file name alone is not enough,
+    the preamble and the variable names must largely overlap too
+    """
+    if not stored_fingerprint:
+        return False
+    return (word_overlap(fingerprint['preamble'], stored_fingerprint['preamble']) >= MIN_PREAMBLE_OVERLAP and
+            word_overlap(fingerprint['variables'], stored_fingerprint['variables']) >= MIN_VARIABLE_OVERLAP)
+
+
+def normalize_text(text):
+    """Collapse whitespace and case so formatting-only edits do not count as changes"""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class RevisionStore:
+    """Stores the last analyzed revision of each document per model as one JSON file"""
+
+    def __init__(self, store_dir=DEFAULT_REVISION_DIR):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def _path(self, filename, model):
+        key = hashlib.sha256(f"{document_key(filename)}|{model['name']}".encode('utf-8')).hexdigest()
+        return os.path.join(self.store_dir, f"{key}.json")
+
+    def load(self, filename, model):
+        """Return the stored revision for a document and model, or None"""
+        try:
+            with open(self._path(filename, model), 'r', encoding='utf-8') as f:
+                revision = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Verdicts produced by an older prompt are not comparable
+        if revision.get('prompt_version') != PROMPT_VERSION:
+            return None
+        return revision
+
+    def save(self, filename, model, revision):
+        """Store the revision for a document and model, replacing the previous one atomically"""
+        path = self._path(filename, model)
+        # A unique temporary file per write, as in disk_cache.DiskCache, so concurrent saves of
+        # one document (threads or processes) never share it
+        fd, temp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix='.tmp', dir=self.store_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(revision, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+def match_items(item_texts, analyzed_items):
+    """Map item positions (1-based) to the analysis the model returned for them"""
+    by_number = {str(item.get('item_number', '')).strip(): item for item in analyzed_items}
+    by_text = {normalize_text(item.get('question_text', '')): item for item in analyzed_items}
+    matched = {}
+    for position, text in enumerate(item_texts, 1):
+        item = by_text.get(normalize_text(text)) or by_number.get(str(position))
+        if item is not None:
+            matched[position] = item
+    return matched
+
+
+def revision_item(table_number, item_texts, item):
+    """Return an item of a table's answer numbered like incremental_analysis_pipeline merges it"""
+    item = dict(item, table_number=str(table_number))
+    position = next(iter(match_items(item_texts, [item])), None)
+    if position is not None:
+        item['item_number'] = str(position)
+    return item
+
+
+def incremental_analysis_pipeline(filename, file_content, model, store):
+    """
+    Pipeline step (see app.file_analysis_pipeline) that re-analyzes only what changed since the
+    last stored revision of the same document: the preamble if its text changed, whole tables
+    that are new, and only the new or edited items of tables that were modified. Unchanged
+    verdicts are reused and the cross-table duplicate check always covers the whole survey.
+    """
+    shards = split_survey_content(file_content)
+    if not shards.tables:
+        # Nothing to diff at table level, analyze the survey as a whole
+        [analysis] = yield [{'file_content': file_content, 'model': model}]
+        return analysis
+
+    fingerprint = document_fingerprint(shards)
+    previous = store.load(filename, model)
+    if previous is None or not same_document(fingerprint, previous.get('fingerprint')):
+        # A different survey uploaded under the same file name starts from scratch
+        previous = {'preamble_hash': None, 'tables': []}
+    previous_tables = previous['tables']
+    previous_by_hash = {table['hash']: table for table in previous_tables}
+
+    calls = []
+    preamble_hash = text_hash(shards.preamble)
+    reuse_preamble = preamble_hash == previous['preamble_hash']
+    if not reuse_preamble:
+        calls.append({'file_content': file_content, 'model': model, 'messages': get_preamble_prompt(shards.preamble),
+                      'map_item': ignored_item})
+
+    # Decide per table which verdicts can be reused and which items must be sent
+    plans = []
+    for index, shard in enumerate(shards.tables):
+        item_texts = split_table_items(shard.text)
+        table_hash = text_hash(shard.text)
+        plan = {'shard': shard, 'hash': table_hash, 'item_texts': item_texts, 'reused': {}, 'call': None, 'sent': 0}
+        items_to_evaluate = []
+
+        stored = previous_by_hash.get(table_hash)
+        if stored is not None and item_texts:
+            # Unchanged table: reuse every verdict
+            stored_items = {item['position']: item['analysis'] for item in stored['items']}
+            plan['reused'] = {position: stored_items[position] for position in range(1, len(item_texts) + 1)
+                              if position in stored_items}
+            items_to_evaluate = [(str(position), text) for position, text in enumerate(item_texts, 1)
+                                 if position not in plan['reused']]
+            send_table = bool(items_to_evaluate)
+        elif index < len(previous_tables) and item_texts:
+            # Edited table: compare item by item with the table at the same position
+            stored_items = {item['text_hash']: item['analysis'] for item in previous_tables[index]['items']}
+            for position, text in enumerate(item_texts, 1):
+                analysis = stored_items.get(text_hash(text))
+                if analysis is not None:
+                    plan['reused'][position] = analysis
+                else:
+                    items_to_evaluate.append((str(position), text))
+            send_table = bool(items_to_evaluate)
+        else:
+            # New table, or one whose items could not be located: send it whole
+            send_table = True
+
+        if send_table:
+            # Only restrict the request to some items when the others already have verdicts
+            restrict = items_to_evaluate if plan['reused'] else None
+            plan['call'] = len(calls)
+            plan['sent'] = len(item_texts) - len(plan['reused'])
+            calls.append({'file_content': file_content, 'model': model, 'messages': get_table_shard_prompt(
+                shards.preamble, shard.text, shard.number, restrict),
+                'map_item': partial(revision_item, shard.number, item_texts)})
+        plans.append(plan)
+
+    summary = {
+        'tables_reused': sum(1 for plan in plans if plan['call'] is None),
+        'tables_requeried': sum(1 for plan in plans if plan['call'] is not None),
+        'items_reused': sum(len(plan['reused']) for plan in plans),
+        'items_requeried': sum(plan['sent'] for plan in plans)
+    }
+
+    analyses = (yield calls) if calls else []
+
+    preamble_analysis = previous.get('preamble_analysis', {}) if reuse_preamble else analyses[0]
+    merged = {
+        'survey_general_instructions_analysis': preamble_analysis.get('survey_general_instructions_analysis', {}),
+        'survey_parts_analysis': preamble_analysis.get('survey_parts_analysis', {}),
+        'individual_question_analysis': [],
+        'overall_assessment': preamble_analysis.get('overall_assessment', ''),
+        'recommendations': list(preamble_analysis.get('recommendations', []))
+    }
+    revision = {
+        'document': document_key(filename),
+        'prompt_version': PROMPT_VERSION,
+        'fingerprint': fingerprint,
+        # A failed preamble request is not stored so the next revision asks again
+        'preamble_hash': None if 'error' in preamble_analysis else preamble_hash,
+        'preamble_analysis': preamble_analysis,
+        'tables': []
+    }
+
+    for plan in plans:
+        shard = plan['shard']
+        table_items = dict(plan['reused'])
+        unmatched = []
+        if plan['call'] is not None:
+            analysis = analyses[plan['call']]
+            merged['recommendations'].extend(analysis.get('recommendations', []))
+            returned = analysis.get('individual_question_analysis', [])
+            matched = match_items(plan['item_texts'], returned)
+            for position, item in matched.items():
+                if position not in plan['reused']:
+                    table_items[position] = item
+            matched_ids = {id(item) for item in matched.values()}
+            unmatched = [item for item in returned if id(item) not in matched_ids]
+
+        stored_items = []
+        for position in sorted(table_items):
+            item = copy.deepcopy(table_items[position])
+            item['table_number'] = str(shard.number)
+            item['item_number'] = str(position)
+            merged['individual_question_analysis'].append(item)
+            stored_items.append({
+                'position': position,
+                'text_hash': text_hash(plan['item_texts'][position - 1]),
+                'analysis': copy.deepcopy(table_items[position])
+            })
+        for item in unmatched:
+            # Keep verdicts the model returned for items we could not locate, without storing them for reuse
+            item['table_number'] = str(shard.number)
+            merged['individual_question_analysis'].append(item)
+
+        revision['tables'].append({'hash': plan['hash'], 'items': stored_items})
+
+    # Verdicts are stored before the duplicate check, which is redone over the whole survey every time
+    store.save(filename, model, revision)
+    yield from duplicate_check_pipeline(file_content, model, merged['individual_question_analysis'])
+
+    merged['revision_summary'] = summary
+    return merged
+
+
+_revision_store = None
+_revision_store_lock = Lock()
+
+
+def get_revision_store():
+    """Return the process-wide revision store"""
+    global _revision_store
+    with _revision_store_lock:
+        if _revision_store is None:
+            _revision_store = RevisionStore()
+        return _revision_store
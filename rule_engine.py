@@ -0,0 +1,212 @@
+"""
+Local rule engine for Survey Quality Checker
+Deterministic checks of the prompt criteria that do not need a model: single complete sentence
+(criterion 6), double-barreled items (criterion 7), more than one main verb (criterion 10),
+capitalization (criterion 11) and the exact 4-3-2-1 scale text of the general instructions.
+Items are screened in one batch before the model calls; findings are attached to every item,
+and items with a failing rule can be decided locally instead of being sent to the model.
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from survey_ir import parse_survey, match_survey_items
+from duplicate_index import survey_duplicate_pairs, DUPLICATE_THRESHOLD
+
+# Findings with this severity decide an item as Not Valid; warnings are only reported
+FAIL = 'fail'
+WARN = 'warn'
+
+# Distinct item texts remembered across surveys of a batch (templates repeat the same items)
+SCREEN_CACHE_SIZE = 65536
+
+WORD = re.compile(r"[A-Za-z][A-Za-z'’-]*")
+# A sentence end followed by the start of another sentence
+SENTENCE_BREAK = re.compile(r'(\w*)[.!?]["\'”’)\]]*\s+(?=["“(]?[A-Z0-9])')
+ABBREVIATIONS = {'mr', 'mrs', 'ms', 'dr', 'prof', 'st', 'vs', 'etc', 'eg', 'ie', 'e', 'i', 'g', 'no', 'jr', 'sr'}
+TERMINAL = re.compile(r'[.!?]["\'”’)\]]*$')
+AND_OR = re.compile(r'\band\s*/\s*or\b', re.IGNORECASE)
+CONJUNCTION = re.compile(r'\b(and|or)\b', re.IGNORECASE)
+# Finite auxiliaries, copulas and modals; a second one after a coordinator starts another clause
+FINITE_VERBS = {'is', 'are', 'was', 'were', 'am', 'has', 'have', 'had', 'does', 'do', 'did', 'can', 'could',
+                'will', 'would', 'shall', 'should', 'may', 'might', 'must'}
+COORDINATORS = {'and', 'but', 'or', 'while', 'whereas', 'yet'}
+CLAUSE_TOKEN = re.compile(r"[A-Za-z']+")
+# 4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree (any separator and case)
+_SEPARATOR = r'\s*[-–—=:.)|]?\s*'
+SCALE_TEXT = re.compile(
+    rf'4{_SEPARATOR}strongly\s+agree\W+3{_SEPARATOR}agree\W+2{_SEPARATOR}disagree\W+1{_SEPARATOR}strongly\s+disagree',
+    re.IGNORECASE
+)
+SCALE_MENTION = re.compile(r'\b(strongly\s+)?(agree|disagree)\b|\bscale\b', re.IGNORECASE)
+
+CRITERIA_LABELS = {
+    6: "CRITERIA 6 - STRUCTURE ERROR",
+    7: "CRITERIA 7 - CONCEPTUAL CONFOUND",
+    10: "CRITERIA 10 - VERB ERROR",
+    11: "CRITERIA 11 - CAPITALIZATION"
+}
+
+
+@dataclass(slots=True, frozen=True)
+class RuleFinding:
+    criterion: int
+    rule: str
+    severity: str
+    message: str
+
+    def to_dict(self):
+        return {'criterion': self.criterion, 'rule': self.rule, 'severity': self.severity, 'message': self.message}
+
+
+def check_structure(text, words):
+    findings = []
+    breaks = [match for match in SENTENCE_BREAK.finditer(text)
+              if match.group(1).lower().replace('.', '') not in ABBREVIATIONS]
+    if breaks:
+        findings.append(RuleFinding(6, 'multiple_sentences', FAIL, f"Contains {len(breaks) + 1} sentences instead of one."))
+    if len(words) < 3:
+        findings.append(RuleFinding(6, 'fragment', FAIL, "Is not a complete sentence."))
+    elif not TERMINAL.search(text):
+        findings.append(RuleFinding(6, 'no_terminal_punctuation', WARN, "Does not end with a period."))
+    return findings
+
+
+def check_double_barreled(text):
+    if AND_OR.search(text):
+        return [RuleFinding(7, 'and_or', FAIL, "Uses \"and/or\", which asks about two concepts at once.")]
+    conjunctions = {match.group(1).lower() for match in CONJUNCTION.finditer(text)}
+    if conjunctions:
+        joined = '/'.join(sorted(conjunctions))
+        return [RuleFinding(7, 'conjunction', WARN, f"Joins parts with \"{joined}\" and may be double-barreled.")]
+    return []
+
+
+def check_main_verbs(text):
+    clauses = 0
+    finite = 0
+    previous = ''
+    for token in CLAUSE_TOKEN.findall(text.lower()):
+        if token in COORDINATORS:
+            if finite:
+                clauses += 1
+                finite = 0
+        elif token in FINITE_VERBS and previous not in FINITE_VERBS:
+            finite += 1
+        previous = token
+    if clauses and finite:
+        return [RuleFinding(10, 'multiple_clauses', FAIL, "Has more than one main verb (coordinated clauses).")]
+    return []
+
+
+def check_capitalization(words):
+    content_words = [word for word in words[1:] if len(word) >= 4]
+    if len(content_words) < 3:
+        return []
+    if all(word.isupper() for word in content_words):
+        return [RuleFinding(11, 'all_caps', FAIL, "Is written in capital letters.")]
+    if all(word[0].isupper() for word in content_words):
+        return [RuleFinding(11, 'title_case', FAIL, "Capitalizes the first letter of every word.")]
+    return []
+
+
+@lru_cache(maxsize=SCREEN_CACHE_SIZE)
+def screen_text(text):
+    """Return the RuleFindings of one item text as a tuple (cached, so repeated items are screened once)"""
+    text = ' '.join(text.split())
+    words = WORD.findall(text)
+    return tuple(check_structure(text, words) + check_double_barreled(text)
+                 + check_main_verbs(text) + check_capitalization(words))
+
+
+def screen_items(texts):
+    """Screen a batch of item texts (of one survey or a whole batch) and return their findings in order"""
+    return [screen_text(text) for text in texts]
+
+
+def scale_legend_text(text):
+    """Rewrite the '|' rows of a scale legend table ("| Strongly Agree | 4 |") as "4 - Strongly Agree" lines"""
+    lines = []
+    for line in text.split('\n'):
+        if line.lstrip().startswith('|'):
+            cells = [cell.strip() for cell in line.strip().strip('|').split('|') if cell.strip()]
+            numbers = [cell for cell in cells if cell.isdigit()]
+            labels = [cell for cell in cells if not cell.isdigit()]
+            if len(numbers) == 1 and labels:
+                line = f"{numbers[0]} - {labels[0]}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def check_scale(preamble):
+    """
+    Check the general instructions for the exact 4-3-2-1 Likert scale text, written out or as a
+    legend table (DOCX legend tables stay in the preamble, see sharding.is_item_table)
+    """
+    preamble = scale_legend_text(preamble)
+    match = SCALE_TEXT.search(preamble)
+    return {
+        'scale_correctly_defined': match is not None,
+        'scale_definition_text': match.group(0) if match else '',
+        'scale_mentioned': match is not None or SCALE_MENTION.search(preamble) is not None
+    }
+
+
+def rule_verdict(findings):
+    """Return the local Not Valid verdict of an item with failing findings, or None if a model must decide"""
+    failed = [finding for finding in findings if finding.severity == FAIL]
+    if not failed:
+        return None
+    reason = ' '.join(f"{CRITERIA_LABELS[finding.criterion]}: {finding.message}" for finding in failed)
+    return {'validity': 'Not Valid', 'reason': reason, 'alternative_question': '', 'duplicates_with': [],
+            'decided_by_rules': True}
+
+
+@dataclass(slots=True)
+class RuleScreening:
+    survey: object
+    findings: dict = field(default_factory=dict)
+    scale: dict = field(default_factory=dict)
+    duplicate_pairs: list = field(default_factory=list)
+
+    def decided(self):
+        """Return the local verdicts of the items a failing rule already decides, keyed by item ID"""
+        verdicts = {}
+        for identifier, findings in self.findings.items():
+            verdict = rule_verdict(findings)
+            if verdict is not None:
+                verdicts[identifier] = verdict
+        return verdicts
+
+    def summary(self):
+        """Return the survey-level outcome recorded in the file analysis"""
+        return dict(self.scale,
+                    items=len(self.findings),
+                    failed_items=sum(1 for findings in self.findings.values()
+                                     if any(finding.severity == FAIL for finding in findings)),
+                    warned_items=sum(1 for findings in self.findings.values()
+                                     if any(finding.severity == WARN for finding in findings)),
+                    near_duplicate_pairs=sum(1 for pair in self.duplicate_pairs if pair[2] >= DUPLICATE_THRESHOLD))
+
+
+def screen_survey(file_content, survey=None):
+    """
+    Parse a survey (unless its SurveyIR is given) and screen all of its items in one batch,
+    including the near-duplicate pairs of the local similarity index
+    """
+    survey = survey or parse_survey(file_content)
+    items = survey.items()
+    findings = dict(zip((item.id for item in items), screen_items([item.text for item in items])))
+    preamble = '\n'.join(f"{section.title}\n{section.text}" for section in survey.sections)
+    return RuleScreening(survey, findings, check_scale(preamble), survey_duplicate_pairs(survey))
+
+
+def attach_rule_findings(items, screening):
+    """
+    Attach the findings of the screening to analyzed items, matched to the survey's items by
+    question ID or text (see survey_ir.match_survey_items); unmatched items get no findings
+    """
+    for item, survey_item in zip(items, match_survey_items(screening.survey, items)):
+        findings = screening.findings.get(survey_item.id, ()) if survey_item is not None else ()
+        item['rule_findings'] = [finding.to_dict() for finding in findings]
@@ -0,0 +1,249 @@
+"""
+Table-level sharding for Survey Quality Checker
+Splits extracted survey content into the general instructions/parts section plus one shard
+per variable table, analyzes the shards in parallel and merges them into one analysis
+"""
+
+import re
+from functools import partial
+from dataclasses import dataclass, field
+
+from prompts import get_preamble_prompt, get_table_shard_prompt, get_duplicate_check_prompt
+
+# "Table 1: Service Quality" headings in TXT surveys and PDF extraction output
+TABLE_HEADING = re.compile(r'^\s*Table\s+\d+\b', re.IGNORECASE)
+# Rows of DOCX tables, written by extraction.iter_docx_fragments below their variable heading
+TABLE_ROW = re.compile(r'^\s*\|')
+# "1. The staff were courteous." style numbered items
+NUMBERED_ITEM = re.compile(r'^\s*(\d+)\s*[.)]\s*(.+)$')
+# Words of a cell; survey items are sentences, scale legend rows ("Strongly Agree") are not
+WORD = re.compile(r'[A-Za-z]+')
+MIN_STATEMENT_WORDS = 3
+
+# Model used for the cross-table duplicate check, which only compares short item texts
+DUPLICATE_CHECK_MODEL_ID = 'deepseek-chat'
+DUPLICATE_REASON = "CRITERIA 1 - DUPLICATION: Substantially identical in meaning to"
+
+
+@dataclass
+class TableShard:
+    number: int
+    text: str
+
+
+@dataclass
+class SurveyShards:
+    preamble: str
+    tables: list = field(default_factory=list)
+
+
+def row_cells(line):
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+
+def is_statement(text):
+    """True if a table cell reads like a survey item: numbered, a sentence, or several words"""
+    return bool(NUMBERED_ITEM.match(text)) or text.rstrip().endswith(('.', '?', '!')) or \
+        len(WORD.findall(text)) >= MIN_STATEMENT_WORDS
+
+
+def is_item_table(row_lines):
+    """
+    True if '|' rows hold survey items: a stem row followed by rows whose first cell with words is
+    mostly a statement. Scale legends and other layout tables ("| 4 | Strongly Agree |") are not.
+    """
+    texts = [next((cell for cell in row_cells(line) if WORD.search(cell)), '') for line in row_lines[1:]]
+    texts = [text for text in texts if text]
+    return bool(texts) and sum(1 for text in texts if is_statement(text)) * 2 > len(texts)
+
+
+def split_survey_content(content):
+    """
+    Split extracted survey content into the preamble and one shard per table. A table starts at
+    a "Table N" heading, or at a run of '|' rows (DOCX tables) that takes the line directly
+    above it as its heading and ends at the next blank line. Row tables that do not hold survey
+    items (see is_item_table), such as a scale legend, stay in the preamble.
+    """
+    preamble_lines = []
+    tables = []
+    current = None
+    in_row_table = False
+
+    def end_row_table():
+        if not is_item_table([line for line in current if TABLE_ROW.match(line)]):
+            tables.pop()
+            preamble_lines.extend(current)
+
+    for line in content.split('\n'):
+        if TABLE_HEADING.match(line):
+            if in_row_table:
+                end_row_table()
+            current = [line]
+            tables.append(current)
+            in_row_table = False
+        elif TABLE_ROW.match(line) and (current is None or in_row_table):
+            if current is None:
+                current = []
+                if preamble_lines and preamble_lines[-1].strip():
+                    # The paragraph directly above a DOCX table is its variable name and definition
+                    current.append(preamble_lines.pop())
+                tables.append(current)
+                in_row_table = True
+            current.append(line)
+        elif in_row_table:
+            # A blank line ends the current DOCX table
+            end_row_table()
+            current = None
+            in_row_table = False
+            preamble_lines.append(line)
+        elif current is not None:
+            current.append(line)
+        else:
+            preamble_lines.append(line)
+    if in_row_table:
+        end_row_table()
+
+    return SurveyShards(
+        preamble='\n'.join(preamble_lines).strip(),
+        tables=[TableShard(number, '\n'.join(lines).strip()) for number, lines in enumerate(tables, 1)]
+    )
+
+
+def split_table_items(table_text):
+    """
+    Return the item texts of a table shard in order. Rows of DOCX/PDF tables use the first
+    cell containing words (the first row is the stem); text tables use numbered lines.
+    """
+    lines = [line.strip() for line in table_text.split('\n') if line.strip()]
+    if lines and TABLE_HEADING.match(lines[0]):
+        lines = lines[1:]
+
+    row_lines = [line for line in lines if '|' in line]
+    if row_lines:
+        items = []
+        for line in row_lines[1:]:
+            cells = row_cells(line)
+            text = next((cell for cell in cells if re.search(r'[A-Za-z]', cell)), '')
+            if text:
+                match = NUMBERED_ITEM.match(text)
+                items.append(match.group(2).strip() if match else text)
+        return items
+
+    numbered = [NUMBERED_ITEM.match(line) for line in lines]
+    if any(numbered):
+        return [match.group(2).strip() for match in numbered if match]
+    return lines
+
+
+def table_stem(table_text):
+    """Return the heading and, for DOCX/PDF tables, the stem row of a table shard"""
+    lines = [line.strip() for line in table_text.split('\n') if line.strip()]
+    stem = []
+    if lines and '|' not in lines[0]:
+        stem.append(lines.pop(0))
+    row_lines = [line for line in lines if '|' in line]
+    if row_lines:
+        stem.append(row_lines[0])
+    return '\n'.join(stem)
+
+
+def item_id(item):
+    """Return a stable identifier for an analyzed item from its table and item numbers"""
+    return f"T{item.get('table_number', '?')}-{item.get('item_number', '?')}"
+
+
+def ignored_item(item):
+    """map_item for calls whose items the merge leaves out (the preamble and the duplicate check)"""
+    return None
+
+
+def shard_item(table_number, item):
+    """Return an item of a table shard's answer numbered by the table's position in the survey"""
+    # Number tables by their position in the survey so items from different shards never collide
+    return dict(item, table_number=str(table_number))
+
+
+def merge_shard_analyses(shards, preamble_analysis, table_analyses):
+    """Merge the preamble analysis and the per-table analyses into one model analysis"""
+    merged = {
+        'survey_general_instructions_analysis': preamble_analysis.get('survey_general_instructions_analysis', {}),
+        'survey_parts_analysis': preamble_analysis.get('survey_parts_analysis', {}),
+        'individual_question_analysis': [],
+        'overall_assessment': preamble_analysis.get('overall_assessment', ''),
+        'recommendations': list(preamble_analysis.get('recommendations', []))
+    }
+
+    for shard, analysis in zip(shards.tables, table_analyses):
+        merged['individual_question_analysis'].extend(
+            shard_item(shard.number, item) for item in analysis.get('individual_question_analysis', []))
+        merged['recommendations'].extend(analysis.get('recommendations', []))
+
+    return merged
+
+
+def apply_duplicate_groups(items, duplicate_groups, items_by_id=None):
+    """
+    Record cross-table duplicates found by the final pass. Every item in a group lists the
+    others in duplicates_with; all but the first occurrence are marked Not Valid. Group members
+    are item_id()s of items unless items_by_id maps them to the items.
+    """
+    if items_by_id is None:
+        items_by_id = {item_id(item): item for item in items}
+
+    for group in duplicate_groups:
+        members = [items_by_id[member] for member in group if member in items_by_id]
+        if len(members) < 2:
+            continue
+        for position, item in enumerate(members):
+            known = {(d.get('table_number'), d.get('item_number')) for d in item.get('duplicates_with', [])}
+            duplicates = item.setdefault('duplicates_with', [])
+            for other in members:
+                key = (other.get('table_number'), other.get('item_number'))
+                if other is item or key in known:
+                    continue
+                duplicates.append({
+                    'table_number': other.get('table_number'),
+                    'item_number': other.get('item_number'),
+                    'question_text': other.get('question_text', '')
+                })
+            if position > 0 and str(item.get('validity', '')).lower() != 'not valid':
+                first = members[0]
+                item['validity'] = 'Not Valid'
+                item['reason'] = (f"{item.get('reason', '')} {DUPLICATE_REASON} "
+                                  f"Table {first.get('table_number')}, Item {first.get('item_number')}.").strip()
+
+
+def duplicate_check_pipeline(file_content, model, items):
+    """Pipeline step that runs the cheap cross-table duplicate check over every item of a survey"""
+    if len(items) > 1:
+        check_model = dict(model, model_id=model.get('duplicate_check_model_id', DUPLICATE_CHECK_MODEL_ID), stream=False)
+        messages = get_duplicate_check_prompt([(item_id(item), item.get('question_text', '')) for item in items])
+        [duplicate_check] = yield [{'file_content': file_content, 'model': check_model, 'messages': messages,
+                                    'map_item': ignored_item}]
+        apply_duplicate_groups(items, duplicate_check.get('duplicate_groups') or [])
+
+
+def sharded_analysis_pipeline(file_content, model):
+    """
+    Pipeline step (see app.file_analysis_pipeline) that analyzes one survey with one model,
+    sending the preamble and every table concurrently, then a cheap duplicate check across tables.
+    Surveys with fewer than two tables are sent as a single request.
+    """
+    shards = split_survey_content(file_content)
+    if len(shards.tables) < 2:
+        [analysis] = yield [{'file_content': file_content, 'model': model}]
+        return analysis
+
+    calls = [{'file_content': file_content, 'model': model, 'messages': get_preamble_prompt(shards.preamble),
+              'map_item': ignored_item}]
+    calls.extend(
+        {'file_content': file_content, 'model': model,
+         'messages': get_table_shard_prompt(shards.preamble, shard.text, shard.number),
+         'map_item': partial(shard_item, shard.number)}
+        for shard in shards.tables
+    )
+    analyses = yield calls
+    merged = merge_shard_analyses(shards, analyses[0], analyses[1:])
+
+    yield from duplicate_check_pipeline(file_content, model, merged['individual_question_analysis'])
+    return merged
@@ -0,0 +1,190 @@
+"""
+Streaming support for Survey Quality Checker
+Decodes server-sent events from the chat completions API, emits each
+individual_question_analysis entry as soon as its JSON object is complete,
+and appends streamed entries to an on-disk partial result
+"""
+
+import os
+import json
+from threading import Lock
+
+ITEMS_KEY = 'individual_question_analysis'
+
+# Where streamed and completed analysis results are written (override with SQ_CHECKER_RESULTS_DIR)
+RESULTS_DIR = os.environ.get('SQ_CHECKER_RESULTS_DIR', 'results')
+
+
+def sse_content_deltas(lines, status=None):
+    """
+    Yield the content text of each chat completion chunk from an iterable of SSE lines.
+    status (a dict) records whether the [DONE] event arrived ('done') and the last finish_reason.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        # Blank lines separate events, lines starting with ':' are keep-alive comments
+        if not line or line.startswith(':') or not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            if status is not None:
+                status['done'] = True
+            return
+        chunk = json.loads(data)
+        choices = chunk.get('choices') or []
+        if choices:
+            if status is not None and choices[0].get('finish_reason'):
+                status['finish_reason'] = choices[0]['finish_reason']
+            # Reasoner models stream reasoning_content first; only the answer content is parsed
+            content = (choices[0].get('delta') or {}).get('content')
+            if content:
+                yield content
+
+
+def stream_completed(status):
+    """True if a stream read with sse_content_deltas ended with [DONE] and was not cut at the output limit"""
+    return bool(status.get('done')) and status.get('finish_reason') != 'length'
+
+
+class IncrementalItemParser:
+    """
+    Incrementally scans a streamed JSON document and returns each element of the top-level
+    individual_question_analysis array once its closing brace arrives. Braces inside string
+    literals are ignored and any text before the first '{' (such as a markdown fence) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.items = []
+        self._text = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._current_key = None
+        self._in_items = False
+        self._item_start = None
+
+    def feed(self, text):
+        """Consume the next chunk of text and return the list of newly completed items"""
+        self.buffer.append(text)
+        self._text += text
+        completed = []
+        text = self._text
+        i = self._pos
+
+        while i < len(text):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start + 1:i]
+            elif self._depth == 0:
+                # Skip any preamble until the document starts
+                if char == '{':
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ':' and self._depth == 1:
+                self._current_key = self._last_string
+            elif char == ',' and self._depth == 1:
+                self._current_key = None
+            elif char in '{[':
+                self._depth += 1
+                if char == '[' and self._depth == 2 and self._current_key == ITEMS_KEY:
+                    self._in_items = True
+                elif char == '{' and self._in_items and self._depth == 3:
+                    self._item_start = i
+            elif char in '}]':
+                if char == '}' and self._in_items and self._depth == 3 and self._item_start is not None:
+                    try:
+                        item = json.loads(text[self._item_start:i + 1])
+                        completed.append(item)
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = None
+                elif char == ']' and self._in_items and self._depth == 2:
+                    self._in_items = False
+                self._depth -= 1
+            i += 1
+
+        # Only an unfinished item or top-level key still needs its text; drop the rest
+        if self._item_start is not None:
+            shift = self._item_start
+        elif self._in_string and self._depth == 1:
+            shift = self._string_start
+        else:
+            shift = len(text)
+        self._text = text[shift:]
+        self._pos = i - shift
+        self._string_start -= shift
+        if self._item_start is not None:
+            self._item_start -= shift
+
+        self.items.extend(completed)
+        return completed
+
+    def content(self):
+        """Return all text received so far"""
+        return ''.join(self.buffer)
+
+
+def result_name(filename):
+    """Flatten a survey name that is a relative path ("2024/a/survey.docx") into one file name component"""
+    return filename.replace('\\', '/').replace('/', '__')
+
+
+class StreamingResultWriter:
+    """Appends streamed items to results/<filename>.partial.jsonl and writes the final result JSON"""
+
+    def __init__(self, results_dir=RESULTS_DIR):
+        self.results_dir = results_dir
+        self._lock = Lock()
+        os.makedirs(self.results_dir, exist_ok=True)
+
+    def partial_path(self, filename):
+        return os.path.join(self.results_dir, f"{result_name(filename)}.partial.jsonl")
+
+    def result_path(self, filename):
+        return os.path.join(self.results_dir, f"analysis_result_{result_name(filename)}.json")
+
+    def append_item(self, filename, item):
+        """Append one streamed item, flushed immediately so a crash keeps it"""
+        with self._lock:
+            with open(self.partial_path(filename), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+                f.flush()
+
+    def load_partial_items(self, filename):
+        """Return the items streamed so far for a file"""
+        items = []
+        try:
+            with open(self.partial_path(filename), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        items.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Ignore a line cut off by a crash mid-write
+                        pass
+        except FileNotFoundError:
+            pass
+        return items
+
+    def finalize(self, filename, result):
+        """Write the completed result and remove the partial file"""
+        with self._lock:
+            with open(self.result_path(filename), 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+            try:
+                os.remove(self.partial_path(filename))
+            except FileNotFoundError:
+                pass
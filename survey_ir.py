@@ -0,0 +1,270 @@
+"""
+Structured survey representation for Survey Quality Checker
+Parses extracted survey content locally into sections, variables and tables with stems and
+stable item IDs, so the model is sent a compact outline, returns verdicts keyed by item ID
+(without echoing item text, table or variable) and the verdicts merge back deterministically
+"""
+
+import re
+from functools import partial
+from dataclasses import dataclass, field
+
+from prompts import get_structured_survey_prompt
+from sharding import split_survey_content, split_table_items, item_id, NUMBERED_ITEM
+from revisions import normalize_text
+
+# "General Instructions:", "Part 2: Variables", "Introduction:" lines that open a preamble section
+SECTION_HEADING = re.compile(r'^\s*(General\s+Instructions|Instructions|Introduction|Part\s+(\d+|[IVX]+))\b', re.IGNORECASE)
+# "Table 1: Service Quality" headings; the rest of the line names the variable
+TABLE_TITLE = re.compile(r'^\s*Table\s+\d+\s*[:.\-]?\s*(.*)$', re.IGNORECASE)
+# "Service Quality: Measures customer perception" variable definitions and DOCX table headings
+VARIABLE_DEFINITION = re.compile(r'^\s*([^:|]{1,80}?)\s*(?::|\s[-–]\s)\s*(.+)$')
+# Locally found near-duplicate pairs listed in the outline for the model to confirm
+MAX_DUPLICATE_HINTS = 50
+
+
+@dataclass(slots=True)
+class SurveySection:
+    title: str
+    text: str
+
+
+@dataclass(slots=True)
+class SurveyVariable:
+    name: str
+    definition: str = ''
+
+
+@dataclass(slots=True)
+class SurveyItem:
+    id: str
+    table_number: str
+    item_number: str
+    text: str
+
+
+@dataclass(slots=True)
+class SurveyTable:
+    number: str
+    variable: SurveyVariable
+    stem: str = ''
+    items: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class SurveyIR:
+    sections: list = field(default_factory=list)
+    variables: list = field(default_factory=list)
+    tables: list = field(default_factory=list)
+
+    def items(self):
+        """Return every table item in survey order"""
+        return [item for table in self.tables for item in table.items]
+
+    def item_index(self):
+        """Return the items keyed by their ID"""
+        return {item.id: item for table in self.tables for item in table.items}
+
+
+def parse_sections(preamble):
+    """Split the preamble into sections at "General Instructions" / "Part N" style headings"""
+    sections = []
+    title, lines = '', []
+    for line in preamble.split('\n'):
+        if SECTION_HEADING.match(line):
+            if title or any(part.strip() for part in lines):
+                sections.append(SurveySection(title, '\n'.join(lines).strip()))
+            title, lines = line.strip(), []
+        else:
+            lines.append(line)
+    if title or any(part.strip() for part in lines):
+        sections.append(SurveySection(title, '\n'.join(lines).strip()))
+    return sections
+
+
+def parse_variable(text):
+    """Return the SurveyVariable of a "Name: definition" line; a line without a definition is just a name"""
+    match = VARIABLE_DEFINITION.match(text)
+    if match:
+        return SurveyVariable(match.group(1).strip(), match.group(2).strip())
+    return SurveyVariable(text.strip())
+
+
+def parse_table(number, table_text, definitions):
+    """Return the SurveyTable of one table shard; definitions maps variable names to Part 2/3 definitions"""
+    lines = [line.strip() for line in table_text.split('\n') if line.strip()]
+    heading = lines.pop(0) if lines and '|' not in lines[0] else ''
+    title = TABLE_TITLE.match(heading)
+    variable = parse_variable(title.group(1) if title else heading)
+    if not variable.definition:
+        variable.definition = definitions.get(normalize_text(variable.name), '')
+
+    row_lines = [line for line in lines if '|' in line]
+    if row_lines:
+        stem = ' '.join(cell.strip() for cell in row_lines[0].strip('|').split('|') if cell.strip())
+    else:
+        # Text tables: the lines between the heading and the first numbered item
+        stem_lines = []
+        for line in lines:
+            if NUMBERED_ITEM.match(line):
+                break
+            stem_lines.append(line)
+        stem = ' '.join(stem_lines) if len(stem_lines) < len(lines) else ''
+
+    table_number = str(number)
+    items = [SurveyItem(item_id({'table_number': table_number, 'item_number': str(position)}),
+                        table_number, str(position), text)
+             for position, text in enumerate(split_table_items(table_text), 1)]
+    return SurveyTable(table_number, variable, stem, items)
+
+
+def parse_survey(content):
+    """
+    Parse extracted survey content (TXT, PDF or DOCX extraction output) into a SurveyIR. Only
+    tables of statements become SurveyTables; a scale legend or other layout table stays in the
+    text of its preamble section (see sharding.is_item_table).
+    """
+    shards = split_survey_content(content)
+    sections = parse_sections(shards.preamble)
+
+    variables = []
+    for section in sections:
+        if section.title.lower().startswith('part'):
+            variables.extend(parse_variable(line) for line in section.text.split('\n')
+                             if VARIABLE_DEFINITION.match(line))
+    definitions = {normalize_text(variable.name): variable.definition for variable in variables}
+
+    tables = [parse_table(shard.number, shard.text, definitions) for shard in shards.tables]
+    known = set(definitions)
+    for table in tables:
+        key = normalize_text(table.variable.name)
+        if key and key not in known:
+            known.add(key)
+            variables.append(table.variable)
+
+    return SurveyIR(sections, variables, tables)
+
+
+def render_survey_ir(survey, decided=(), duplicate_pairs=()):
+    """
+    Return the compact outline of a SurveyIR that is sent to the model. Items whose IDs are in
+    decided are marked "[decided]" and kept as context for the duplication check only;
+    duplicate_pairs, (item_id, item_id, similarity) from duplicate_index.py, are listed as hints.
+    """
+    blocks = []
+    for section in survey.sections:
+        blocks.append('\n'.join(part for part in (section.title, section.text) if part))
+    for table in survey.tables:
+        heading = f"Table {table.number}"
+        if table.variable.name:
+            heading += f" - {table.variable.name}"
+        lines = [heading]
+        if table.variable.definition:
+            lines.append(f"Definition: {table.variable.definition}")
+        lines.append(f"Stem: {table.stem}" if table.stem else "Stem: (none)")
+        lines.extend(f"{item.id} [decided]: {item.text}" if item.id in decided else f"{item.id}: {item.text}"
+                     for item in table.items)
+        blocks.append('\n'.join(lines))
+    if duplicate_pairs:
+        hints = [f"{key_a} ~ {key_b}" for key_a, key_b, _ in duplicate_pairs[:MAX_DUPLICATE_HINTS]]
+        blocks.append("Possible duplicates found by wording (confirm or reject): " + ', '.join(hints))
+    return '\n\n'.join(blocks)
+
+
+def _verdict_id(verdict, items_by_id):
+    for key in ('item_id', 'question_id'):
+        value = str(verdict.get(key) or '').strip()
+        if value in items_by_id:
+            return value
+    # Models that ignore the outline IDs still number items by table and position
+    return item_id(verdict)
+
+
+def expand_verdicts(survey, verdicts):
+    """
+    Return verdicts keyed by item ID as full individual_question_analysis entries (table and item
+    numbers, variable name and question text filled in from the IR), in survey order. Unknown and
+    repeated IDs are dropped.
+    """
+    items_by_id = survey.item_index()
+    variables = {table.number: table.variable.name for table in survey.tables}
+    expanded = {}
+    for verdict in verdicts:
+        key = _verdict_id(verdict, items_by_id)
+        item = items_by_id.get(key)
+        if item is None or key in expanded:
+            continue
+        duplicates = []
+        for reference in verdict.get('duplicates_with', []):
+            other = items_by_id.get(_verdict_id(reference, items_by_id))
+            if other is not None and other is not item:
+                duplicates.append({'table_number': other.table_number, 'item_number': other.item_number,
+                                   'question_text': other.text})
+        entry = {name: value for name, value in verdict.items() if name not in ('item_id', 'question_id')}
+        entry.update(question_id=item.id, table_number=item.table_number, item_number=item.item_number,
+                     variable_name=variables[item.table_number], question_text=item.text,
+                     duplicates_with=duplicates)
+        expanded[key] = entry
+    return [expanded[item.id] for item in survey.items() if item.id in expanded]
+
+
+def expand_verdict(survey, verdict):
+    """Return one ID-keyed verdict expanded like expand_verdicts does, or None if its ID is unknown"""
+    expanded = expand_verdicts(survey, [verdict])
+    return expanded[0] if expanded else None
+
+
+def match_survey_items(survey, analyzed_items):
+    """
+    Return the SurveyItem each analyzed item refers to, or None, in the order of analyzed_items.
+    survey is a SurveyIR or a list of its SurveyItems. Items are matched by question_id, then by
+    normalized question text, and only then by table and item number, since a model's numbering
+    (continuous across tables, or counting tables differently) need not follow the IR's positional
+    IDs. Every SurveyItem is matched at most once.
+    """
+    survey_items = survey.items() if isinstance(survey, SurveyIR) else list(survey)
+    items_by_id = {item.id: item for item in survey_items}
+    by_text = {}
+    for item in survey_items:
+        by_text.setdefault(normalize_text(item.text), []).append(item)
+
+    matched = [None] * len(analyzed_items)
+    used = set()
+    for index, analyzed in enumerate(analyzed_items):
+        item = items_by_id.get(str(analyzed.get('question_id') or '').strip())
+        if item is None or item.id in used:
+            item = next((candidate for candidate in by_text.get(normalize_text(analyzed.get('question_text') or ''), ())
+                         if candidate.id not in used), None)
+        if item is not None:
+            matched[index] = item
+            used.add(item.id)
+    for index, analyzed in enumerate(analyzed_items):
+        item = items_by_id.get(item_id(analyzed))
+        if matched[index] is None and item is not None and item.id not in used:
+            matched[index] = item
+            used.add(item.id)
+    return matched
+
+
+def structured_analysis_pipeline(file_content, model, screening=None):
+    """
+    Pipeline step (see app.file_analysis_pipeline) that analyzes one survey with one model from
+    its parsed outline, with verdicts keyed by item ID. Surveys without tables are sent as is.
+    With a rule_engine.RuleScreening and model['skip_rule_decided'] set, items a local rule already
+    decided are not evaluated by the model and get the local verdict.
+    """
+    survey = screening.survey if screening is not None else parse_survey(file_content)
+    if not survey.tables:
+        [analysis] = yield [{'file_content': file_content, 'model': model}]
+        return analysis
+
+    decided = screening.decided() if screening is not None and model.get('skip_rule_decided', False) else {}
+    duplicate_pairs = screening.duplicate_pairs if screening is not None else ()
+    messages = get_structured_survey_prompt(render_survey_ir(survey, decided, duplicate_pairs), bool(decided))
+    [analysis] = yield [{'file_content': file_content, 'model': model, 'messages': messages,
+                         'map_item': partial(expand_verdict, survey)}]
+    # Local verdicts come first so they win over any answer the model still returned for those items
+    verdicts = [dict(verdict, item_id=identifier) for identifier, verdict in decided.items()]
+    verdicts.extend(analysis.get('individual_question_analysis', []))
+    analysis['individual_question_analysis'] = expand_verdicts(survey, verdicts)
+    return analysis
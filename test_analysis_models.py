@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Test script to verify that model responses are validated into typed analyses with coerced values and defaults
+"""
+
+import io
+import json
+
+from docx import Document
+
+from analysis_models import validate_analysis, normalize_analysis, normalize_items
+from app import parse_model_content, render_docx_bytes
+
+LOOSE_RESPONSE = {
+    "survey_general_instructions_analysis": {"instructions_present": "true", "scale_correctly_defined": "False",
+                                             "issues_found": None, "recommendations": "Define the scale"},
+    "survey_parts_analysis": None,
+    "individual_question_analysis": [
+        {"table_number": 1, "item_number": 2, "question_text": "The staff were courteous and helpful.",
+         "validity": "not valid", "reason": None, "duplicates_with": [{"table_number": 2, "item_number": "1"}, "T2-1"]},
+        {"table_number": "1", "item_number": "1", "question_text": "The service was timely.", "validity": None,
+         "model_verdicts": [{"model_name": "A", "validity": "Valid"}]}
+    ],
+    "recommendations": None
+}
+
+def test_coercion_and_defaults():
+    """Test that booleans, numbers, nulls and missing fields are normalized once"""
+    analysis = validate_analysis(LOOSE_RESPONSE)
+
+    general = analysis.survey_general_instructions_analysis
+    assert general.instructions_present is True and general.scale_correctly_defined is False, "String booleans should be coerced"
+    assert general.issues_found == [] and general.recommendations == ["Define the scale"], "Lists should be normalized"
+    assert analysis.survey_parts_analysis.part_2_has_only_definitions is False, "Missing sections should get defaults"
+
+    first, second = analysis.individual_question_analysis
+    assert (first.table_number, first.item_number) == ("1", "2"), "Item numbers should be strings"
+    assert first.validity == "Not Valid" and first.is_not_valid and first.reason == "", "Validity should be canonical"
+    assert [(d.table_number, d.item_number) for d in first.duplicates_with] == [("2", "1")], "Malformed duplicates should be dropped"
+    assert second.validity == "" and not second.is_valid and not second.is_not_valid, "A null verdict should not crash"
+    assert analysis.overall_assessment == "" and analysis.recommendations == [], "Top-level defaults should be filled"
+
+    normalized = normalize_analysis(LOOSE_RESPONSE)
+    assert normalized['individual_question_analysis'][1]['model_verdicts'][0]['model_name'] == "A", "Unknown keys should be kept"
+    assert json.loads(json.dumps(normalized)) == normalized, "Normalized analyses should stay JSON serializable"
+    assert validate_analysis(analysis) is analysis, "Typed analyses should not be validated again"
+    assert normalize_items([{"validity": "Valid"}, "garbage"]) == [normalize_items([{"validity": "Valid"}])[0]], "Only dict items are kept"
+
+    print("[PASS] Coercion and defaults test passed")
+
+def test_parse_and_report():
+    """Test that parsed responses are normalized and loose values render in the DOCX report"""
+    analysis = parse_model_content(json.dumps(LOOSE_RESPONSE))
+    assert analysis['survey_general_instructions_analysis']['instructions_present'] is True, "Parsed responses should be normalized"
+    assert analysis['individual_question_analysis'][0]['validity'] == "Not Valid", "Parsed items should be normalized"
+
+    listed = parse_model_content('[{"validity": "Valid"}]')
+    assert listed['individual_question_analysis'] == [] and listed['recommendations'], "A bare array is not an analysis"
+
+    report = Document(io.BytesIO(render_docx_bytes(LOOSE_RESPONSE, "survey.txt")))
+    assert report.paragraphs, "The report should be rendered"
+
+    print("[PASS] Parse and report test passed")
+
+def run_tests():
+    """Run all analysis model tests"""
+    print("Testing analysis validation...")
+
+    test_coercion_and_defaults()
+    test_parse_and_report()
+
+    print("\n[SUCCESS] All analysis model tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
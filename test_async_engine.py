@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Test script to verify that the asyncio engine analyzes files concurrently within the provider limit
+"""
+
+import asyncio
+import time
+import threading
+
+from async_engine import AsyncAnalysisEngine, analyze_files, engine_metrics
+from app import analyze_single_file, run_pipeline, MAX_ANALYSIS_WORKERS
+from mock_llm_server import MockLLMServer
+from test_support import isolated_caches, make_model, make_upload
+
+RESPONSE_DELAY = 0.3  # seconds per simulated model call
+
+SAMPLE_ANALYSIS = {
+    "survey_general_instructions_analysis": {"instructions_present": True},
+    "survey_parts_analysis": {"part_2_has_only_definitions": True},
+    "individual_question_analysis": [
+        {"table_number": "2", "item_number": "1", "question_text": "The staff were courteous.", "validity": "Valid"},
+        {"table_number": "1", "item_number": "1", "question_text": "The food was fresh.", "validity": "Valid"}
+    ],
+    "overall_assessment": "Good survey",
+    "recommendations": ["Keep it up"]
+}
+
+class SlowAnswer:
+    """Answers like a model that takes RESPONSE_DELAY seconds and tracks peak concurrency"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def __call__(self, payload):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(RESPONSE_DELAY)
+        with self.lock:
+            self.in_flight -= 1
+        return SAMPLE_ANALYSIS
+
+def make_files(count):
+    return [make_upload(f"Survey {i}\nTable 1: Service Quality\n1. The staff were courteous.", f"survey_{i}.txt")
+            for i in range(count)]
+
+def test_results_match_threaded_path():
+    """Test that the engine returns the same result dicts as analyze_single_file"""
+    with isolated_caches(), MockLLMServer(answer=lambda payload: SAMPLE_ANALYSIS) as server:
+        model = make_model(server.url)
+        async_result = analyze_files(make_files(1), [model])[0]
+        sync_result = analyze_single_file(make_files(1)[0], [model])
+
+        assert async_result['filename'] == sync_result['filename'], "Filenames should match"
+        for key in ['individual_question_analysis', 'survey_general_instructions_analysis',
+                    'survey_parts_analysis', 'recommendations', 'overall_assessment']:
+            assert async_result['analysis'][key] == sync_result['analysis'][key], f"{key} should match"
+        assert [q['table_number'] for q in async_result['analysis']['individual_question_analysis']] == ["1", "2"], "Items should be sorted"
+
+    print("[PASS] Async results match threaded results")
+
+def test_files_run_concurrently():
+    """Test that a batch finishes in about one call's latency, not ceil(n/4) calls"""
+    answer = SlowAnswer()
+    with isolated_caches(), MockLLMServer(answer=answer) as server:
+        start = time.perf_counter()
+        results = analyze_files(make_files(12), [make_model(server.url)])
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 12, "Every file should produce a result"
+        assert [r['filename'] for r in results] == [f"survey_{i}.txt" for i in range(12)], "Results should keep input order"
+        assert answer.peak == 12, f"All calls should be in flight at once, peak was {answer.peak}"
+        assert elapsed < RESPONSE_DELAY * 3, f"Batch took {elapsed:.2f}s, expected close to {RESPONSE_DELAY}s"
+
+    print(f"[PASS] 12 files analyzed concurrently in {elapsed:.2f}s")
+
+def test_provider_concurrency_limit():
+    """Test that in-flight requests never exceed the configured per-provider limit"""
+    answer = SlowAnswer()
+    with isolated_caches(), MockLLMServer(answer=answer) as server:
+        engine = AsyncAnalysisEngine(provider_concurrency={'deepseek': 3})
+        before = engine_metrics()
+        completed = []
+        results = asyncio.run(engine.analyze_files(make_files(9), [make_model(server.url)],
+                                                   on_result=lambda f, r: completed.append(f.name)))
+
+        assert len(results) == 9 and len(completed) == 9, "Every file should complete"
+        assert answer.peak <= 3, f"Peak concurrency {answer.peak} exceeded the limit"
+        assert engine.requests == 9, "One request per file expected"
+        assert engine_metrics()['requests'] - before['requests'] == 9, "Finished runs should add to the shared counters"
+
+    print("[PASS] Provider concurrency limit respected")
+
+def test_threaded_batches_bounded():
+    """Test that the threaded pipeline runs a large batch of calls on at most MAX_ANALYSIS_WORKERS threads"""
+    lock = threading.Lock()
+    counts = {'in_flight': 0, 'peak': 0}
+
+    def call(index):
+        with lock:
+            counts['in_flight'] += 1
+            counts['peak'] = max(counts['peak'], counts['in_flight'])
+        time.sleep(0.05)
+        with lock:
+            counts['in_flight'] -= 1
+        return index
+
+    def pipeline():
+        results = yield [{'index': index} for index in range(12)]
+        return results
+
+    assert run_pipeline(pipeline(), call=call) == list(range(12)), "Results should keep the order of the calls"
+    assert counts['peak'] <= MAX_ANALYSIS_WORKERS, f"Peak of {counts['peak']} threads exceeded the worker limit"
+
+    print("[PASS] Threaded batches bounded")
+
+def test_unreadable_file_reports_error():
+    """Test that files that cannot be processed come back as error results"""
+    with isolated_caches():
+        results = analyze_files([make_upload(b"data", "survey.xyz")], [make_model("http://127.0.0.1:9/")])
+
+        assert 'error' in results[0], "Unsupported file should produce an error result"
+
+    print("[PASS] Unreadable file reported as error")
+
+def run_tests():
+    """Run all async engine tests"""
+    print("Testing asyncio analysis engine...")
+
+    test_results_match_threaded_path()
+    test_files_run_concurrently()
+    test_provider_concurrency_limit()
+    test_threaded_batches_bounded()
+    test_unreadable_file_reports_error()
+
+    print("\n[SUCCESS] All async engine tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
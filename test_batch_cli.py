@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Test script to verify the headless batch CLI analyzes a directory and resumes interrupted runs
+"""
+
+import os
+import json
+import tempfile
+
+from batch_cli import main, collect_survey_files, relative_names, SUMMARY_FILENAME
+from mock_llm_server import MockLLMServer
+from test_support import RecordingAnswer, isolated_caches
+
+SAMPLE_ANALYSIS = {
+    "survey_general_instructions_analysis": {"instructions_present": True},
+    "individual_question_analysis": [
+        {"table_number": "1", "item_number": "1", "question_text": "The staff were courteous.", "validity": "Valid"},
+        {"table_number": "1", "item_number": "2", "question_text": "The food was hot and tasty.", "validity": "Not Valid"}
+    ],
+    "overall_assessment": "Mostly good",
+    "recommendations": ["Split item 2"]
+}
+
+def batch_answer(payload):
+    """Answers every request with SAMPLE_ANALYSIS"""
+    if "Broken survey" in payload['messages'][-1]['content']:
+        # A request the provider rejects: the analysis only holds a model error
+        return 400
+    return SAMPLE_ANALYSIS
+
+def make_surveys(survey_dir):
+    for i in range(3):
+        with open(os.path.join(survey_dir, f"survey_{i}.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"Survey {i}\nTable 1: Service\n1. The staff were courteous.\n2. The food was hot and tasty.\n")
+    with open(os.path.join(survey_dir, "notes.md"), 'w', encoding='utf-8') as f:
+        f.write("not a survey")
+
+def test_collect_survey_files():
+    """Test that directories and globs expand to supported survey files only"""
+    with tempfile.TemporaryDirectory() as survey_dir:
+        make_surveys(survey_dir)
+        assert [os.path.basename(p) for p in collect_survey_files([survey_dir])] == ["survey_0.txt", "survey_1.txt", "survey_2.txt"], "Directory should list surveys"
+        assert len(collect_survey_files([os.path.join(survey_dir, "survey_[01].txt")])) == 2, "Globs should be expanded"
+
+    print("[PASS] Collect survey files test passed")
+
+def test_batch_run_and_resume():
+    """Test a full batch run, then resuming with nothing and with one missing report"""
+    with isolated_caches(), tempfile.TemporaryDirectory() as survey_dir, tempfile.TemporaryDirectory() as output_dir:
+        make_surveys(survey_dir)
+        answer = RecordingAnswer(batch_answer)
+        server = MockLLMServer(answer=answer).start()
+        args = [survey_dir, '--output', output_dir, '--jobs', '2', '--no-cache', '--no-stream', '--items', 'csv',
+                '--endpoint', server.url]
+        os.environ['DEEPSEEK_API_KEY'] = "test"
+        try:
+            assert main(args) == 0, "Batch run should succeed"
+            assert len(answer.requests) == 3, f"Each survey should be analyzed once, got {len(answer.requests)}"
+            for i in range(3):
+                assert os.path.exists(os.path.join(output_dir, f"analysis_result_survey_{i}.txt.json")), "JSON result should be written"
+                assert os.path.exists(os.path.join(output_dir, f"quality_report_survey_{i}.txt.docx")), "DOCX report should be written"
+
+            with open(os.path.join(output_dir, SUMMARY_FILENAME), 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+            assert summary['totals']['analyzed'] == 3 and summary['totals']['failed'] == 0, f"Unexpected totals {summary['totals']}"
+            assert summary['files'][0]['items'] == 2 and summary['files'][0]['not_valid'] == 1, "Item counts should be reported"
+            assert 'extract_seconds' in summary['files'][0], "Timings should be reported"
+            assert summary['files'][0]['shared_items'] == 2 and summary['totals']['shared_item_groups'] == 2, "Items shared across surveys should be counted"
+            with open(os.path.join(output_dir, "items.csv"), 'r', encoding='utf-8') as f:
+                assert len(f.readlines()) == 7 and summary['totals']['items_exported'] == 6, "Every item should have a row"
+
+            # Resume after an interruption that lost one report: no model calls, only the report is rebuilt
+            os.remove(os.path.join(output_dir, "quality_report_survey_1.txt.docx"))
+            answer.requests = []
+            assert main(args + ['--resume']) == 0, "Resumed run should succeed"
+            assert not answer.requests, "Resumed run should not call the model again"
+            assert os.path.exists(os.path.join(output_dir, "quality_report_survey_1.txt.docx")), "Missing report should be rebuilt"
+            with open(os.path.join(output_dir, SUMMARY_FILENAME), 'r', encoding='utf-8') as f:
+                assert json.load(f)['totals']['skipped'] == 3, "All files should be skipped on resume"
+            with open(os.path.join(output_dir, "items.csv"), 'r', encoding='utf-8') as f:
+                assert len(f.readlines()) == 7, "Skipped files should not be appended again"
+        finally:
+            del os.environ['DEEPSEEK_API_KEY']
+            server.stop()
+
+    print("[PASS] Batch run and resume test passed")
+
+def test_same_names_in_folders():
+    """Test that same-named surveys in different folders get separate results, and model errors fail a file"""
+    with isolated_caches(), tempfile.TemporaryDirectory() as survey_dir, tempfile.TemporaryDirectory() as output_dir:
+        for folder, first_line in [("class_a", "Survey A"), ("class_b", "Survey B"), ("class_c", "Broken survey")]:
+            os.makedirs(os.path.join(survey_dir, folder))
+            with open(os.path.join(survey_dir, folder, "survey.txt"), 'w', encoding='utf-8') as f:
+                f.write(f"{first_line}\nTable 1: Service\n1. The staff were courteous.\n")
+        paths = collect_survey_files([os.path.join(survey_dir, "**", "*.txt")])
+        assert relative_names(paths) == ["class_a/survey.txt", "class_b/survey.txt", "class_c/survey.txt"], "Names should keep their folder"
+        assert relative_names(paths[:1]) == ["survey.txt"], "A single folder should give plain file names"
+
+        server = MockLLMServer(answer=batch_answer).start()
+        os.environ['DEEPSEEK_API_KEY'] = "test"
+        try:
+            assert main([os.path.join(survey_dir, "**", "*.txt"), '--output', output_dir, '--jobs', '1', '--no-cache',
+                         '--no-stream', '--endpoint', server.url]) == 1, \
+                "A file with only model errors should fail the run"
+            with open(os.path.join(output_dir, SUMMARY_FILENAME), 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+            assert [entry['filename'] for entry in summary['files']] == relative_names(paths), "Every file should have its own entry"
+            assert [entry['status'] for entry in summary['files']] == ['analyzed', 'analyzed', 'failed'], f"Unexpected statuses {summary['files']}"
+            for folder in ("class_a", "class_b"):
+                assert os.path.exists(os.path.join(output_dir, f"analysis_result_{folder}__survey.txt.json")), "Each result should be kept"
+                assert os.path.exists(os.path.join(output_dir, f"quality_report_{folder}__survey.txt.docx")), "Each report should be kept"
+            assert not os.path.exists(os.path.join(output_dir, "analysis_result_class_c__survey.txt.json")), \
+                "A failed file should have no result so --resume retries it"
+        finally:
+            del os.environ['DEEPSEEK_API_KEY']
+            server.stop()
+
+    print("[PASS] Same names in folders test passed")
+
+def run_tests():
+    """Run all batch CLI tests"""
+    print("Testing headless batch CLI...")
+
+    test_collect_survey_files()
+    test_batch_run_and_resume()
+    test_same_names_in_folders()
+
+    print("\n[SUCCESS] All batch CLI tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
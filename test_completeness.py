@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Test script to verify that items a model skipped are re-requested on their own and merged back
+"""
+
+import re
+
+from completeness import expected_items, find_missing_items
+from app import analyze_single_file
+from mock_llm_server import MockLLMServer
+from test_support import RecordingAnswer, isolated_caches, make_model, make_upload
+
+SURVEY = """General Instructions:
+Please rate each statement using the following scale:
+4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree
+
+Table 1: Service Quality
+1. The staff were courteous and helpful.
+2. The service was timely.
+3. The waiters knew the menu.
+
+Table 2: Atmosphere
+1. The restaurant had a pleasant atmosphere.
+2. The seats were comfortable.
+"""
+
+# Items the first (full survey) answer leaves out
+SKIPPED = {("1", "3"), ("2", "2")}
+
+def verdict(table_number, item_number, text):
+    return {"table_number": table_number, "item_number": item_number, "question_text": text,
+            "validity": "Not Valid" if " and " in text else "Valid", "reason": "checked", "duplicates_with": []}
+
+def skipping_answer(payload):
+    """Leaves SKIPPED out of the full analysis and answers follow-ups for the listed items only"""
+    user_message = payload['messages'][-1]['content']
+    if 'skipped some items' in user_message:
+        table_number = re.search(r'items of Table (\d+)', user_message).group(1)
+        requested = re.findall(r'^(\d+): (.+)$', user_message, re.MULTILINE)
+        items = [verdict(table_number, number, text) for number, text in requested]
+    else:
+        items = [verdict(str(table), str(number), text) for table, number, text in [
+            (1, 1, "The staff were courteous and helpful."), (1, 2, "The service was timely."),
+            (1, 3, "The waiters knew the menu."), (2, 1, "The restaurant had a pleasant atmosphere."),
+            (2, 2, "The seats were comfortable.")] if (str(table), str(number)) not in SKIPPED]
+    return {"survey_general_instructions_analysis": {"instructions_present": True}, "survey_parts_analysis": {},
+            "individual_question_analysis": items, "overall_assessment": "Good", "recommendations": []}
+
+def test_find_missing_items():
+    """Test that items are matched one to one by question ID, by their text or by (table, item) number"""
+    expected = expected_items(SURVEY)
+    assert len(expected) == 5, f"Every survey item should be expected, got {len(expected)}"
+
+    analyzed = [verdict("1", "1", "x"), {"table_number": "9", "item_number": "9", "question_text": "The Service was  timely."}]
+    missing = [(item['table_number'], item['item_number']) for item in find_missing_items(expected, analyzed)]
+    assert missing == [("1", "3"), ("2", "1"), ("2", "2")], f"Unexpected missing items {missing}"
+
+    # Renumbered across tables and reworded, but answered by ID; a reused number counts for one item only
+    analyzed = [{"question_id": "T1-3", "table_number": "1", "item_number": "7", "question_text": "Waiters know the menu"},
+                {"table_number": "2", "item_number": "1", "question_text": "The seats were comfortable."}]
+    missing = [(item['table_number'], item['item_number']) for item in find_missing_items(expected, analyzed)]
+    assert missing == [("1", "1"), ("1", "2"), ("2", "1")], f"Unexpected missing items {missing}"
+
+    print("[PASS] Missing item detection test passed")
+
+def test_follow_up_for_missing_items():
+    """Test that only the skipped items are re-sent, per table, and merged back in order"""
+    answer = RecordingAnswer(skipping_answer)
+    with isolated_caches(), MockLLMServer(answer=answer) as server:
+        analysis = analyze_single_file(make_upload(SURVEY), [make_model(server.url)])['analysis']
+
+        messages = [payload['messages'][-1]['content'] for payload in answer.requests]
+        follow_ups = [message for message in messages if 'skipped some items' in message]
+        assert len(messages) == 3 and len(follow_ups) == 2, "One follow-up per table with missing items"
+        table_1 = next(message for message in follow_ups if 'items of Table 1' in message)
+        assert "3: The waiters knew the menu." in table_1, "The missing item should be sent"
+        assert "The service was timely" not in table_1, "Analyzed items should not be re-sent"
+        assert "Table 1: Service Quality" in table_1, "The table's heading should be sent with the items"
+
+        items = analysis['individual_question_analysis']
+        assert [(q['table_number'], q['item_number']) for q in items] == [("1", "1"), ("1", "2"), ("1", "3"), ("2", "1"), ("2", "2")], "Recovered items should be merged in order"
+        completeness = analysis['models_used'][0]['analysis']['completeness']
+        assert completeness == {'expected_items': 5, 'missing_items': 2, 'recovered_items': 2, 'still_missing': []}, f"Unexpected report {completeness}"
+
+        answer.requests = []
+        analysis = analyze_single_file(make_upload(SURVEY), [make_model(server.url, follow_up_missing=False)])['analysis']
+        assert len(answer.requests) == 1, "No follow-up should be sent when disabled"
+        assert len(analysis['models_used'][0]['analysis']['completeness']['still_missing']) == 2, "Missing items should still be reported"
+
+    print("[PASS] Follow-up for missing items test passed")
+
+def run_tests():
+    """Run all completeness tests"""
+    print("Testing completeness follow-ups...")
+
+    test_find_missing_items()
+    test_follow_up_for_missing_items()
+
+    print("\n[SUCCESS] All completeness tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Test script to verify that selected models run concurrently and are merged into one verdict per item
+"""
+
+import time
+
+from consensus import consensus_items
+from app import analyze_single_file
+from mock_llm_server import MockLLMConfig, MockLLMServer
+from test_support import isolated_caches, make_model, make_upload
+
+RESPONSE_DELAY = 0.5
+
+def make_item(table_number, item_number, validity, reason="checked", duplicates_with=None):
+    return {"table_number": table_number, "item_number": item_number, "question_text": f"Item {table_number}-{item_number}",
+            "validity": validity, "reason": reason, "duplicates_with": duplicates_with or []}
+
+# Each model (selected by its model_id) returns its own verdicts, in its own order
+MODEL_ITEMS = {
+    "a": [make_item("2", "1", "Valid"), make_item("1", "1", "Valid"), make_item("1", "2", "Not Valid", "double-barreled")],
+    "b": [make_item("1", "1", "Valid"), make_item("1", "2", "Valid"), make_item("2", "1", "Not Valid", "leading")],
+    "c": [make_item("1", "1", "Not Valid", "vague"), make_item("1", "2", "Not Valid", "two ideas"), make_item("2", "1", "Valid")]
+}
+
+def model_answer(payload):
+    """Answers with the items of the model named in the request"""
+    model = payload['model']
+    return {"individual_question_analysis": MODEL_ITEMS[model], "overall_assessment": f"Model {model}",
+            "recommendations": [f"From {model}"]}
+
+def make_voter(name, weight=1.0):
+    return {"name": name, "weight": weight}
+
+def test_majority_consensus():
+    """Test that verdicts are merged per item by majority and every model's verdict is kept"""
+    models = [make_voter("A"), make_voter("B"), make_voter("C")]
+    analyses = [{"individual_question_analysis": MODEL_ITEMS[model_id]} for model_id in ("a", "b", "c")]
+
+    items = {(q['table_number'], q['item_number']): q for q in consensus_items(models, analyses)}
+
+    assert len(items) == 3, "There should be one record per item"
+    assert items[("1", "1")]['validity'] == "Valid", "Two of three models found item 1-1 valid"
+    assert items[("1", "2")]['validity'] == "Not Valid" and items[("1", "2")]['reason'] == "double-barreled", "Reason should come from the first agreeing model"
+    assert [v['model_name'] for v in items[("2", "1")]['model_verdicts']] == ["A", "B", "C"], "Every model's verdict should be kept"
+
+    print("[PASS] Majority consensus test passed")
+
+def test_weighted_consensus():
+    """Test that model weights decide the verdict, ties are flagged as Not Valid and weights must be positive"""
+    analyses = [{"individual_question_analysis": [make_item("1", "1", "Valid", duplicates_with=[{"table_number": "2", "item_number": "1"}])]},
+                {"individual_question_analysis": [make_item("1", "1", "Not Valid")]}]
+
+    weighted = consensus_items([make_voter("A", 2.0), make_voter("B")], analyses)
+    assert weighted[0]['validity'] == "Valid", "The heavier model should win"
+    assert weighted[0]['duplicates_with'] == [{"table_number": "2", "item_number": "1"}], "Duplicates should be combined"
+
+    tied = consensus_items([make_voter("A"), make_voter("B")], analyses)
+    assert tied[0]['validity'] == "Not Valid", "Ties should be flagged for review"
+
+    for weight in (0.0, -1.0):
+        try:
+            consensus_items([make_voter("A", weight), make_voter("B", weight)], [analyses[0], analyses[0]])
+            assert False, f"Weight {weight} should be rejected"
+        except ValueError:
+            pass
+
+    single = consensus_items([make_voter("A")], analyses[:1])
+    assert single == analyses[0]['individual_question_analysis'] and 'model_verdicts' not in single[0], "A single model should be unchanged"
+
+    print("[PASS] Weighted consensus test passed")
+
+def test_models_run_concurrently():
+    """Test that a file analyzed by three models takes the time of one model call"""
+    with isolated_caches(), MockLLMServer(MockLLMConfig(latency=RESPONSE_DELAY), answer=model_answer) as server:
+        models = [make_model(server.url, name=f"Model {model_id}", model_id=model_id) for model_id in ("a", "b", "c")]
+
+        start = time.perf_counter()
+        analysis = analyze_single_file(make_upload("Survey content"), models)['analysis']
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < RESPONSE_DELAY * 2, f"Models should run concurrently, took {elapsed:.2f}s"
+        assert len(analysis['models_used']) == 3, "Every model should be recorded"
+        assert [(q['table_number'], q['item_number']) for q in analysis['individual_question_analysis']] == [("1", "1"), ("1", "2"), ("2", "1")], "Items should be merged and sorted by table"
+        assert analysis['recommendations'] == ["From a", "From b", "From c"], "Recommendations should be kept in model order"
+
+    print("[PASS] Concurrent models test passed")
+
+def run_tests():
+    """Run all consensus tests"""
+    print("Testing multi-model consensus...")
+
+    test_majority_consensus()
+    test_weighted_consensus()
+    test_models_run_concurrently()
+
+    print("\n[SUCCESS] All consensus tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
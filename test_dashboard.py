@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Test script to verify the batch dashboard aggregates and that they are cached until the loaded
+results change
+"""
+
+import numpy as np
+
+from dashboard import build_item_table, BatchDashboard, get_batch_dashboard
+
+def item(table, number, validity, reason="", variable="Service", verdicts=None):
+    record = {'table_number': table, 'item_number': number, 'variable_name': variable, 'validity': validity, 'reason': reason}
+    if verdicts:
+        record['model_verdicts'] = [{'validity': verdict} for verdict in verdicts]
+    return record
+
+RESULTS = [
+    {'filename': "a.txt", 'analysis': {'individual_question_analysis': [
+        item("1", "1", "Valid", verdicts=["Valid", "Valid"]),
+        item("1", "2", "Not Valid", "CRITERIA 7 - x; CRITERIA 10 - y", verdicts=["Not Valid", "Valid"]),
+        item("2", "1", "Not Valid", "CRITERIA 7 - x", variable="Food")
+    ]}},
+    {'filename': "b.txt", 'analysis': {'individual_question_analysis': [
+        item("1", "1", "Valid", "Meets CRITERIA 7 - one idea"),
+        item("1", "2", "Not Valid", "CRITERIA 1 - DUPLICATION")
+    ]}},
+    {'filename': "empty.txt", 'analysis': {'individual_question_analysis': []}}
+]
+
+def test_aggregates():
+    """Test per-file scores, criterion rates, breakdowns and model agreement"""
+    dashboard = BatchDashboard(build_item_table(RESULTS))
+
+    files = dashboard.file_scores
+    assert files['file'] == ["a.txt", "b.txt", "empty.txt"] and list(files['items']) == [3, 2, 0], f"Unexpected files {files}"
+    assert np.allclose(files['score'], [100 / 3, 50.0, 0.0]), "Scores should match the report's Question Quality Score"
+    assert files['model_agreement'][0] == 50.0 and np.isnan(files['model_agreement'][1]), "Agreement is only defined for compared items"
+
+    criteria = dashboard.criteria_rates
+    assert criteria['criterion'] == ["CRITERIA 1", "CRITERIA 7", "CRITERIA 10"], f"Unexpected criteria {criteria['criterion']}"
+    assert list(criteria['failures']) == [1, 2, 1] and list(criteria['files']) == [1, 1, 1], "Failures should be counted per criterion"
+    assert np.allclose(criteria['rate_of_items'], [20.0, 40.0, 20.0]) and np.allclose(criteria['rate_of_invalid'], [100 / 3, 200 / 3, 100 / 3]), "Rates should be percentages"
+
+    variables = dashboard.variable_breakdown
+    assert variables['variable_name'] == ["Service", "Food"] and list(variables['not_valid']) == [2, 1], f"Unexpected variables {variables}"
+    tables = dashboard.table_breakdown
+    assert tables['table_number'] == ["1", "2"] and np.allclose(tables['invalid_rate'], [50.0, 100.0]), f"Unexpected tables {tables}"
+
+    assert dashboard.totals == {'files': 3, 'items': 5, 'valid': 2, 'not_valid': 3, 'score': 40.0,
+                                'compared_items': 2, 'model_agreement': 50.0}, f"Unexpected totals {dashboard.totals}"
+
+    print("[PASS] Aggregates test passed")
+
+def test_cached_until_results_change():
+    """Test that thousands of loaded files are aggregated once and served from the cache on reruns"""
+    analysis = RESULTS[0]['analysis']
+    results = [{'filename': f"survey_{number}.txt", 'analysis': {'individual_question_analysis': analysis['individual_question_analysis'] * 20}}
+               for number in range(3000)]
+
+    dashboard = get_batch_dashboard(results)
+    assert dashboard.totals['items'] == 180000, f"Unexpected item count {dashboard.totals['items']}"
+
+    assert get_batch_dashboard(list(results)) is dashboard, "Unchanged results should reuse the dashboard"
+
+    changed = results[:-1] + [{'filename': "new.txt", 'analysis': {'individual_question_analysis': []}}]
+    assert get_batch_dashboard(changed).totals['files'] == 3000 and get_batch_dashboard(changed) is not dashboard, "Changed results should be aggregated again"
+
+    print("[PASS] Cached until results change test passed")
+
+def run_tests():
+    """Run all dashboard tests"""
+    print("Testing batch dashboard...")
+
+    test_aggregates()
+    test_cached_until_results_change()
+
+    print("\n[SUCCESS] All dashboard tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
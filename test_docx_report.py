@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Test script to verify that the bulk DOCX writer produces the same report as building every
+question table through python-docx
+"""
+
+import io
+
+from docx import Document
+from lxml import etree
+
+import docx_report
+from app import build_docx_report, render_docx_bytes
+from bench_docx_report import append_question_sections_cell_by_cell
+
+QUESTIONS = [
+    {"table_number": "1", "item_number": "1", "question_text": "The staff were courteous.", "validity": "Valid",
+     "reason": "Meets all criteria"},
+    {"table_number": "1", "item_number": "2", "variable_name": "Service", "question_text": " Prices <and/or> portions\twere\nfair & good ",
+     "validity": "Not Valid", "reason": "CRITERIA 7 - DOUBLE-BARRELED", "alternative_question": "Prices were fair.",
+     "duplicates_with": [{"table_number": "2", "item_number": "1"}, {"table_number": "", "item_number": "3"}]},
+    {"validity": "", "question_text": "", "alternative_question": "Only shown for invalid items"}
+]
+
+def body_xml(doc):
+    """Return the body elements after the metadata paragraph (which holds the generated-on time)"""
+    return [etree.tostring(element) for element in doc.element.body[2:]]
+
+def test_same_document():
+    """Test that bulk and cell-by-cell reports have identical XML, across batch boundaries"""
+    analysis = {"individual_question_analysis": QUESTIONS * 3, "overall_assessment": "Mixed.", "recommendations": []}
+    expected = body_xml(build_docx_report(analysis, "survey.txt", append_question_sections_cell_by_cell))
+
+    assert body_xml(build_docx_report(analysis, "survey.txt")) == expected, "Bulk output should match python-docx"
+    original_batch = docx_report.QUESTION_BATCH
+    try:
+        docx_report.QUESTION_BATCH = 2
+        assert body_xml(build_docx_report(analysis, "survey.txt")) == expected, "Batches should not change the output"
+    finally:
+        docx_report.QUESTION_BATCH = original_batch
+
+    empty = {"individual_question_analysis": [], "overall_assessment": "None.", "recommendations": []}
+    assert body_xml(build_docx_report(empty, "survey.txt")) == body_xml(build_docx_report(empty, "survey.txt", append_question_sections_cell_by_cell)), "Reports without questions should match"
+
+    print("[PASS] Same document test passed")
+
+def test_report_reads_back():
+    """Test that bulk-written tables read back through python-docx"""
+    analysis = {"individual_question_analysis": QUESTIONS, "overall_assessment": "Mixed.", "recommendations": []}
+    doc = Document(io.BytesIO(render_docx_bytes(analysis, "survey.txt")))
+
+    question_tables = doc.tables[2:]
+    assert len(question_tables) == 3, f"Expected one table per question, got {len(question_tables)}"
+    rows = {row.cells[0].text: row.cells[1].text for row in question_tables[1].rows}
+    assert rows['Question Text'] == " Prices <and/or> portions\twere\nfair & good ", "Text should survive escaping"
+    assert rows['Suggested Alternative'] == "Prices were fair." and rows['Duplicates With'] == "Table 2, Item 1; Table N/A, Item 3", f"Unexpected rows {rows}"
+    assert 'Suggested Alternative' not in {row.cells[0].text for row in question_tables[2].rows}, "Alternatives are only shown for invalid items"
+
+    print("[PASS] Report reads back test passed")
+
+def run_tests():
+    """Run all DOCX report tests"""
+    print("Testing bulk DOCX writer...")
+
+    test_same_document()
+    test_report_reads_back()
+
+    print("\n[SUCCESS] All DOCX report tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Test script to verify that near-duplicate items are found locally, within a survey and across
+a batch, and recorded in duplicates_with
+"""
+
+import random
+
+from duplicate_index import DuplicateIndex, shingles, jaccard, duplicate_groups
+from mock_llm_server import MockLLMServer
+from app import analyze_single_file
+from test_support import isolated_caches, make_model, make_upload
+
+SURVEY = """General Instructions:
+Please rate each statement using the following scale:
+4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree
+
+Table 1: Service Quality
+1. The waiters were polite.
+2. The service was timely.
+
+Table 2: Atmosphere
+1. The restaurant had a pleasant atmosphere.
+2. The waiter was polite.
+3. The waiters were friendly.
+"""
+
+def test_similarity():
+    """Test that wording variants share shingles and unrelated items do not"""
+    assert shingles("The service was timely.") == shingles("The services were timely!"), "Inflections and stopwords should not matter"
+    assert jaccard(shingles("The staff were polite and helpful."), shingles("The staff were courteous and helpful.")) == 0.5, "One changed word of three"
+
+    index = DuplicateIndex()
+    index.add_many([("a", "The staff were polite and helpful."), ("b", "The service was timely."),
+                    ("c", "The staff were helpful and polite."), ("d", "The staff were courteous and helpful."),
+                    ("e", "The staff were polite and helpful.")])
+    assert len(index) == 5, "Every key should be indexed"
+    pairs = [(a, b) for a, b, _ in index.pairs()]
+    assert pairs[:3] == [("a", "c"), ("a", "e"), ("c", "e")] and ("a", "d") in pairs, f"Unexpected pairs {pairs}"
+    assert all("b" not in pair for pair in pairs), "Unrelated items should not pair"
+    assert index.groups() == [["a", "c", "e"]], f"Unexpected groups {index.groups()}"
+    assert duplicate_groups(index.pairs(), ["e", "d", "c", "b", "a"]) == [["e", "c", "a"]], "Groups should follow the given order"
+
+    print("[PASS] Similarity test passed")
+
+def test_batch_scale():
+    """Test that planted duplicates are found among thousands of items without comparing every pair"""
+    generator = random.Random(7)
+    words = [f"word{i}" for i in range(3000)]
+    texts = [' '.join(generator.sample(words, 8)) + '.' for _ in range(5000)]
+    index = DuplicateIndex()
+    index.add_many(enumerate(texts))
+    planted = {(number, 5000 + number) for number in range(0, 5000, 250)}
+    for original, copy in planted:
+        index.add(copy, texts[original].rstrip('.') + ' indeed.')
+
+    found = {(a, b) for a, b, similarity in index.pairs(0.8)}
+    assert planted <= found and len(found) == len(planted), f"Expected only the planted pairs, got {len(found)}"
+
+    print("[PASS] Batch scale test passed")
+
+def test_duplicates_recorded():
+    """Test that near-duplicates within a survey are recorded and hinted to the model"""
+    with isolated_caches():
+        with MockLLMServer() as server:
+            analysis = analyze_single_file(make_upload(SURVEY), [make_model(server.url)], mode='structured')['analysis']
+
+        items = {(q['table_number'], q['item_number']): q for q in analysis['individual_question_analysis']}
+        assert items[("2", "2")]['duplicates_with'][0]['item_number'] == "1" and "DUPLICATION" in items[("2", "2")]['reason'], "The later copy should be marked"
+        assert items[("1", "1")]['duplicates_with'][0]['table_number'] == "2", "The original should list its copy"
+        assert not items[("2", "3")]['duplicates_with'], "Hinted pairs below the threshold are left to the model"
+        assert analysis['rule_screening']['near_duplicate_pairs'] == 1, "The pair count should be recorded"
+
+    print("[PASS] Duplicates recorded test passed")
+
+def continuous_numbering_answer(payload):
+    """Answers like a model that numbers the items of SURVEY continuously across tables"""
+    texts = [("1", "The waiters were polite."), ("1", "The service was timely."),
+             ("2", "The restaurant had a pleasant atmosphere."), ("2", "The waiter was polite."),
+             ("2", "The waiters were friendly.")]
+    return {"individual_question_analysis": [
+        {"table_number": table_number, "item_number": str(number), "question_text": text,
+         "validity": "Valid", "reason": "Clear statement", "duplicates_with": []}
+        for number, (table_number, text) in enumerate(texts, 1)]}
+
+def test_duplicates_matched_by_text():
+    """Test that local duplicate groups reach items numbered differently by the model, and can be turned off"""
+    with isolated_caches():
+        with MockLLMServer(answer=continuous_numbering_answer) as server:
+            results = {}
+            for local_duplicates in (True, False):
+                model = make_model(server.url, local_duplicates=local_duplicates)
+                analysis = analyze_single_file(make_upload(SURVEY), [model])['analysis']
+                results[local_duplicates] = {q['question_text']: q for q in analysis['individual_question_analysis']}
+
+        copy = results[True]["The waiter was polite."]
+        assert "DUPLICATION" in copy['reason'] and copy['validity'] == "Not Valid", "The copy numbered 2-4 by the model should be marked"
+        assert copy['duplicates_with'][0]['question_text'] == "The waiters were polite.", "It should point at the original"
+        assert all(q['validity'] == "Valid" and not q['duplicates_with'] for q in results[False].values()), \
+            "With local duplicates off only the model decides"
+
+    print("[PASS] Duplicates matched by text test passed")
+
+def run_tests():
+    """Run all duplicate index tests"""
+    print("Testing near-duplicate index...")
+
+    test_similarity()
+    test_batch_scale()
+    test_duplicates_recorded()
+    test_duplicates_matched_by_text()
+
+    print("\n[SUCCESS] All duplicate index tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
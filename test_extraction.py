@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""
+Test script to verify streaming extraction and that PDFs are extracted in page-range shards
+and reassembled in page order
+"""
+
+import io
+import json
+import concurrent.futures
+
+import fitz
+from docx import Document
+
+import extraction
+from extraction import (
+    extract_pdf_text,
+    page_ranges,
+    page_has_ruling_lines,
+    page_has_grid_text,
+    collect_fragments,
+    ExtractionLimitError
+)
+from sharding import split_survey_content, split_table_items
+from app import process_uploaded_file, extract_uploaded_file
+from test_support import isolated_caches, make_upload
+
+def make_pdf(pages, table_every=3):
+    """Return a PDF whose pages carry their number, with a ruled two-column table on every table_every-th page"""
+    pdf_document = fitz.open()
+    for number in range(1, pages + 1):
+        page = pdf_document.new_page()
+        page.insert_text((72, 72), f"Page {number} heading")
+        if number % table_every == 0:
+            for row in range(2):
+                for column in range(2):
+                    cell = fitz.Rect(72 + column * 200, 100 + row * 20, 272 + column * 200, 120 + row * 20)
+                    page.draw_rect(cell)
+                    page.insert_text((cell.x0 + 4, cell.y0 + 14), f"p{number}r{row}c{column}")
+    data = pdf_document.tobytes()
+    pdf_document.close()
+    return data
+
+def test_page_ranges():
+    """Test that page ranges cover every page once, in order"""
+    ranges = page_ranges(50, 4)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 50, "Ranges should cover the document"
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])), "Ranges should be contiguous"
+    assert len(ranges) == 4, f"One range per worker, got {len(ranges)}"
+    assert page_ranges(5, 8) == [(0, 4), (4, 5)], "Ranges should not be smaller than the minimum shard"
+
+    print("[PASS] Page range test passed")
+
+def test_table_detection_prefilter():
+    """Test that only pages with ruling lines or grid-like text are handed to table detection"""
+    pdf_document = fitz.open(stream=make_pdf(3), filetype="pdf")
+    plain, ruled = pdf_document.load_page(0), pdf_document.load_page(2)
+    assert not page_has_ruling_lines(plain) and not page_has_grid_text(plain), "A text-only page has no table"
+    assert page_has_ruling_lines(ruled), "A ruled table should be detected"
+
+    grid = pdf_document.new_page()
+    for row in range(4):
+        for column in range(3):
+            grid.insert_text((72 + column * 150, 100 + row * 20), f"cell{row}{column}")
+    assert page_has_grid_text(grid), "Columns of text should count as a grid"
+    pdf_document.close()
+
+    print("[PASS] Table detection prefilter test passed")
+
+def test_parallel_extraction_matches_serial():
+    """Test that sharded extraction returns the same text, in page order, as a serial pass"""
+    data = make_pdf(24)
+    serial = extract_pdf_text(data)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=3) as executor:
+        parallel = extract_pdf_text(data, executor=executor, workers=3)
+
+    assert parallel == serial, "Parallel extraction should match serial extraction"
+    positions = [serial.index(f"Page {number} heading") for number in range(1, 25)]
+    assert positions == sorted(positions), "Pages should be in order"
+    assert "p3r0c0 | p3r0c1" in serial and serial.index("p3r1c1") < serial.index("Page 4 heading"), "Tables should follow their page"
+
+    print("[PASS] Parallel extraction test passed")
+
+def test_process_uploaded_pdf():
+    """Test that uploaded PDFs go through the sharded extractor"""
+    with isolated_caches():
+        original_min_pages = extraction.PDF_PARALLEL_MIN_PAGES
+        extraction.PDF_PARALLEL_MIN_PAGES = 1
+        try:
+            content = process_uploaded_file(make_upload(make_pdf(6), "survey.pdf"))
+        finally:
+            extraction.PDF_PARALLEL_MIN_PAGES = original_min_pages
+
+        assert "Page 6 heading" in content and "p6r1c0 | p6r1c1" in content, "Text and tables should be extracted"
+
+    print("[PASS] Uploaded PDF test passed")
+
+def make_docx():
+    doc = Document()
+    doc.add_paragraph("General Instructions:")
+    doc.add_paragraph("   ")
+    doc.add_paragraph("Table 1: Service Quality")
+    table = doc.add_table(rows=2, cols=2)
+    for row_index, row in enumerate(table.rows):
+        for column, cell in enumerate(row.cells):
+            cell.text = f"r{row_index}c{column}"
+    doc.add_table(rows=1, cols=1).rows[0].cells[0].text = "second"
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def test_streamed_formats():
+    """Test that each file type streams to the same text the whole-file extraction produced"""
+    with isolated_caches():
+        text = "General Instructions:\r\nTable 1: Service\n1. The staff were courteous. \u2713\n"
+        assert process_uploaded_file(make_upload(text.encode('utf-8'), "survey.txt")) == text, "TXT should be unchanged"
+
+        data = {"items": ["The staff were courteous \u2713", {"n": 1}], "title": "Survey"}
+        assert process_uploaded_file(make_upload(json.dumps(data).encode('utf-8'), "survey.json")) == json.dumps(data, indent=2), "JSON should be indented"
+
+        csv_data = 'item,text\n1,"The staff, overall, were courteous"\n2,Clean\n'
+        assert process_uploaded_file(make_upload(csv_data.encode('utf-8'), "survey.csv")) == 'item,text\n1,The staff, overall, were courteous\n2,Clean', "CSV rows should be comma-joined"
+
+        content, stats = extract_uploaded_file(make_upload(make_docx(), "survey.docx"))
+        assert content == ("General Instructions:\nTable 1: Service Quality\n"
+                           "| r0c0 | r0c1 |\n| r1c0 | r1c1 |\n\n| second |\n"), f"Unexpected DOCX text {content!r}"
+        assert stats['fragments'] == 7 and stats['extracted_chars'] == len(content), f"Unexpected stats {stats}"
+
+    print("[PASS] Streamed formats test passed")
+
+def test_docx_document_order():
+    """Test that DOCX tables follow their variable heading and merged cells appear once"""
+    with isolated_caches():
+        doc = Document()
+        doc.add_paragraph("General Instructions: rate each statement")
+        doc.add_paragraph("")
+        for variable in ("Service Quality", "Atmosphere"):
+            doc.add_paragraph(f"{variable}: how customers perceive it")
+            table = doc.add_table(rows=3, cols=3)
+            table.cell(0, 0).merge(table.cell(0, 1)).text = "Statement"
+            table.cell(1, 2).merge(table.cell(2, 2)).text = "Scale"
+            table.cell(1, 0).text = f"1. The {variable.lower()} was good."
+            table.cell(2, 0).text = f"2. The {variable.lower()} was"
+            table.cell(2, 0).add_paragraph("consistent.")
+        buffer = io.BytesIO()
+        doc.save(buffer)
+
+        content = process_uploaded_file(make_upload(buffer.getvalue(), "survey.docx"))
+        assert content.index("Service Quality:") < content.index("| Statement") < content.index("Atmosphere:"), "Tables should follow their heading"
+        assert content.count("| Statement |  |\n") == 2 and content.count("Statement") == 2, "Spanned cells should appear once"
+        assert "| 2. The service quality was consistent. |  |  |" in content, "Vertically merged cells should be empty below their first row"
+
+        shards = split_survey_content(content)
+        assert shards.preamble == "General Instructions: rate each statement", f"Unexpected preamble {shards.preamble!r}"
+        assert [shard.text.split('\n')[0] for shard in shards.tables] == ["Service Quality: how customers perceive it", "Atmosphere: how customers perceive it"], "Headings should open their table shard"
+        assert split_table_items(shards.tables[0].text) == ["The service quality was good.", "The service quality was consistent."], "Items should be read from the rows"
+
+    print("[PASS] DOCX document order test passed")
+
+def test_spill_and_limit():
+    """Test that large extractions spill to disk with the same result and oversized ones fail"""
+    with isolated_caches():
+        fragments = [f"row {i}\n" for i in range(200000)]
+        expected = ''.join(fragments)
+
+        content, stats = collect_fragments(iter(fragments), spill_chars=100000)
+        assert content == expected and stats['spilled'], "Spilled extraction should match"
+        assert stats['fragments'] == 200000 and stats['extracted_bytes'] == len(expected), f"Unexpected stats {stats}"
+
+        content, stats = collect_fragments(iter(fragments))
+        assert content == expected and not stats['spilled'], "Small extractions should stay in memory"
+
+        try:
+            collect_fragments(iter(fragments), max_chars=1000)
+            assert False, "The size limit should be enforced"
+        except ExtractionLimitError:
+            pass
+        assert extract_uploaded_file(make_upload(b"x", "survey.exe")) == (None, None), "Unsupported files should not extract"
+
+    print("[PASS] Spill and limit test passed")
+
+def run_tests():
+    """Run all extraction tests"""
+    print("Testing extraction...")
+
+    test_page_ranges()
+    test_table_detection_prefilter()
+    test_parallel_extraction_matches_serial()
+    test_process_uploaded_pdf()
+    test_streamed_formats()
+    test_docx_document_order()
+    test_spill_and_limit()
+
+    print("\n[SUCCESS] All extraction tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
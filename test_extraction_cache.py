@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Test script to verify that extracted text is cached by file hash in memory and on disk
+"""
+
+import os
+import tempfile
+import concurrent.futures
+
+import extraction_cache
+from extraction_cache import ExtractionCache, make_extraction_key
+from app import extract_uploaded_file
+from test_support import isolated_caches, make_upload
+
+SURVEY = "General Instructions:\nTable 1: Service\n1. The staff were courteous.\n"
+
+def test_extraction_key():
+    """Test that the key depends on the bytes, file type and extractor version but not the file name"""
+    key = make_extraction_key(make_upload(SURVEY))
+
+    assert key == make_extraction_key(make_upload(SURVEY, "renamed (1).txt")), "Renamed uploads should share a key"
+    assert key != make_extraction_key(make_upload(SURVEY + " ")), "Key should depend on the bytes"
+    assert key != make_extraction_key(make_upload(SURVEY, "survey.csv")), "Key should depend on the file type"
+    assert key != make_extraction_key(make_upload(SURVEY), extractor_version="other"), "Key should depend on the extractor version"
+
+    print("[PASS] Extraction key test passed")
+
+def test_memory_and_disk_tiers():
+    """Test LRU eviction from memory and that the disk tier survives a restart"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ExtractionCache(cache_dir, max_memory_bytes=10)
+        stats = {'fragments': 1}
+
+        assert cache.get("a") is None, "Unknown key should miss"
+        cache.put("a", "12345", stats)
+        cache.put("b", "67890", stats)
+        assert cache.get("a") == ("12345", stats), "Entry should be served from memory"
+        cache.put("c", "abcde", stats)
+
+        counters = cache.stats()
+        assert counters['memory_entries'] == 2 and counters['entries'] == 3, f"Unexpected sizes {counters}"
+        assert cache.get("b") == ("67890", stats), "The least recently used entry should come from disk"
+        counters = cache.stats()
+        assert (counters['memory_hits'], counters['disk_hits'], counters['misses']) == (1, 1, 1), f"Unexpected counters {counters}"
+
+        restarted = ExtractionCache(cache.cache_dir)
+        assert restarted.get("c") == ("abcde", stats) and restarted.stats()['disk_hits'] == 1, "Disk entries should persist"
+
+        restarted.clear()
+        assert restarted.get("c") is None and restarted.stats()['entries'] == 0, "Clear should empty both tiers"
+
+    print("[PASS] Memory and disk tier test passed")
+
+def test_concurrent_writes():
+    """Test that threads writing the same key through the shared disk tier never clash on the temporary file"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ExtractionCache(cache_dir)
+        contents = [SURVEY + " " * number for number in range(8)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda content: [cache.put("same", content, {}) for _ in range(20)], contents))
+
+        assert ExtractionCache(cache.cache_dir).get("same")[0] in contents, "One complete write should win"
+        assert os.listdir(cache.cache_dir) == ["same.json"], "No temporary files should be left behind"
+
+    print("[PASS] Concurrent writes test passed")
+
+def test_repeat_extraction_is_skipped():
+    """Test that extracting the same upload again is served from the cache"""
+    with isolated_caches():
+        content, stats = extract_uploaded_file(make_upload(SURVEY))
+        assert content == SURVEY and stats['cached'] is False, "The first extraction should run"
+
+        again, stats = extract_uploaded_file(make_upload(SURVEY, "survey (1).txt"))
+        assert again == SURVEY and stats['cached'] is True, "A repeat upload should skip extraction"
+        assert extraction_cache.get_extraction_cache().stats()['memory_hits'] == 1, "The repeat should hit memory"
+
+    print("[PASS] Repeat extraction test passed")
+
+def run_tests():
+    """Run all extraction cache tests"""
+    print("Testing extraction cache...")
+
+    test_extraction_key()
+    test_memory_and_disk_tiers()
+    test_concurrent_writes()
+    test_repeat_extraction_is_skipped()
+
+    print("\n[SUCCESS] All extraction cache tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Test script to verify that analysis results are exported as one row per item to CSV, JSON Lines
+and Parquet, appending to earlier exports with constant memory
+"""
+
+import os
+import csv
+import json
+import tempfile
+import tracemalloc
+
+import pyarrow.dataset as ds
+
+from item_export import iter_item_rows, iter_result_files, export_items, write_items_csv, violated_criteria, ITEM_COLUMNS
+
+RESULTS = [
+    {'filename': "a.txt", 'analysis': {
+        'timestamp': "2024-01-01T10:00:00",
+        'models_used': [{'model_name': "DeepSeek Reasoner"}, {'model_name': "Gemini"}],
+        'individual_question_analysis': [
+            {'table_number': "1", 'item_number': "1", 'variable_name': "Service", 'question_text': "The staff were courteous.",
+             'validity': "Valid", 'reason': "Meets all criteria, CRITERIA 7 - one idea",
+             'model_verdicts': [{'validity': "Valid"}, {'validity': "Valid"}]},
+            {'table_number': "1", 'item_number': "2", 'question_text': "Prices and/or portions were fair, and hot.",
+             'validity': "Not Valid", 'reason': "CRITERIA 7 - DOUBLE-BARRELED; criteria 10 - two clauses; CRITERIA 7 again",
+             'decided_by_rules': True, 'rule_findings': [{'criterion': 7, 'severity': 'fail'}, {'criterion': 6, 'severity': 'warn'}],
+             'model_verdicts': [{'validity': "Not Valid"}, {'validity': "Valid"}]}
+        ]}},
+    {'filename': "b.txt", 'analysis': {'individual_question_analysis': [{'table_number': "2", 'item_number': "1", 'validity': "Valid"}]}}
+]
+
+def test_item_rows():
+    """Test the flattened columns of each item"""
+    rows = list(iter_item_rows(RESULTS, exported_at="now"))
+    assert len(rows) == 3 and all(tuple(row) == ITEM_COLUMNS for row in rows), "Every item should have every column"
+    assert violated_criteria("CRITERIA 10 - x; CRITERIA 7 - y") == [7, 10], "Criteria should be sorted"
+
+    first, second, third = rows
+    assert (first['item_id'], first['models'], first['models_agree'], first['criteria']) == ("T1-1", "DeepSeek Reasoner;Gemini", True, ""), f"Unexpected row {first}"
+    assert (second['criteria'], second['rule_criteria'], second['decided_by_rules'], second['models_agree']) == ("7;10", "7", True, False), f"Unexpected row {second}"
+    assert (third['file'], third['models'], third['models_agree'], third['analyzed_at'], third['exported_at']) == ("b.txt", "", None, "", "now"), f"Unexpected row {third}"
+
+    print("[PASS] Item rows test passed")
+
+def test_formats_append():
+    """Test that CSV and JSON Lines exports append and that Parquet adds a part file per export"""
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path, jsonl_path, parquet_dir = (os.path.join(directory, name) for name in ("items.csv", "items.jsonl", "items"))
+        for _ in range(2):
+            assert export_items(RESULTS, csv_path, 'csv') == 3, "Rows should be counted"
+            export_items(RESULTS, jsonl_path, 'jsonl')
+            export_items(RESULTS, parquet_dir, 'parquet')
+
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 6 and rows[4]['criteria'] == "7;10", "The header should be written once"
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            assert [json.loads(line)['item_id'] for line in f] == ["T1-1", "T1-2", "T2-1"] * 2, "JSON Lines should append"
+
+        table = ds.dataset(parquet_dir, format='parquet').to_table()
+        assert len(os.listdir(parquet_dir)) == 2 and table.num_rows == 6, "Parquet exports should accumulate part files"
+        assert table.column('decided_by_rules').to_pylist().count(True) == 2, "Boolean columns should keep their type"
+
+        for result in RESULTS:
+            with open(os.path.join(directory, f"analysis_result_{result['filename']}.json"), 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+        assert export_items(iter_result_files(directory), os.path.join(directory, "saved.csv")) == 3, "Saved results should be exported"
+
+    print("[PASS] Formats append test passed")
+
+def test_constant_memory():
+    """Test that exporting 50,000 rows does not hold them in memory"""
+    result = RESULTS[0]
+    results = ({'filename': f"survey_{number}.txt", 'analysis': result['analysis']} for number in range(25000))
+
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as directory:
+        count = write_items_csv(iter_item_rows(results), os.path.join(directory, "items.csv"))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert count == 50000, f"Expected 50000 rows, got {count}"
+    assert peak < 2 * 1024 * 1024, f"Export peaked at {peak / 1024:.0f} KB"
+
+    print("[PASS] Constant memory test passed")
+
+def run_tests():
+    """Run all item export tests"""
+    print("Testing per-item export...")
+
+    test_item_rows()
+    test_formats_append()
+    test_constant_memory()
+
+    print("\n[SUCCESS] All item export tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
@@ -4,7 +4,10 @@ Test script to verify that the JSON extraction works with the new structure
 """
 
 import json
-from app import extract_valid_json
+from app import extract_valid_json, analyze_single_file
+from json_extraction import extract_json, salvage_json
+from mock_llm_server import MockLLMServer, MockLLMConfig
+from test_support import isolated_caches, make_model, make_upload
 
 def test_json_extraction():
     """Test JSON extraction with the new structure"""
@@ -107,6 +110,97 @@ def test_partial_json_extraction():
     
     print("[PASS] Partial JSON extraction works correctly")
 
+def test_braces_inside_strings():
+    """Test that braces and quotes inside question text do not derail extraction"""
+    analysis = {
+        "individual_question_analysis": [
+            {"question_text": "The menu {daily specials} was clear }", "validity": "Valid"},
+            {"question_text": "Staff said \"hi {there}\" when I arrived", "validity": "Valid"}
+        ],
+        "overall_assessment": "Good",
+        "recommendations": []
+    }
+    content = "Note: scores use {1-4}. Draft follows {\n```json\n" + json.dumps(analysis) + "\n```\nThanks!"
+
+    result, strategy = extract_json(content)
+
+    assert result == analysis, "The analysis object should be extracted intact"
+    assert strategy == "expected_keys", f"Unexpected strategy {strategy}"
+
+    print("[PASS] Braces inside strings handled correctly")
+
+def test_candidate_selection_and_strategies():
+    """Test that the object with the expected keys wins and the strategy is reported"""
+    analysis = {"individual_question_analysis": [], "overall_assessment": "Good"}
+    content = 'Example: {"format": "json"}\n' + json.dumps(analysis) + '\nAlso [1, 2]'
+
+    assert extract_json(content) == (analysis, "expected_keys"), "The analysis object should be preferred"
+    assert extract_json(json.dumps(analysis)) == (analysis, "direct"), "Plain JSON should parse directly"
+    assert extract_json("The answer is [1, 2] ok") == ([1, 2], "first_value"), "Other JSON values should still be returned"
+    assert extract_json("No JSON here") == (None, None), "Responses without JSON should return None"
+
+    print("[PASS] Candidate selection and strategies work correctly")
+
+def test_truncated_response():
+    """Test that complete objects inside a truncated response are still found"""
+    inner = {"survey_general_instructions_analysis": {"instructions_present": True}, "overall_assessment": "Fine"}
+    content = '{"wrapper": ' + json.dumps(inner) + ', "individual_question_analysis": [{"question_text": "cut o'
+
+    assert extract_valid_json(content) == inner, "The complete inner object should be found"
+    assert extract_valid_json('{"individual_question_analysis": [{"question_text": "a"}, {"question_text": "b') is None, "Fragments of a truncated response are not an analysis"
+
+    print("[PASS] Truncated response handled correctly")
+
+def make_salvage_sample():
+    items = [{"table_number": "1", "item_number": str(i), "question_text": f"Item {i} {{x}}", "validity": "Valid",
+              "reason": "Clear", "duplicates_with": [{"table_number": "2", "item_number": "1"}, {"table_number": "2", "item_number": "2"}]}
+             for i in range(1, 6)]
+    return {"survey_general_instructions_analysis": {"instructions_present": True, "recommendations": []},
+            "individual_question_analysis": items, "overall_assessment": "Good", "recommendations": ["Keep it"]}
+
+def test_salvage_truncated_response():
+    """Test that completed sections and items are recovered from a response cut off mid-array"""
+    content = "```json\n" + json.dumps(make_salvage_sample(), indent=2)
+    content = content[:content.index('"item_number": "4"')]
+
+    assert extract_valid_json(content) is None, "A truncated response is not valid JSON"
+    sections, report = salvage_json(content)
+
+    assert [item['item_number'] for item in sections['individual_question_analysis']] == ["1", "2", "3"], "Completed items should be recovered"
+    assert sections['survey_general_instructions_analysis'] == {"instructions_present": True, "recommendations": []}, "Completed sections should be recovered"
+    assert report == {'partial_sections': ['individual_question_analysis'], 'skipped_items': 0, 'truncated': True}, f"Unexpected report {report}"
+
+    print("[PASS] Truncated response salvaged correctly")
+
+def test_salvage_malformed_item():
+    """Test that a malformed item is skipped and the items after it are kept"""
+    content = json.dumps(make_salvage_sample(), indent=2).replace('"Item 2 {x}"', '"Item "2" {x}"')
+
+    sections, report = salvage_json(content)
+
+    assert [item['item_number'] for item in sections['individual_question_analysis']] == ["1", "3", "4", "5"], "Items after the malformed one should be kept"
+    assert sections['recommendations'] == ["Keep it"] and report['truncated'] is False, "Sections after the items should be kept"
+    assert report['skipped_items'] == 1, "The malformed item should be reported"
+
+    print("[PASS] Malformed item salvaged correctly")
+
+def test_salvaged_analysis_marks_missing_items():
+    """Test that a truncated answer is kept and the survey items it lacks are marked"""
+    with isolated_caches():
+        survey = "Table 1: Service\n" + "\n".join(f"{i}. The service aspect number {i} was good." for i in range(1, 9))
+        with MockLLMServer(MockLLMConfig(truncate_rate=1.0)) as server:
+            analysis = analyze_single_file(make_upload(survey), [make_model(server.url, follow_up_missing=False)])['analysis']
+
+        recovered = analysis['individual_question_analysis']
+        incomplete = analysis['models_used'][0]['analysis']['incomplete_response']
+        missing = [item['item_number'] for item in incomplete['missing_items']]
+
+        assert 0 < len(recovered) < 8, f"Some but not all items should be recovered, got {len(recovered)}"
+        assert incomplete['items_recovered'] == len(recovered), "Recovered items should be counted"
+        assert sorted(missing + [item['item_number'] for item in recovered], key=int) == [str(i) for i in range(1, 9)], "Every item should be either recovered or missing"
+
+    print("[PASS] Salvaged analysis marks missing items")
+
 def run_tests():
     """Run all JSON extraction tests"""
     print("Testing JSON extraction functionality...")
@@ -114,6 +208,12 @@ def run_tests():
     test_json_extraction()
     test_json_extraction_with_markdown()
     test_partial_json_extraction()
+    test_braces_inside_strings()
+    test_candidate_selection_and_strategies()
+    test_truncated_response()
+    test_salvage_truncated_response()
+    test_salvage_malformed_item()
+    test_salvaged_analysis_marks_missing_items()
     
     print("\n[SUCCESS] All JSON extraction tests passed!")
 
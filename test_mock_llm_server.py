@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Test script to verify the mock chat completions API and the pipeline benchmark built on it
+"""
+
+import glob
+import json
+
+import requests
+
+from mock_llm_server import MockLLMServer, MockLLMConfig
+from bench_pipeline import parse_args, run_benchmark, percentiles
+from app import call_ai_model
+from test_support import isolated_caches, make_model
+
+PROMPT = "Table 1: Service\n1. The staff were courteous.\n2. The food was hot and tasty.\n"
+
+def post(server, stream=False):
+    payload = {"model": "deepseek-reasoner", "messages": [{"role": "user", "content": PROMPT}], "stream": stream}
+    return requests.post(server.url, json=payload, timeout=10)
+
+def test_synthesized_answers():
+    """Test that answers contain one verdict per numbered item, plain or streamed"""
+    with isolated_caches():
+        with MockLLMServer() as server:
+            content = post(server).json()['choices'][0]['message']['content']
+            items = json.loads(content)['individual_question_analysis']
+            assert [item['item_number'] for item in items] == ["1", "2"], "Every prompt item should get a verdict"
+            assert items[1]['validity'] == "Not Valid", "Double-barreled items should be invalid"
+
+            received = []
+            analysis = call_ai_model(PROMPT, make_model(server.url, stream=True), on_item=received.append)
+            assert len(received) == 2 and analysis['individual_question_analysis'] == received, "Streamed items should arrive"
+            assert server.stats['streamed'] == 1, "Streamed requests should be counted"
+
+    print("[PASS] Synthesized answers test passed")
+
+def test_injected_failures():
+    """Test 429/5xx injection, truncation and markdown wrapping"""
+    with MockLLMServer(MockLLMConfig(rate_limit_rate=1.0, retry_after=7)) as server:
+        response = post(server)
+        assert response.status_code == 429 and response.headers['Retry-After'] == "7", "Rate limits should be injected"
+
+    with MockLLMServer(MockLLMConfig(server_error_rate=1.0)) as server:
+        assert post(server).status_code in (500, 502, 503), "Server errors should be injected"
+        assert server.stats['server_errors'] == 1, "Server errors should be counted"
+
+    with MockLLMServer(MockLLMConfig(truncate_rate=1.0, markdown_rate=1.0)) as server:
+        content = post(server).json()['choices'][0]['message']['content']
+        assert content.startswith("Here is the analysis:\n```json"), "Answers should be wrapped in markdown"
+        assert not content.rstrip().endswith("```"), "Answers should be truncated"
+
+    print("[PASS] Injected failures test passed")
+
+def test_scripted_answers():
+    """Test that an answer function decides the analysis or the error status of each request"""
+    def answer(payload):
+        return 400 if "Broken" in payload['messages'][-1]['content'] else {"individual_question_analysis": []}
+
+    with MockLLMServer(answer=answer) as server:
+        assert json.loads(post(server).json()['choices'][0]['message']['content']) == {"individual_question_analysis": []}, \
+            "The scripted analysis should be sent"
+        response = requests.post(server.url, json={"messages": [{"role": "user", "content": "Broken"}]}, timeout=10)
+        assert response.status_code == 400 and server.stats['rejected'] == 1, "Scripted statuses should be sent and counted"
+
+    print("[PASS] Scripted answers test passed")
+
+def test_replay():
+    """Test that recorded analysis results are served back"""
+    replay_files = sorted(glob.glob("analysis_result_*.json"))
+    with open(replay_files[0], 'r', encoding='utf-8') as f:
+        recorded = json.load(f)
+
+    with MockLLMServer(MockLLMConfig(replay_files=replay_files[:1])) as server:
+        analysis = json.loads(post(server).json()['choices'][0]['message']['content'])
+
+    assert analysis['individual_question_analysis'] == recorded['individual_question_analysis'], "Recorded items should be replayed"
+    assert 'models_used' not in analysis, "Only the model's own sections should be replayed"
+
+    print("[PASS] Replay test passed")
+
+def test_benchmark_report():
+    """Test that the benchmark reports throughput, latency percentiles and error rates"""
+    with isolated_caches():
+        assert percentiles([4, 1, 3, 2]) == {'p50': 2, 'p95': 4, 'p99': 4, 'mean': 2.5, 'max': 4}, "Percentiles should use nearest rank"
+
+        report = run_benchmark(parse_args(['--files', '3', '--models', '2', '--paths', 'engine', '--latency', '0.05',
+                                           '--error-rate', '0.2', '--seed', '3']))
+        [run] = report['runs']
+
+        assert run['files'] == 3 and run['models'] == 2, "Run size should be reported"
+        assert run['throughput_files_per_second'] > 0, "Throughput should be reported"
+        assert set(run['file_latency_seconds']) == {'p50', 'p95', 'p99', 'mean', 'max'}, "Latency percentiles should be reported"
+        assert run['server']['requests'] >= 6, "Each file and model should reach the server"
+        assert run['client_retries'] == run['server']['server_errors'], "Injected errors should be retried"
+        json.dumps(report)
+
+    print("[PASS] Benchmark report test passed")
+
+def run_tests():
+    """Run all mock server tests"""
+    print("Testing mock chat completions API...")
+
+    test_synthesized_answers()
+    test_injected_failures()
+    test_scripted_answers()
+    test_replay()
+    test_benchmark_report()
+
+    print("\n[SUCCESS] All mock server tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
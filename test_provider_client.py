@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Test script to verify the pooled provider client retries transient failures and reuses connections
+"""
+
+from mock_llm_server import MockLLMServer
+from provider_client import ProviderClient, RetryPolicy, compute_backoff, parse_retry_after
+
+class FlakyAnswer:
+    """Answers with the queued status codes in order, then an empty analysis"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+
+    def __call__(self, payload):
+        return self.statuses.pop(0) if self.statuses else {}
+
+def test_retry_after_parsing():
+    """Test Retry-After header parsing and backoff bounds"""
+    assert parse_retry_after("3") == 3.0, "Numeric Retry-After should be seconds"
+    assert parse_retry_after(None) is None, "Missing header should be None"
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0, "Past HTTP date should be zero"
+    assert parse_retry_after("soon") is None, "Invalid header should be None"
+
+    for attempt in range(6):
+        delay = compute_backoff(attempt, base=1.0, cap=8.0)
+        assert 0 <= delay <= 8.0, f"Backoff should stay within the cap, got {delay}"
+    assert compute_backoff(0, retry_after=5.0, base=1.0, cap=8.0) >= 5.0, "Retry-After should be honored"
+
+    policy = RetryPolicy(max_retries=2, backoff_base=1.0, backoff_max=8.0)
+    assert policy.retry_delay(0) is not None and policy.retry_delay(2) is None, "Connection errors are retried max_retries times"
+    assert policy.retry_delay(0, 503, "6") >= 6.0, "Transient statuses are retried after Retry-After"
+    assert policy.retry_delay(0, 400) is None and policy.retry_delay(0, 200) is None, "Other statuses are not retried"
+
+    print("[PASS] Retry-After parsing test passed")
+
+def test_retries_transient_errors():
+    """Test that 429 and 5xx responses are retried until success"""
+    with MockLLMServer(answer=FlakyAnswer(429, 503)) as server:
+        client = ProviderClient(pool_size=2, backoff_base=0.01, backoff_max=0.05)
+        response = client.post_json(server.url, {}, {"model": "test"})
+
+        assert response.status_code == 200, "Request should eventually succeed"
+        metrics = client.metrics()
+        assert metrics['retries'] == 2, f"Expected two retries, got {metrics}"
+        assert metrics['failures'] == 0, "No request should be counted as failed"
+
+    print("[PASS] Transient error retry test passed")
+
+def test_gives_up_after_max_retries():
+    """Test that persistent errors surface after the retry budget is spent"""
+    with MockLLMServer(answer=FlakyAnswer(500, 500, 500)) as server:
+        client = ProviderClient(max_retries=1, backoff_base=0.01, backoff_max=0.05)
+        try:
+            client.post_json(server.url, {}, {"model": "test"})
+            assert False, "Persistent 500 should raise"
+        except Exception as e:
+            assert "500" in str(e), f"Error should report the status code: {e}"
+        assert client.metrics()['failures'] == 1, "Failure should be counted"
+
+    print("[PASS] Retry budget test passed")
+
+def test_connection_reuse():
+    """Test that sequential requests share one keep-alive connection"""
+    with MockLLMServer() as server:
+        client = ProviderClient(pool_size=2)
+        for _ in range(5):
+            client.post_json(server.url, {}, {"model": "test"}).json()
+
+        metrics = client.metrics()
+        assert metrics['connections_opened'] == 1, f"Expected one connection, got {metrics}"
+        assert metrics['connections_reused'] == 4, f"Expected four reused requests, got {metrics}"
+
+    print("[PASS] Connection reuse test passed")
+
+def run_tests():
+    """Run all provider client tests"""
+    print("Testing provider client...")
+
+    test_retry_after_parsing()
+    test_retries_transient_errors()
+    test_gives_up_after_max_retries()
+    test_connection_reuse()
+
+    print("\n[SUCCESS] All provider client tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Test script to verify that DOCX reports are rendered in memory once per analysis and served
+from the report cache on later reruns
+"""
+
+import io
+import os
+import time
+import tempfile
+import threading
+
+from docx import Document
+
+from report_cache import ReportCache, make_report_key
+from app import render_docx_bytes
+
+ANALYSIS = {
+    "survey_general_instructions_analysis": {"instructions_present": True, "scale_correctly_defined": True},
+    "individual_question_analysis": [
+        {"table_number": "1", "item_number": "1", "question_text": "The staff were courteous.", "validity": "Valid"},
+        {"table_number": "1", "item_number": "2", "question_text": "Prices and/or portions were fair.",
+         "validity": "Not Valid", "reason": "CRITERIA 7 - DOUBLE-BARRELED"}
+    ],
+    "overall_assessment": "Good survey.",
+    "recommendations": ["Split item 2."]
+}
+
+def test_report_key():
+    """Test that the key depends on the analysis content, file name and template version"""
+    key = make_report_key(ANALYSIS, "survey.txt", "1")
+
+    assert key == make_report_key(dict(reversed(list(ANALYSIS.items()))), "survey.txt", "1"), "Key order should not matter"
+    assert key != make_report_key(dict(ANALYSIS, overall_assessment="Poor survey."), "survey.txt", "1"), "Key should depend on the analysis"
+    assert key != make_report_key(ANALYSIS, "other.txt", "1"), "Key should depend on the file name"
+    assert key != make_report_key(ANALYSIS, "survey.txt", "2"), "Key should depend on the template version"
+
+    cache = ReportCache()
+    assert cache.key_for(ANALYSIS, "survey.txt", "1") == key, "Remembered keys should match"
+    assert cache.key_for(ANALYSIS, "survey.txt", "2") != key, "Remembered keys should follow the template version"
+
+    print("[PASS] Report key test passed")
+
+def test_render_in_memory():
+    """Test that reports are rendered to valid DOCX bytes without temporary files"""
+    before = set(os.listdir(tempfile.gettempdir()))
+    report = render_docx_bytes(ANALYSIS, "survey.txt")
+    assert set(os.listdir(tempfile.gettempdir())) == before, "Rendering should not create temporary files"
+
+    text = '\n'.join(paragraph.text for paragraph in Document(io.BytesIO(report)).paragraphs)
+    assert "Survey Questionnaire Quality Report" in text, "The report should be a readable document"
+
+    print("[PASS] Render in memory test passed")
+
+def test_cache_and_budget():
+    """Test cache hits across reruns and LRU eviction over the byte budget"""
+    cache = ReportCache(max_bytes=10)
+    renders = []
+
+    def render(data):
+        renders.append(data)
+        return data
+
+    assert cache.render("a", lambda: render(b"12345")) == b"12345", "A miss should render the report"
+    assert cache.render("a", lambda: render(b"other")) == b"12345", "A hit should not render again"
+    cache.render("b", lambda: render(b"67890"))
+    cache.get("a")
+    cache.render("c", lambda: render(b"abcde"))
+    assert cache.get("b") is None and cache.get("a") == b"12345", "The least recently used report should be evicted"
+    cache.put("d", b"too large for the budget")
+    assert cache.get("d") is None, "Reports over the budget should not be cached"
+
+    stats = cache.stats()
+    assert (stats['renders'], stats['evictions'], stats['entries'], stats['bytes']) == (3, 1, 2, 10), f"Unexpected stats {stats}"
+
+    print("[PASS] Cache and budget test passed")
+
+def test_background_render():
+    """Test that prefetched reports render once in the background, requests wait for them and failures are retried"""
+    cache = ReportCache()
+    started, release = threading.Event(), threading.Event()
+    renders = []
+
+    def render():
+        started.set()
+        release.wait(5)
+        renders.append(1)
+        return b"report"
+
+    cache.prefetch("a", render)
+    started.wait(5)
+    cache.prefetch("a", render)
+    assert cache.pending("a") and cache.get("a") is None, "The report should be pending"
+    release.set()
+    assert cache.render("a", render) == b"report" and len(renders) == 1, "The request should wait for the background render"
+    assert not cache.pending("a"), "Finished renders should not be pending"
+
+    # A failed background render is not left pending and is retried by the next request
+    calls = []
+
+    def flaky_render():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("render failed")
+        return b"retried"
+
+    cache.prefetch("b", flaky_render)
+    for _ in range(100):
+        if not cache.pending("b"):
+            break
+        time.sleep(0.01)
+    assert not cache.pending("b"), "A failed render should not stay pending"
+    assert cache.render("b", flaky_render) == b"retried" and len(calls) == 2, "The request should render the report again"
+    assert cache.render("b", flaky_render) == b"retried" and len(calls) == 2, "The retried report should be cached"
+
+    print("[PASS] Background render test passed")
+
+def test_rerun_lookup():
+    """Test that looking up the reports of loaded results on a rerun takes milliseconds"""
+    cache = ReportCache()
+    results = [{'filename': f"survey_{number}.txt", 'analysis': dict(ANALYSIS, overall_assessment=str(number))}
+               for number in range(50)]
+    for result in results:
+        cache.put(cache.key_for(result['analysis'], result['filename'], "1"), b"report")
+
+    start = time.perf_counter()
+    reports = [cache.get(cache.key_for(result['analysis'], result['filename'], "1")) for result in results]
+    elapsed = time.perf_counter() - start
+    assert all(reports), "Every report should be cached"
+    assert elapsed < 0.05, f"Rerun lookups took {elapsed:.3f}s"
+
+    print("[PASS] Rerun lookup test passed")
+
+def run_tests():
+    """Run all report cache tests"""
+    print("Testing report cache...")
+
+    test_report_key()
+    test_render_in_memory()
+    test_cache_and_budget()
+    test_background_render()
+    test_rerun_lookup()
+
+    print("\n[SUCCESS] All report cache tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
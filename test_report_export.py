@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Test script to verify that all reports, raw results and an index are exported as one ZIP with
+reports rendered in a process pool
+"""
+
+import io
+import os
+import json
+import zipfile
+import concurrent.futures
+
+from docx import Document
+
+from report_cache import ReportCache
+from report_export import (
+    export_reports_zip, archive_names, create_export_archive, read_export_archive, remove_export_archive,
+    INDEX_FILENAME, ITEMS_FILENAME
+)
+from app import report_key
+
+def make_result(filename, number):
+    return {'filename': filename, 'analysis': {
+        'individual_question_analysis': [
+            {'table_number': "1", 'item_number': "1", 'question_text': f"Item of survey {number}.", 'validity': "Valid"},
+            {'table_number': "1", 'item_number': "2", 'question_text': "Prices and/or portions were fair.", 'validity': "Not Valid"}
+        ],
+        'overall_assessment': f"Survey {number}.",
+        'recommendations': []
+    }}
+
+def test_archive_names():
+    """Test that repeated file names get unique archive names"""
+    assert archive_names(["a.txt", "b.txt", "a.txt", "dir/a.txt"]) == ["a.txt", "b.txt", "a.txt (2)", "a.txt (3)"], "Names should be unique"
+
+    print("[PASS] Archive names test passed")
+
+def test_export_zip():
+    """Test the archive contents, reuse of cached reports and rendering in worker processes"""
+    results = [make_result(f"survey_{number}.txt", number) for number in range(5)] + [make_result("survey_0.txt", 5)]
+    cache = ReportCache()
+    cache.put(report_key(results[1]), b"cached report")
+
+    buffer = io.BytesIO()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        index = export_reports_zip(results, buffer, executor=executor, workers=2, cache=cache)
+
+    with zipfile.ZipFile(buffer) as archive:
+        names = set(archive.namelist())
+        assert {INDEX_FILENAME, ITEMS_FILENAME} <= names and len(names) == 14, f"Unexpected entries {sorted(names)}"
+        assert json.loads(archive.read(INDEX_FILENAME))['files'] == index, "The index should be in the archive"
+        assert [entry['filename'] for entry in index] == [result['filename'] for result in results], "Results should keep their order"
+        assert index[5]['report'] == "reports/quality_report_survey_0.txt (2).docx", "Repeated names should not overwrite each other"
+        assert (index[0]['items'], index[0]['valid'], index[0]['not_valid']) == (2, 1, 1), f"Unexpected counts {index[0]}"
+
+        assert archive.read(index[1]['report']) == b"cached report", "Cached reports should be reused"
+        report = Document(io.BytesIO(archive.read(index[5]['report'])))
+        assert any("Survey 5." == paragraph.text for paragraph in report.paragraphs), "Rendered reports should match their result"
+        assert json.loads(archive.read(index[5]['result'])) == results[5], "Raw results should be included"
+        assert len(archive.read(ITEMS_FILENAME).decode('utf-8').splitlines()) == 13, "Every item should have a row"
+
+    assert cache.get(report_key(results[2])) == archive_bytes(buffer, index[2]['report']), "Rendered reports should be cached"
+
+    print("[PASS] Export ZIP test passed")
+
+def test_export_archive_file():
+    """Test that the download archive is written to a named temporary file and removed afterwards"""
+    results = [make_result("survey_0.txt", 0)]
+    cache = ReportCache()
+    cache.put(report_key(results[0]), b"cached report")
+
+    path = create_export_archive(results, cache=cache)
+    try:
+        assert os.path.isfile(path) and path.endswith('.zip'), f"Expected a ZIP file at {path}"
+        with zipfile.ZipFile(io.BytesIO(read_export_archive(path))) as archive:
+            assert archive.read("reports/quality_report_survey_0.txt.docx") == b"cached report", "The archive should hold the report"
+    finally:
+        remove_export_archive(path)
+    assert not os.path.exists(path), "The archive should be deleted"
+    remove_export_archive(path)
+
+    print("[PASS] Export archive file test passed")
+
+def archive_bytes(buffer, name):
+    with zipfile.ZipFile(buffer) as archive:
+        return archive.read(name)
+
+def run_tests():
+    """Run all report export tests"""
+    print("Testing report export...")
+
+    test_archive_names()
+    test_export_zip()
+    test_export_archive_file()
+
+    print("\n[SUCCESS] All report export tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
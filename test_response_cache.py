@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Test script to verify that AI model responses are cached on disk and evicted correctly
+"""
+
+import os
+import json
+import time
+import tempfile
+import threading
+import concurrent.futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from response_cache import ResponseCache, make_cache_key, get_response_cache
+from prompts import get_deepseek_prompt
+from app import call_ai_model, build_chat_request
+from async_engine import analyze_files
+from test_support import isolated_caches, make_model, make_upload
+
+SAMPLE_RESPONSE = json.dumps({
+    "survey_general_instructions_analysis": {"instructions_present": True},
+    "individual_question_analysis": [
+        {"table_number": "1", "item_number": "1", "question_text": "The staff were courteous.", "validity": "Valid"}
+    ],
+    "overall_assessment": "Good survey",
+    "recommendations": []
+})
+
+def test_cache_key():
+    """Test that the key changes with the messages, model, temperature and prompt version"""
+    messages = get_deepseek_prompt("Survey content")
+    key = make_cache_key(messages, "deepseek-reasoner", 0.3)
+
+    assert key == make_cache_key(messages, "deepseek-reasoner", 0.3), "Key should be stable"
+    assert key != make_cache_key(get_deepseek_prompt("Other survey"), "deepseek-reasoner", 0.3), "Key should depend on messages"
+    assert key != make_cache_key(messages, "deepseek-chat", 0.3), "Key should depend on model"
+    assert key != make_cache_key(messages, "deepseek-reasoner", 0.5), "Key should depend on temperature"
+    assert key != make_cache_key(messages, "deepseek-reasoner", 0.3, prompt_version="other"), "Key should depend on prompt version"
+
+    print("[PASS] Cache key test passed")
+
+def test_get_put_and_counters():
+    """Test storing and retrieving responses with hit/miss counters"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir)
+
+        assert cache.get("missing") is None, "Unknown key should miss"
+        cache.put("abc", SAMPLE_RESPONSE)
+        assert cache.get("abc") == SAMPLE_RESPONSE, "Stored content should be returned"
+
+        stats = cache.stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1, f"Unexpected counters: {stats}"
+        assert stats['entries'] == 1, "Cache should hold one entry"
+
+        # A new cache instance on the same directory should see the entry (survives restarts)
+        assert ResponseCache(cache.cache_dir).get("abc") == SAMPLE_RESPONSE, "Entry should persist on disk"
+
+    print("[PASS] Get/put and counters test passed")
+
+def test_eviction():
+    """Test size and age based eviction"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir, max_entries=2)
+        for i, key in enumerate(["first", "second", "third"]):
+            cache.put(key, SAMPLE_RESPONSE)
+            # Spread the modification times so the least recently used entry is well defined
+            os.utime(cache._path(key), (time.time() - 100 + i, time.time() - 100 + i))
+        cache.evict()
+
+        assert cache.get("first") is None, "Oldest entry should be evicted"
+        assert cache.get("third") == SAMPLE_RESPONSE, "Newest entry should be kept"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir, max_age_seconds=60)
+        cache.put("old", SAMPLE_RESPONSE)
+        os.utime(cache._path("old"), (time.time() - 120, time.time() - 120))
+        assert cache.get("old") is None, "Expired entry should miss"
+        assert cache.stats()['entries'] == 0, "Expired entry should be removed"
+
+    print("[PASS] Eviction test passed")
+
+def test_concurrent_writes():
+    """Test that threads writing the same key never clash on the temporary file"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir)
+        contents = [SAMPLE_RESPONSE + " " * number for number in range(8)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda content: [cache.put("same", content) for _ in range(20)], contents))
+
+        assert cache.get("same") in contents, "One complete write should win"
+        assert os.listdir(cache.cache_dir) == ["same.json"], "No temporary files should be left behind"
+
+    print("[PASS] Concurrent writes test passed")
+
+def test_call_ai_model_uses_cache():
+    """Test that call_ai_model serves a cached response without calling the API"""
+    with isolated_caches():
+        # Point the model at an unreachable endpoint so only a cache hit can succeed
+        model = make_model("http://127.0.0.1:9/chat/completions", use_cache=True)
+        _, _, payload = build_chat_request("Survey content", model)
+        key = make_cache_key(payload['messages'], payload['model'], payload['temperature'])
+        get_response_cache().put(key, SAMPLE_RESPONSE)
+
+        analysis = call_ai_model("Survey content", model)
+        assert analysis['overall_assessment'] == "Good survey", "Cached analysis should be returned"
+        assert len(analysis['individual_question_analysis']) == 1, "Cached items should be parsed"
+        assert get_response_cache().stats()['hits'] == 1, "Lookup should count as a hit"
+
+    print("[PASS] call_ai_model cache test passed")
+
+class AnswerHandler(BaseHTTPRequestHandler):
+    """Answers with SAMPLE_RESPONSE and finish_reason; streamed answers send [DONE] only if send_done is set"""
+    finish_reason = 'stop'
+    send_done = True
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        if payload.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            event = {"choices": [{"delta": {"content": SAMPLE_RESPONSE}, "finish_reason": AnswerHandler.finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            if AnswerHandler.send_done:
+                self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            return
+        body = json.dumps({"choices": [{"message": {"role": "assistant", "content": SAMPLE_RESPONSE},
+                                        "finish_reason": AnswerHandler.finish_reason}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_incomplete_responses_not_cached():
+    """Test that only answers that finished ([DONE] arrived, not cut at the output limit) are cached"""
+    with isolated_caches():
+        server = ThreadingHTTPServer(('127.0.0.1', 0), AnswerHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            model = make_model(f"http://127.0.0.1:{server.server_address[1]}/chat/completions", use_cache=True)
+            for finish_reason, send_done, stream, cached in [('length', True, False, False), ('length', True, True, False),
+                                                              ('stop', False, True, False), ('stop', True, True, True),
+                                                              ('stop', True, False, True)]:
+                AnswerHandler.finish_reason, AnswerHandler.send_done = finish_reason, send_done
+                for call in (lambda: call_ai_model("Survey content", dict(model, stream=stream)),
+                             lambda: analyze_files([make_upload("Survey content")], [dict(model, stream=stream)])[0]['analysis']):
+                    get_response_cache().clear()
+                    analysis = call()
+                    assert len(analysis['individual_question_analysis']) == 1, "The answer should still be used"
+                    entries = get_response_cache().stats()['entries']
+                    assert entries == int(cached), \
+                        f"finish_reason={finish_reason}, [DONE]={send_done}, stream={stream}: expected cached={cached}"
+        finally:
+            server.shutdown()
+
+    print("[PASS] Incomplete responses not cached test passed")
+
+def run_tests():
+    """Run all response cache tests"""
+    print("Testing response cache...")
+
+    test_cache_key()
+    test_get_put_and_counters()
+    test_eviction()
+    test_concurrent_writes()
+    test_call_ai_model_uses_cache()
+    test_incomplete_responses_not_cached()
+
+    print("\n[SUCCESS] All response cache tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+Test script to verify that resubmitted surveys only send changed tables and items to the model
+"""
+
+import os
+import re
+import tempfile
+import concurrent.futures
+
+import revisions
+from revisions import RevisionStore, document_key, document_fingerprint, same_document
+from sharding import split_table_items, split_survey_content
+from app import analyze_single_file
+from mock_llm_server import MockLLMServer
+from test_support import RecordingAnswer, isolated_caches, make_model, make_upload
+
+SURVEY_V1 = """General Instructions:
+Please rate each statement using the following scale:
+4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree
+
+Part 2: Variables
+Service Quality: Measures customer perception of service excellence
+
+Table 1: Service Quality
+1. The staff were courteous and helpful.
+2. The service was timely.
+
+Table 2: Atmosphere
+1. The restaurant had a pleasant atmosphere.
+2. The music was too loud and the lights were dim.
+3. The seats were comfortable.
+"""
+
+# Resubmission: only item 2 of table 2 was corrected
+SURVEY_V2 = SURVEY_V1.replace("2. The music was too loud and the lights were dim.", "2. The music was pleasant.")
+
+# Another student's survey from the same template, uploaded under the same file name
+OTHER_SURVEY = """General Instructions:
+Please rate each statement using the following scale:
+4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree
+
+Part 2: Variables
+Library Usage: Measures how often students borrow books and use study rooms
+
+Table 1: Library Usage
+1. I borrow books every week.
+2. The study rooms are easy to reserve.
+
+Table 2: Atmosphere
+1. The restaurant had a pleasant atmosphere.
+2. The reading area is quiet.
+"""
+
+def revision_answer(payload):
+    """Answers every table request with a verdict per requested item"""
+    user_message = payload['messages'][-1]['content']
+    if 'duplicate_groups' in payload['messages'][0]['content']:
+        return {"duplicate_groups": []}
+    if 'Analyze ONLY the general instructions' in user_message:
+        return {"survey_general_instructions_analysis": {"instructions_present": True},
+                "survey_parts_analysis": {}, "individual_question_analysis": [],
+                "overall_assessment": "Good", "recommendations": []}
+
+    table_number = re.search(r'Use "(\d+)" as the table_number', user_message).group(1)
+    requested = re.findall(r'^(\d+): (.+)$', user_message, re.MULTILINE)
+    if not requested:
+        table_text = user_message.split(f"Table {table_number}:\n", 1)[1]
+        requested = [(str(i), text) for i, text in enumerate(split_table_items(table_text), 1)]
+    return {"individual_question_analysis": [
+        {"table_number": table_number, "item_number": number, "question_text": text,
+         "validity": "Not Valid" if " and " in text else "Valid", "reason": "checked", "duplicates_with": []}
+        for number, text in requested
+    ]}
+
+def test_document_key():
+    """Test that resubmitted file names map to the same document"""
+    key = document_key("SQ-JOSE-BEDIA.docx")
+    for name in ["SQ-JOSE-BEDIA (1).docx", "sq-jose-bedia_v2.docx", "SQ-JOSE-BEDIA-revised (3).pdf", "SQ JOSE BEDIA final.docx"]:
+        assert document_key(name) == key, f"{name} should map to {key}, got {document_key(name)}"
+    assert document_key("SQ-MARIA.docx") != key, "Different documents should have different keys"
+
+    print("[PASS] Document key test passed")
+
+def test_same_document():
+    """Test that a revision matches its stored fingerprint and another survey from the same template does not"""
+    stored = document_fingerprint(split_survey_content(SURVEY_V1))
+    assert same_document(document_fingerprint(split_survey_content(SURVEY_V2)), stored), "A revision should match"
+    assert not same_document(document_fingerprint(split_survey_content(OTHER_SURVEY)), stored), \
+        "A different survey should not match"
+    assert not same_document(stored, None), "Revisions stored without a fingerprint should not be reused"
+
+    print("[PASS] Same document test passed")
+
+def test_concurrent_saves():
+    """Test that stores saving the same document's revision (as other processes would) never clash on the temporary file"""
+    model = {"name": "DeepSeek Reasoner"}
+    with tempfile.TemporaryDirectory() as store_dir:
+        revisions_saved = [{'prompt_version': revisions.PROMPT_VERSION, 'tables': [], 'writer': number} for number in range(8)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda revision: [RevisionStore(store_dir).save("survey.txt", model, revision) for _ in range(20)], revisions_saved))
+
+        assert RevisionStore(store_dir).load("survey (1).txt", model) in revisions_saved, "One complete save should win"
+        assert len(os.listdir(store_dir)) == 1, "No temporary files should be left behind"
+
+    print("[PASS] Concurrent saves test passed")
+
+def test_incremental_reanalysis():
+    """Test that only the edited item is re-sent and unchanged verdicts are reused"""
+    answer = RecordingAnswer(revision_answer)
+    with isolated_caches(), MockLLMServer(answer=answer) as server:
+        model = make_model(server.url)
+
+        first = analyze_single_file(make_upload(SURVEY_V1), [model], mode='incremental')['analysis']
+        assert len(answer.requests) == 4, f"First revision sends preamble, two tables and a duplicate check, got {len(answer.requests)}"
+        assert len(first['individual_question_analysis']) == 5, "Every item should be analyzed"
+        assert first['individual_question_analysis'][3]['validity'] == "Not Valid", "Double-barreled item should be invalid"
+
+        answer.requests = []
+        second = analyze_single_file(make_upload(SURVEY_V2, "survey (1).txt"), [model], mode='incremental')['analysis']
+        table_requests = [r for r in answer.requests if 'duplicate_groups' not in r['messages'][0]['content']]
+        assert len(table_requests) == 1, f"Only the edited table should be re-sent, got {len(table_requests)} requests"
+        assert "2: The music was pleasant." in table_requests[0]['messages'][-1]['content'], "Only the edited item should be evaluated"
+        assert "1: The restaurant" not in table_requests[0]['messages'][-1]['content'], "Unchanged items should not be evaluated"
+        assert len(answer.requests) == 2, "The duplicate check should still cover the whole survey"
+
+        items = second['individual_question_analysis']
+        assert [(q['table_number'], q['item_number']) for q in items] == [("1", "1"), ("1", "2"), ("2", "1"), ("2", "2"), ("2", "3")], "All items should be present"
+        assert items[3]['validity'] == "Valid" and items[3]['question_text'] == "The music was pleasant.", "Edited item should have a new verdict"
+        assert second['survey_general_instructions_analysis']['instructions_present'] is True, "Preamble verdict should be reused"
+
+        summary = second['models_used'][0]['analysis']['revision_summary']
+        assert summary == {'tables_reused': 1, 'tables_requeried': 1, 'items_reused': 4, 'items_requeried': 1}, f"Unexpected summary {summary}"
+
+        # A different survey under the same file name reuses nothing, even its identical item
+        third = analyze_single_file(make_upload(OTHER_SURVEY), [model], mode='incremental')['analysis']
+        summary = third['models_used'][0]['analysis']['revision_summary']
+        assert summary == {'tables_reused': 0, 'tables_requeried': 2, 'items_reused': 0, 'items_requeried': 4}, f"Unexpected summary {summary}"
+
+    print("[PASS] Incremental re-analysis test passed")
+
+def run_tests():
+    """Run all revision tests"""
+    print("Testing incremental re-analysis...")
+
+    test_document_key()
+    test_same_document()
+    test_concurrent_saves()
+    test_incremental_reanalysis()
+
+    print("\n[SUCCESS] All revision tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Test script to verify that the local rule engine flags mechanically checkable criteria and that
+decided items can be kept out of the model request
+"""
+
+
+from rule_engine import screen_text, screen_survey, check_scale, rule_verdict, attach_rule_findings
+from mock_llm_server import MockLLMServer
+from app import analyze_single_file
+from test_support import isolated_caches, make_model, make_upload
+
+SURVEY = """General Instructions:
+Please rate each statement using the following scale:
+4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree
+
+Table 1: Service Quality
+1. The staff were courteous.
+2. Prices and/or portions were fair.
+3. The Menu Was Easy To Read.
+4. The food was hot. The plates were clean.
+"""
+
+# DOCX extraction output with the scale as a legend table
+LEGEND_SURVEY = """General Instructions:
+Please rate each statement using the following scale:
+| Strongly Agree | 4 |
+| Agree | 3 |
+| Disagree | 2 |
+| Strongly Disagree | 1 |
+
+Service Quality: How customers rate the service
+| During my visit | 4 | 3 | 2 | 1 |
+| The staff were courteous. |  |  |  |  |
+| The staff were quick and/or friendly. |  |  |  |  |
+
+Atmosphere: How pleasant the dining room is
+| During my visit | 4 | 3 | 2 | 1 |
+| The dining room was clean. |  |  |  |  |
+"""
+
+def rules(text):
+    return [(finding.criterion, finding.rule, finding.severity) for finding in screen_text(text)]
+
+def test_item_rules():
+    """Test each rule on items that pass and fail it"""
+    assert rules("The staff were courteous.") == [], "A simple statement should pass"
+    assert rules("Dr. Smith explained the treatment clearly.") == [], "Abbreviations do not end a sentence"
+    assert rules("The staff could have been faster.") == [], "Auxiliary chains are one main verb"
+    assert rules("The manager, who was present, was helpful.") == [], "Commas alone do not start a clause"
+
+    assert (6, 'multiple_sentences', 'fail') in rules("The food was hot. The plates were clean."), "Two sentences should fail"
+    assert rules("Timely service") == [(6, 'fragment', 'fail')], "Fragments should fail"
+    assert rules("I would recommend the restaurant") == [(6, 'no_terminal_punctuation', 'warn')], "Missing periods are warnings"
+    assert rules("Prices and/or portions were fair.") == [(7, 'and_or', 'fail')], "and/or should fail"
+    assert rules("The staff were courteous and helpful.") == [(7, 'conjunction', 'warn')], "A conjunction is only a warning"
+    assert rules("The staff were friendly and the food was good.") == [(7, 'conjunction', 'warn'), (10, 'multiple_clauses', 'fail')], "Coordinated clauses have two main verbs"
+    assert rules("The Menu Was Easy To Read.") == [(11, 'title_case', 'fail')], "Title case should fail"
+    assert rules("THE MENU WAS EASY TO READ.") == [(11, 'all_caps', 'fail')], "Capitals should fail"
+
+    verdict = rule_verdict(screen_text("Prices and/or portions were fair."))
+    assert verdict['validity'] == "Not Valid" and verdict['reason'].startswith("CRITERIA 7"), f"Unexpected verdict {verdict}"
+    assert rule_verdict(screen_text("The staff were courteous and helpful.")) is None, "Warnings should not decide an item"
+
+    print("[PASS] Item rules test passed")
+
+def test_scale_and_screening():
+    """Test the scale text check and the per-survey summary"""
+    assert check_scale("Rate: 4 = strongly agree; 3 = agree; 2 = disagree; 1 = strongly disagree")['scale_correctly_defined'], "Separators may vary"
+    scale = check_scale("Rate each item from 1 (strongly disagree) to 5 (strongly agree)")
+    assert not scale['scale_correctly_defined'] and scale['scale_mentioned'], "A different scale should be reported"
+
+    screening = screen_survey(SURVEY)
+    assert sorted(screening.decided()) == ["T1-2", "T1-3", "T1-4"], f"Unexpected decided items {sorted(screening.decided())}"
+    summary = screening.summary()
+    assert summary['scale_correctly_defined'] and (summary['items'], summary['failed_items']) == (4, 3), f"Unexpected summary {summary}"
+
+    print("[PASS] Scale and screening test passed")
+
+def test_legend_table_and_matching():
+    """Test a DOCX scale legend table: the scale counts as defined, legend rows are not items, findings match by text"""
+    assert check_scale("| 4 | Strongly Agree |\n| 3 | Agree |\n| 2 | Disagree |\n| 1 | Strongly Disagree |")['scale_correctly_defined'], \
+        "A legend table should define the scale"
+
+    screening = screen_survey(LEGEND_SURVEY)
+    assert screening.summary()['scale_correctly_defined'], "The legend in the instructions should define the scale"
+    assert [item.text for item in screening.survey.items()] == ["The staff were courteous.", "The staff were quick and/or friendly.", "The dining room was clean."], \
+        "Legend rows should not be items"
+    assert sorted(screening.decided()) == ["T1-2"], f"Only the and/or item should be decided, got {sorted(screening.decided())}"
+
+    # The model numbered the items differently from the survey (continuously, in its own order)
+    items = [{"table_number": "2", "item_number": "3", "question_text": "The dining room was clean."},
+             {"table_number": "1", "item_number": "1", "question_text": "The staff were quick  and/or friendly."},
+             {"table_number": "1", "item_number": "2", "question_text": "The staff were courteous."}]
+    attach_rule_findings(items, screening)
+    assert [finding['rule'] for finding in items[1]['rule_findings']] == ['and_or'], "Findings should follow the text"
+    assert items[0]['rule_findings'] == [] and items[2]['rule_findings'] == [], "Passing items should have no failing findings"
+
+    print("[PASS] Legend table and matching test passed")
+
+def test_decided_items_skip_the_model():
+    """Test that decided items are marked as context only and keep their local verdict"""
+    with isolated_caches():
+        with MockLLMServer() as server:
+            model = make_model(server.url, skip_rule_decided=True)
+            analysis = analyze_single_file(make_upload(SURVEY), [model], mode='structured')['analysis']
+            assert server.stats['requests'] == 1, "Decided items should not need a follow-up request"
+
+        items = analysis['individual_question_analysis']
+        assert [item['item_number'] for item in items] == ["1", "2", "3", "4"], "Every item should be reported"
+        assert items[0]['validity'] == "Valid" and not items[0].get('decided_by_rules'), "Undecided items come from the model"
+        assert all(item['decided_by_rules'] and item['validity'] == "Not Valid" for item in items[1:]), "Decided items keep the local verdict"
+        assert items[3]['rule_findings'][0]['rule'] == 'multiple_sentences', "Findings should be attached to the items"
+        assert analysis['rule_screening']['failed_items'] == 3, "The screening summary should be recorded"
+
+        # Scale legend rows are neither decided nor reported as items
+        with MockLLMServer() as server:
+            analysis = analyze_single_file(make_upload(LEGEND_SURVEY, "legend.txt"), [dict(model, endpoint=server.url)],
+                                           mode='structured')['analysis']
+        assert [item['question_text'] for item in analysis['individual_question_analysis']] == [
+            "The staff were courteous.", "The staff were quick and/or friendly.", "The dining room was clean."], "Only survey items should be reported"
+        assert analysis['rule_screening']['scale_correctly_defined'], "The legend should define the scale"
+
+    print("[PASS] Decided items test passed")
+
+def run_tests():
+    """Run all rule engine tests"""
+    print("Testing local rule engine...")
+
+    test_item_rules()
+    test_scale_and_screening()
+    test_legend_table_and_matching()
+    test_decided_items_skip_the_model()
+
+    print("\n[SUCCESS] All rule engine tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Test script to verify that large surveys are split per table, analyzed in parallel and merged
+"""
+
+import io
+
+from docx import Document
+
+from sharding import split_survey_content, merge_shard_analyses, apply_duplicate_groups, SurveyShards, TableShard
+from app import analyze_single_file, process_uploaded_file
+from mock_llm_server import MockLLMServer
+from test_support import isolated_caches, make_upload, make_model, RecordingAnswer
+
+SAMPLE_SURVEY = """Survey: Customer Experience
+
+General Instructions:
+Please rate each statement using the following scale:
+4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree
+
+Part 2: Variables
+Service Quality: Measures customer perception of service excellence
+
+Part 3: Variables
+Atmosphere: Measures the ambiance of the establishment
+
+Table 1: Service Quality
+1. The staff were courteous and helpful.
+2. The service was timely.
+
+Table 2: Atmosphere
+1. The restaurant had a pleasant atmosphere.
+2. The staff were polite and helpful.
+"""
+
+def make_item(table_number, item_number, text, validity="Valid"):
+    return {"table_number": table_number, "item_number": item_number, "question_text": text,
+            "validity": validity, "reason": "Clear statement", "duplicates_with": []}
+
+def shard_answer(payload):
+    """Answers preamble, table and duplicate-check requests like the model would"""
+    user_message = payload['messages'][-1]['content']
+    if 'duplicate_groups' in payload['messages'][0]['content']:
+        return {"duplicate_groups": [["T1-1", "T2-2"]]}
+    if 'Analyze ONLY the general instructions' in user_message:
+        return {"survey_general_instructions_analysis": {"instructions_present": True},
+                "survey_parts_analysis": {"part_2_has_only_definitions": True},
+                "individual_question_analysis": [],
+                "overall_assessment": "Well structured", "recommendations": []}
+    if 'Table 1:\n' in user_message:
+        return {"individual_question_analysis": [make_item("1", "1", "The staff were courteous and helpful."),
+                                                 make_item("1", "2", "The service was timely.")]}
+    # The model echoes its own table numbering, which the merge must override
+    return {"individual_question_analysis": [make_item("1", "1", "The restaurant had a pleasant atmosphere."),
+                                             make_item("1", "2", "The staff were polite and helpful.")]}
+
+def test_split_text_survey():
+    """Test that TXT surveys split into the preamble and one shard per table"""
+    shards = split_survey_content(SAMPLE_SURVEY)
+
+    assert len(shards.tables) == 2, f"Expected two tables, got {len(shards.tables)}"
+    assert "General Instructions" in shards.preamble and "Part 3" in shards.preamble, "Preamble should hold instructions and parts"
+    assert "Table" not in shards.preamble, "Preamble should not contain tables"
+    assert shards.tables[0].text.startswith("Table 1") and "timely" in shards.tables[0].text, "First shard should hold table 1"
+    assert "pleasant atmosphere" in shards.tables[1].text, "Second shard should hold table 2"
+
+    print("[PASS] Text survey split test passed")
+
+def test_split_docx_survey():
+    """Test that DOCX tables extracted by process_uploaded_file become separate shards headed by their variable"""
+    with isolated_caches():
+        doc = Document()
+        doc.add_paragraph("General Instructions: use the 4-3-2-1 scale.")
+        doc.add_paragraph("Service Quality: Measures service excellence")
+        for stem, items in [("The staff...", ["were courteous.", "were quick."]), ("The place...", ["was clean."])]:
+            table = doc.add_table(rows=1, cols=2)
+            table.rows[0].cells[0].text = stem
+            for item in items:
+                table.add_row().cells[0].text = item
+        buffer = io.BytesIO()
+        doc.save(buffer)
+
+        shards = split_survey_content(process_uploaded_file(make_upload(buffer.getvalue(), "survey.docx")))
+
+        assert len(shards.tables) == 2, f"Expected two tables, got {len(shards.tables)}"
+        assert "were quick." in shards.tables[0].text and "was clean." not in shards.tables[0].text, "Tables should not mix"
+        assert shards.tables[0].text.startswith("Service Quality"), "The variable above a table should head its shard"
+        assert shards.preamble == "General Instructions: use the 4-3-2-1 scale.", "Only the instructions should stay in the preamble"
+
+    print("[PASS] DOCX survey split test passed")
+
+def test_merge_and_duplicates():
+    """Test merging shard results and applying the cross-table duplicate check"""
+    shards = SurveyShards("preamble", [TableShard(1, "t1"), TableShard(2, "t2")])
+    preamble = {"survey_general_instructions_analysis": {"instructions_present": True},
+                "overall_assessment": "Good", "recommendations": ["Fix Part 3"]}
+    tables = [{"individual_question_analysis": [make_item("9", "1", "A")], "recommendations": []},
+              {"individual_question_analysis": [make_item("9", "1", "B")], "recommendations": ["Table 2 note"]}]
+
+    merged = merge_shard_analyses(shards, preamble, tables)
+    items = merged['individual_question_analysis']
+    assert [item['table_number'] for item in items] == ["1", "2"], "Tables should be numbered by shard"
+    assert merged['recommendations'] == ["Fix Part 3", "Table 2 note"], "Recommendations should be combined"
+
+    apply_duplicate_groups(items, [["T1-1", "T2-1"], ["T1-1", "T5-5"]])
+    assert items[0]['validity'] == "Valid", "First occurrence should stay valid"
+    assert items[1]['validity'] == "Not Valid" and "DUPLICATION" in items[1]['reason'], "Later duplicate should be invalid"
+    assert items[0]['duplicates_with'][0]['table_number'] == "2", "Duplicate should be recorded on both items"
+    assert len(items[0]['duplicates_with']) == 1, "Unknown ids should be ignored"
+
+    print("[PASS] Merge and duplicate check test passed")
+
+def test_sharded_analysis():
+    """Test the full sharded analysis against a local stand-in for the API"""
+    answer = RecordingAnswer(shard_answer)
+    with isolated_caches(), MockLLMServer(answer=answer) as server:
+        result = analyze_single_file(make_upload(SAMPLE_SURVEY), [make_model(server.url)], mode='sharded')
+        analysis = result['analysis']
+        items = analysis['individual_question_analysis']
+
+        assert len(answer.requests) == 4, f"Expected preamble, two tables and a duplicate check, got {len(answer.requests)}"
+        assert answer.requests[-1]['model'] == "deepseek-chat", "Duplicate check should use the cheap model"
+        assert analysis['survey_general_instructions_analysis']['instructions_present'] is True, "Preamble analysis should be kept"
+        assert [(q['table_number'], q['item_number']) for q in items] == [("1", "1"), ("1", "2"), ("2", "1"), ("2", "2")], "Items should be merged in table order"
+        assert items[3]['validity'] == "Not Valid" and items[3]['duplicates_with'][0]['table_number'] == "1", "Cross-table duplicate should be flagged"
+
+    print("[PASS] Sharded analysis test passed")
+
+def run_tests():
+    """Run all sharding tests"""
+    print("Testing table-level sharding...")
+
+    test_split_text_survey()
+    test_split_docx_survey()
+    test_merge_and_duplicates()
+    test_sharded_analysis()
+
+    print("\n[SUCCESS] All sharding tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
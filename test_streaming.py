@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+Test script to verify streamed responses deliver each question analysis as soon as it is complete
+"""
+
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from streaming import IncrementalItemParser, StreamingResultWriter, sse_content_deltas
+from app import call_ai_model, analyze_single_file
+from async_engine import analyze_files
+from analysis_models import normalize_items
+from mock_llm_server import MockLLMServer
+from test_support import isolated_caches, make_model, make_upload
+
+TWO_TABLE_SURVEY = """General Instructions:
+Please rate each statement using the following scale:
+4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree
+
+Table 1: Service Quality
+1. The staff were courteous.
+2. The service was timely.
+
+Table 2: Atmosphere
+1. The restaurant was clean.
+2. The music was loud and the lights were dim.
+"""
+
+SAMPLE_ANALYSIS = {
+    "survey_general_instructions_analysis": {"instructions_present": True, "issues_found": []},
+    "individual_question_analysis": [
+        {"table_number": "1", "item_number": "1", "question_text": "The menu {daily} is clear.", "validity": "Valid"},
+        {"table_number": "1", "item_number": "2", "question_text": "Staff say \"hi\" and smile }", "validity": "Not Valid"},
+        {"table_number": "2", "item_number": "1", "question_text": "Prices are fair.", "validity": "Valid",
+         "duplicates_with": [{"table_number": "1", "item_number": "1"}]}
+    ],
+    "overall_assessment": "Mostly good",
+    "recommendations": []
+}
+
+def sse_events(content, chunk_size=7):
+    """Split content into chat completion chunks the way the API streams them"""
+    events = [": keep-alive", "data: " + json.dumps({"choices": [{"delta": {"reasoning_content": "thinking"}}]})]
+    for i in range(0, len(content), chunk_size):
+        events.append("data: " + json.dumps({"choices": [{"delta": {"content": content[i:i + chunk_size]}}]}))
+    return events
+
+class StreamingHandler(BaseHTTPRequestHandler):
+    """Streams SAMPLE_ANALYSIS as SSE; drop_after cuts the connection after that many characters"""
+    drop_after = None
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        content = "```json\n" + json.dumps(SAMPLE_ANALYSIS) + "\n```"
+        if StreamingHandler.drop_after:
+            content = content[:StreamingHandler.drop_after]
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for event in sse_events(content):
+            self.wfile.write((event + "\n\n").encode('utf-8'))
+        if not StreamingHandler.drop_after:
+            self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(drop_after=None):
+    StreamingHandler.drop_after = drop_after
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StreamingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+
+def test_incremental_parser():
+    """Test that items are emitted exactly when their closing brace arrives"""
+    content = "Here it is:\n```json\n" + json.dumps(SAMPLE_ANALYSIS, indent=2) + "\n```"
+    parser = IncrementalItemParser()
+    emitted_at = []
+    for i, char in enumerate(content):
+        for item in parser.feed(char):
+            emitted_at.append((i, item))
+
+    assert [item for _, item in emitted_at] == SAMPLE_ANALYSIS['individual_question_analysis'], "All items should be emitted in order"
+    first_end = content.index('"validity": "Valid"') + len('"validity": "Valid"')
+    assert emitted_at[0][0] < first_end + 10, "First item should be emitted as soon as it closes"
+    assert parser.content() == content, "Full content should be kept"
+
+    print("[PASS] Incremental parser test passed")
+
+def test_sse_decoding():
+    """Test that only answer content deltas are decoded from SSE lines"""
+    content = json.dumps(SAMPLE_ANALYSIS)
+    lines = sse_events(content) + ["", "data: [DONE]", "data: " + json.dumps({"choices": [{"delta": {"content": "ignored"}}]})]
+
+    assert ''.join(sse_content_deltas(lines)) == content, "Deltas should reassemble the content"
+
+    print("[PASS] SSE decoding test passed")
+
+def test_streamed_call():
+    """Test that call_ai_model reports items while streaming and returns the full analysis"""
+    with isolated_caches():
+        server, url = start_server()
+        try:
+            received = []
+            analysis = call_ai_model("Survey content", make_model(url, stream=True), on_item=received.append)
+
+            assert received == normalize_items(SAMPLE_ANALYSIS['individual_question_analysis']), "Every item should be streamed"
+            assert analysis['individual_question_analysis'] == received, "Final analysis should contain the items"
+            assert analysis['overall_assessment'] == "Mostly good", "Top-level sections should be parsed"
+        finally:
+            server.shutdown()
+
+    print("[PASS] Streamed call test passed")
+
+def test_dropped_connection_keeps_items():
+    """Test that items that arrived before the connection dropped are kept"""
+    with isolated_caches():
+        content = "```json\n" + json.dumps(SAMPLE_ANALYSIS)
+        drop_after = content.index('{"table_number": "2"')
+        server, url = start_server(drop_after=drop_after)
+        try:
+            received = []
+            analysis = call_ai_model("Survey content", make_model(url, stream=True), on_item=received.append)
+
+            assert len(received) == 2, f"Two complete items should have arrived, got {len(received)}"
+            assert analysis['individual_question_analysis'] == received, "Arrived items should be kept"
+
+            results = analyze_files([make_upload("Survey content")], [make_model(url, stream=True)])
+            assert len(results[0]['analysis']['individual_question_analysis']) == 2, "Async engine should keep arrived items"
+        finally:
+            server.shutdown()
+
+    print("[PASS] Dropped connection test passed")
+
+def test_async_engine_streams_items():
+    """Test that the async engine reports streamed items per file"""
+    with isolated_caches():
+        server, url = start_server()
+        try:
+            received = []
+            results = analyze_files([make_upload("Survey content")], [make_model(url, stream=True)],
+                                    on_item=lambda uploaded_file, item: received.append((uploaded_file.name, item)))
+
+            assert [item for _, item in received] == normalize_items(SAMPLE_ANALYSIS['individual_question_analysis']), "Items should stream"
+            assert all(name == "survey.txt" for name, _ in received), "Items should be tagged with their file"
+            assert len(results[0]['analysis']['individual_question_analysis']) == 3, "Result should contain every item"
+        finally:
+            server.shutdown()
+
+    print("[PASS] Async engine streaming test passed")
+
+def test_live_items_numbered_like_result():
+    """Test that items streamed from renumbered answers carry the numbers of the final result"""
+    # The mock numbers every table "1" and answers the structured outline by item ID only
+    with isolated_caches(), MockLLMServer() as server:
+        for mode in ('sharded', 'structured', 'incremental'):
+            received = []
+            result = analyze_single_file(make_upload(TWO_TABLE_SURVEY), [make_model(server.url, stream=True)],
+                                         on_item=received.append, mode=mode)
+            live = sorted((item['table_number'], item['item_number'], item['question_text']) for item in received)
+            final = sorted((item['table_number'], item['item_number'], item['question_text'])
+                           for item in result['analysis']['individual_question_analysis'])
+            assert live == final, f"{mode}: live items {live} should match the result {final}"
+
+    print("[PASS] Live item numbering test passed")
+
+def test_result_writer():
+    """Test that streamed items are persisted and replaced by the final result"""
+    with tempfile.TemporaryDirectory() as directory:
+        writer = StreamingResultWriter(directory)
+        for item in SAMPLE_ANALYSIS['individual_question_analysis'][:2]:
+            writer.append_item("survey.docx", item)
+
+        assert writer.load_partial_items("survey.docx") == SAMPLE_ANALYSIS['individual_question_analysis'][:2], "Partial items should be on disk"
+
+        writer.finalize("survey.docx", {"filename": "survey.docx", "analysis": SAMPLE_ANALYSIS})
+        assert writer.load_partial_items("survey.docx") == [], "Partial file should be removed"
+        with open(writer.result_path("survey.docx"), 'r', encoding='utf-8') as f:
+            assert json.load(f)['filename'] == "survey.docx", "Final result should be written"
+
+    print("[PASS] Result writer test passed")
+
+def run_tests():
+    """Run all streaming tests"""
+    print("Testing streaming responses...")
+
+    test_incremental_parser()
+    test_sse_decoding()
+    test_streamed_call()
+    test_dropped_connection_keeps_items()
+    test_async_engine_streams_items()
+    test_live_items_numbered_like_result()
+    test_result_writer()
+
+    print("\n[SUCCESS] All streaming tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
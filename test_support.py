@@ -0,0 +1,61 @@
+"""
+Shared helpers for the test scripts: in-memory uploads, models pointed at a local server (see
+mock_llm_server.py) and on-disk caches isolated from the repository's own .cache directory
+"""
+
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import revisions
+import response_cache
+import extraction_cache
+from revisions import RevisionStore
+from response_cache import ResponseCache
+from extraction_cache import ExtractionCache
+
+
+@contextmanager
+def isolated_caches():
+    """
+    Point the process-wide extraction cache, response cache and revision store at a temporary
+    directory, yield that directory, then restore the previous instances and delete it
+    """
+    originals = (extraction_cache._extraction_cache, response_cache._response_cache, revisions._revision_store)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        extraction_cache._extraction_cache = ExtractionCache(os.path.join(cache_dir, 'extractions'))
+        response_cache._response_cache = ResponseCache(os.path.join(cache_dir, 'responses'))
+        revisions._revision_store = RevisionStore(os.path.join(cache_dir, 'revisions'))
+        try:
+            yield cache_dir
+        finally:
+            extraction_cache._extraction_cache, response_cache._response_cache, revisions._revision_store = originals
+
+
+def make_upload(content, name="survey.txt"):
+    """Return an in-memory upload of content (text or bytes) named like a Streamlit UploadedFile"""
+    uploaded_file = io.BytesIO(content.encode('utf-8') if isinstance(content, str) else content)
+    uploaded_file.name = name
+    return uploaded_file
+
+
+def make_model(url, **options):
+    """Return a DeepSeek model that sends its requests to url, without the response cache unless overridden"""
+    return dict({"name": "DeepSeek Reasoner", "api_key": "test", "provider": "deepseek", "temperature": 0.3,
+                 "endpoint": url, "use_cache": False}, **options)
+
+
+class RecordingAnswer:
+    """Answer function for MockLLMServer that keeps the payload of every request it answers"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, payload):
+        with self._lock:
+            self.requests.append(payload)
+        return self.answer(payload)
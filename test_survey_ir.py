@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Test script to verify that surveys are parsed into a structured outline, sent with item IDs and
+that ID-keyed verdicts are merged back deterministically
+"""
+
+import json
+
+from survey_ir import parse_survey, render_survey_ir, expand_verdicts
+from prompts import get_deepseek_prompt, get_structured_survey_prompt
+from mock_llm_server import MockLLMServer
+from app import analyze_single_file
+from test_support import isolated_caches, make_model, make_upload
+
+SURVEY = """Survey: Customer Experience
+
+General Instructions:
+Please rate each statement using the following scale:
+4 - Strongly Agree, 3 - Agree, 2 - Disagree, 1 - Strongly Disagree
+
+Part 2: Variables
+Service Quality: Measures customer perception of service excellence
+
+Atmosphere: How pleasant the dining room is
+| During my visit | 4 | 3 | 2 | 1 |
+| 1. The music was pleasant. |  |  |  |  |
+| 2. The seats were comfortable. |  |  |  |  |
+
+Table 2: Service Quality
+Rate how much you agree that during your visit
+1. The staff were courteous and helpful.
+2. The service was timely.
+"""
+
+def test_parse_survey():
+    """Test that sections, variables, stems and stable item IDs are parsed from text and DOCX tables"""
+    survey = parse_survey(SURVEY)
+
+    assert [section.title for section in survey.sections] == ["", "General Instructions:", "Part 2: Variables"], "Preamble sections should be split"
+    assert [(v.name, v.definition) for v in survey.variables] == [
+        ("Service Quality", "Measures customer perception of service excellence"),
+        ("Atmosphere", "How pleasant the dining room is")], f"Unexpected variables {survey.variables}"
+
+    first, second = survey.tables
+    assert second.variable.definition == "Measures customer perception of service excellence", "Part 2 definitions should attach to their table"
+    assert first.stem == "During my visit 4 3 2 1", f"Unexpected row stem {first.stem!r}"
+    assert second.stem == "Rate how much you agree that during your visit", f"Unexpected text stem {second.stem!r}"
+    assert [(item.id, item.text) for item in first.items] == [("T1-1", "The music was pleasant."), ("T1-2", "The seats were comfortable.")], "Items should get table-position IDs"
+    assert not hasattr(first.items[0], '__dict__'), "IR nodes should use __slots__"
+
+    outline = render_survey_ir(survey)
+    assert "Stem: Rate how much you agree that during your visit\nT2-1: The staff" in outline and "|" not in outline, "Items should be listed by ID without table markup"
+    structured = sum(len(m['content']) for m in get_structured_survey_prompt(outline))
+    full = sum(len(m['content']) for m in get_deepseek_prompt(SURVEY))
+    assert structured < full + 400, "The outline should not grow the request"
+
+    print("[PASS] Survey parsing test passed")
+
+# DOCX extraction output with a scale legend table above the item tables
+LEGEND_SURVEY = """General Instructions:
+Please rate each statement using the following scale:
+| Scale | Description |
+| 4 | Strongly Agree |
+| 3 | Agree |
+| 2 | Disagree |
+| 1 | Strongly Disagree |
+
+Atmosphere: How pleasant the dining room is
+| The dining room... | 4 | 3 | 2 | 1 |
+| had pleasant music. |  |  |  |  |
+| had comfortable seats. |  |  |  |  |
+"""
+
+def test_legend_table_stays_in_preamble():
+    """Test that only tables of statements become item tables and a scale legend stays in the instructions"""
+    survey = parse_survey(LEGEND_SURVEY)
+
+    assert len(survey.tables) == 1, f"Only the item table should be parsed, got {len(survey.tables)}"
+    assert survey.tables[0].variable.name == "Atmosphere", "The item table should keep its variable heading"
+    assert [item.id for item in survey.items()] == ["T1-1", "T1-2"], "Item tables should be numbered without the legend"
+    instructions = survey.sections[0]
+    assert instructions.title == "General Instructions:" and "| 1 | Strongly Disagree |" in instructions.text, \
+        "The legend should stay in the instructions"
+    assert "Please rate each statement" in instructions.text, "The line above the legend should stay too"
+
+    print("[PASS] Legend table test passed")
+
+def test_expand_verdicts():
+    """Test that verdicts keyed by ID are expanded in survey order, with unknown and repeated IDs dropped"""
+    survey = parse_survey(SURVEY)
+    verdicts = [
+        {"item_id": "T2-2", "validity": "Valid", "duplicates_with": [{"item_id": "T1-1"}, {"item_id": "T9-9"}]},
+        {"item_id": "T1-1", "validity": "Not Valid", "reason": "Double-barreled"},
+        {"item_id": "T1-1", "validity": "Valid"},
+        {"item_id": "T7-1", "validity": "Valid"},
+        {"table_number": "1", "item_number": "2", "validity": "Valid"}
+    ]
+    items = expand_verdicts(survey, verdicts)
+
+    assert [item['question_id'] for item in items] == ["T1-1", "T1-2", "T2-2"], "Items should follow survey order"
+    assert items[0]['validity'] == "Not Valid" and 'item_id' not in items[0], "The first verdict per ID should win"
+    assert items[2]['variable_name'] == "Service Quality" and items[2]['question_text'] == "The service was timely.", "Text and variable come from the IR"
+    assert items[2]['duplicates_with'] == [{"table_number": "1", "item_number": "1", "question_text": "The music was pleasant."}], "Duplicates should be mapped by ID"
+
+    print("[PASS] Verdict expansion test passed")
+
+def test_structured_mode():
+    """Test that the structured mode sends the outline and merges the ID-keyed answer"""
+    with isolated_caches():
+        with MockLLMServer() as server:
+            analysis = analyze_single_file(make_upload(SURVEY), [make_model(server.url)], mode='structured')['analysis']
+            assert server.stats['requests'] == 1, "Every item should be answered in one request"
+
+        items = analysis['individual_question_analysis']
+        assert [(q['table_number'], q['item_number']) for q in items] == [("1", "1"), ("1", "2"), ("2", "1"), ("2", "2")], "Every item should be merged"
+        assert items[2]['validity'] == "Not Valid" and items[2]['question_text'] == "The staff were courteous and helpful.", "Verdicts should be attached to their items"
+        assert analysis['models_used'][0]['analysis']['completeness']['missing_items'] == 0, "No follow-up should be needed"
+        assert json.loads(json.dumps(analysis)) == analysis, "The merged analysis should stay JSON serializable"
+
+    print("[PASS] Structured mode test passed")
+
+def run_tests():
+    """Run all survey IR tests"""
+    print("Testing structured survey representation...")
+
+    test_parse_survey()
+    test_legend_table_stays_in_preamble()
+    test_expand_verdicts()
+    test_structured_mode()
+
+    print("\n[SUCCESS] All survey IR tests passed!")
+
+if __name__ == "__main__":
+    run_tests()
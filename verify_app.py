@@ -9,7 +9,7 @@ try:
     print("[OK] App module imports successfully")
     
     # Test a few key functions
-    from app import process_uploaded_file, call_ai_model, generate_docx
+    from app import process_uploaded_file, call_ai_model, render_docx_bytes
     print("[OK] Key functions import successfully")
     
     # Test that required libraries are available